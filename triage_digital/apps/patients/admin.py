@@ -1,4 +1,7 @@
 from django.contrib import admin
+
+from config.paginacion import PaginadorEstimado
+
 from .models import Paciente
 
 
@@ -12,6 +15,9 @@ class PacienteAdmin(admin.ModelAdmin):
     search_fields = ('nombre', 'apellido', 'dni')
     readonly_fields = ('fecha_ingreso', 'tiempo_espera')
     list_per_page = 20
+    # Sin COUNT(*) exacto ni OFFSET sobre filas completas (tablas grandes)
+    paginator = PaginadorEstimado
+    show_full_result_count = False
     
     fieldsets = (
         ('Datos Básicos', {
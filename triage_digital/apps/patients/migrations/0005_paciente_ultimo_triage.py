@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def completar_ultimo_triage(apps, schema_editor):
+    """Rellena el último triage de los pacientes existentes con un único UPDATE."""
+    Paciente = apps.get_model('patients', 'Paciente')
+    SignosVitales = apps.get_model('triage', 'SignosVitales')
+    
+    alias = schema_editor.connection.alias
+    
+    ultimo = SignosVitales.objects.using(alias).filter(paciente=OuterRef('pk')).order_by('-fecha_hora', '-id')
+    Paciente.objects.using(alias).update(
+        ultimo_triage=Subquery(ultimo.values('pk')[:1]),
+        ultimo_nivel_urgencia=Subquery(ultimo.values('nivel_urgencia')[:1]),
+        ultimo_news_score=Subquery(ultimo.values('news_score')[:1]),
+        ultimo_triage_fecha=Subquery(ultimo.values('fecha_hora')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0004_paciente_profesional_atencion'),
+        ('triage', '0002_alter_profesional_tipo_signosvitales_idx_fecha_nivel_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paciente',
+            name='ultimo_news_score',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Último Puntaje NEWS'),
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='ultimo_nivel_urgencia',
+            field=models.CharField(blank=True, editable=False, max_length=8, null=True, verbose_name='Último Nivel de Urgencia'),
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='ultimo_triage',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='triage.signosvitales', verbose_name='Último Triage'),
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='ultimo_triage_fecha',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Fecha del Último Triage'),
+        ),
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(fields=['activo', 'estado_atencion', 'ultimo_nivel_urgencia'], name='idx_pacientes_urgencia'),
+        ),
+        migrations.RunPython(completar_ultimo_triage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0005_paciente_ultimo_triage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(fields=['fecha_atencion'], name='idx_pacientes_fecha_atencion'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:32
+
+import uuid
+from django.db import migrations, models
+
+
+def asignar_uids(apps, schema_editor):
+    """Un uid distinto por paciente existente (el default se evalúa una sola vez)."""
+    Paciente = apps.get_model('patients', 'Paciente')
+    alias = schema_editor.connection.alias
+    pacientes = list(Paciente.objects.using(alias).only('id'))
+    for paciente in pacientes:
+        paciente.uid = uuid.uuid4()
+    Paciente.objects.using(alias).bulk_update(pacientes, ['uid'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0006_paciente_idx_fecha_atencion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paciente',
+            name='uid',
+            field=models.UUIDField(editable=False, null=True, verbose_name='ID Global'),
+        ),
+        migrations.RunPython(asignar_uids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='paciente',
+            name='uid',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='ID Global'),
+        ),
+    ]
@@ -5,36 +5,158 @@ Este módulo contiene el modelo Paciente que almacena la información básica
 de cada persona que ingresa al sistema de triaje hospitalario.
 """
 
-from django.db import models
+import uuid
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import models, router, transaction
 from django.core.validators import RegexValidator
 from django.utils import timezone
 
 
+class MinutosDesde(models.Func):
+    """
+    Minutos enteros transcurridos desde una columna fecha hasta `ahora`.
+    
+    Equivale a int((ahora - fecha).total_seconds() / 60) de Python, calculado
+    en la base de datos para poder ordenar y paginar por tiempo de espera.
+    """
+    output_field = models.IntegerField()
+    
+    def __init__(self, expression, ahora, **extra):
+        super().__init__(expression, models.Value(ahora, output_field=models.DateTimeField()), **extra)
+    
+    def _compilar(self, compiler):
+        fecha_sql, fecha_params = compiler.compile(self.source_expressions[0])
+        ahora_sql, ahora_params = compiler.compile(self.source_expressions[1])
+        return fecha_sql, ahora_sql, (*ahora_params, *fecha_params)
+    
+    def as_sql(self, compiler, connection, **extra_context):
+        # PostgreSQL: diferencia de timestamps como intervalo
+        fecha_sql, ahora_sql, params = self._compilar(compiler)
+        sql = f"CAST(TRUNC(EXTRACT(EPOCH FROM ({ahora_sql} - {fecha_sql})) / 60) AS INTEGER)"
+        return sql, params
+    
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # SQLite: julianday redondeado a milisegundos y división entera
+        fecha_sql, ahora_sql, params = self._compilar(compiler)
+        sql = (
+            f"(CAST(ROUND((julianday({ahora_sql}) - julianday({fecha_sql})) * 86400000) AS INTEGER)"
+            f" / 60000)"
+        )
+        return sql, params
+
+
+def formatear_espera(delta):
+    """Tiempo de espera legible ('45m', '2h 10m', '1d 3h') a partir de un timedelta."""
+    horas = delta.seconds // 3600
+    minutos = (delta.seconds % 3600) // 60
+    
+    if delta.days > 0:
+        return f"{delta.days}d {horas}h"
+    elif horas > 0:
+        return f"{horas}h {minutos}m"
+    else:
+        return f"{minutos}m"
+
+
+def _puntos_si(condicion, puntos):
+    """Expresión que vale `puntos` si se cumple la condición, 0 si no."""
+    return models.Case(
+        models.When(condicion, then=models.Value(puntos)),
+        default=models.Value(0),
+        output_field=models.IntegerField(),
+    )
+
+
 class PacienteManager(models.Manager):
     """Manager optimizado para consultas frecuentes de pacientes."""
     
     def activos_en_espera(self):
-        """Pacientes activos en espera con datos pre-cargados."""
+        """Pacientes activos en espera con su último triage (sin historial completo)."""
         return self.filter(
             activo=True,
             estado_atencion='ESPERANDO'
-        ).prefetch_related('signos_vitales').order_by('-fecha_ingreso')
+        ).select_related('ultimo_triage').order_by('-fecha_ingreso')
     
     def criticos_sin_atender(self):
-        """Pacientes críticos que necesitan atención inmediata."""
+        """Pacientes críticos (último triage ROJO/AMARILLO) que necesitan atención inmediata."""
         return self.filter(
             activo=True,
             estado_atencion__in=['ESPERANDO', 'EN_ATENCION'],
-            signos_vitales__nivel_urgencia__in=['ROJO', 'AMARILLO']
-        ).select_related().prefetch_related('signos_vitales').distinct()
+            ultimo_nivel_urgencia__in=['ROJO', 'AMARILLO']
+        ).select_related('ultimo_triage')
+    
+    def cola_priorizada(self, ahora=None):
+        """
+        🚨 Cola de espera completa ordenada por la base de datos.
+        
+        Anota `prioridad_critica` con la misma fórmula que
+        SignosVitales.calcular_prioridad_critica (solo códigos ROJO) y ordena:
+        ROJOS por prioridad descendente, luego el resto por llegada más reciente.
+        `prioridad_base` es esa misma prioridad sin el término de espera.
+        Admite slicing (LIMIT/OFFSET) directamente sobre el queryset.
+        
+        Args:
+            ahora: Momento de referencia para el tiempo de espera (default: now)
+        """
+        if ahora is None:
+            ahora = timezone.now()
+        
+        prioridad_base = (
+            # 1. NEWS Score (peso 100)
+            models.F('ultimo_news_score') * 100
+            # 3. Edad avanzada
+            + _puntos_si(models.Q(edad__gt=65), 50)
+            # 4. Signos vitales ultra-críticos
+            + _puntos_si(models.Q(ultimo_triage__saturacion_oxigeno__lt=85), 200)
+            + _puntos_si(models.Q(ultimo_triage__tension_sistolica__lt=80), 150)
+            + _puntos_si(
+                models.Q(ultimo_triage__frecuencia_cardiaca__gt=140) |
+                models.Q(ultimo_triage__frecuencia_cardiaca__lt=40), 150
+            )
+            + _puntos_si(models.Q(ultimo_triage__nivel_conciencia__in=['P', 'U']), 250)
+            + _puntos_si(
+                models.Q(ultimo_triage__temperatura__gt=Decimal('40.0')) |
+                models.Q(ultimo_triage__temperatura__lt=Decimal('34.0')), 100
+            )
+        )
+        
+        return self.activos_en_espera().annotate(
+            minutos_espera=MinutosDesde('fecha_ingreso', ahora),
+            es_rojo=_puntos_si(models.Q(ultimo_nivel_urgencia='ROJO'), 1),
+            # Parte de la prioridad que no depende del reloj (la usa el índice en memoria)
+            prioridad_base=models.Case(
+                models.When(ultimo_nivel_urgencia='ROJO', then=prioridad_base),
+                default=models.Value(0),
+                output_field=models.IntegerField(),
+            ),
+        ).annotate(
+            # 2. Tiempo de espera (peso 10 por minuto después de 30 min)
+            prioridad_critica=models.Case(
+                models.When(
+                    ultimo_nivel_urgencia='ROJO', minutos_espera__gt=30,
+                    then=models.F('prioridad_base') + (models.F('minutos_espera') - 30) * 10,
+                ),
+                default=models.F('prioridad_base'),
+                output_field=models.IntegerField(),
+            ),
+        ).order_by('-es_rojo', '-prioridad_critica', '-fecha_ingreso', '-id')
     
     def estadisticas_diarias(self, fecha=None):
-        """Estadísticas optimizadas para un día específico."""
+        """
+        Estadísticas optimizadas para un día específico (fecha local del hospital).
+        
+        Filtra por rango [00:00, 00:00 del día siguiente) en lugar de
+        `fecha_ingreso__date`, que envuelve la columna y no usa el índice.
+        """
         if fecha is None:
-            fecha = timezone.now().date()
+            fecha = timezone.localdate()
         
+        inicio = timezone.make_aware(datetime.combine(fecha, time.min))
+        fin = timezone.make_aware(datetime.combine(fecha + timedelta(days=1), time.min))
         return self.filter(
-            fecha_ingreso__date=fecha
+            fecha_ingreso__gte=inicio, fecha_ingreso__lt=fin
         ).aggregate(
             total=models.Count('id'),
             atendidos=models.Count('id', filter=models.Q(estado_atencion__in=['PASE_A_SALA', 'ALTA', 'PASE_A_UTI'])),
@@ -149,6 +271,49 @@ class Paciente(models.Model):
         help_text="Indica si el paciente está actualmente en el sistema"
     )
     
+    # Identificador global para sincronizar bases (el id autoincremental
+    # se repite entre la central y las estaciones offline; este no)
+    uid = models.UUIDField(
+        default=uuid.uuid4,
+        unique=True,
+        editable=False,
+        verbose_name="ID Global"
+    )
+    
+    # Último triage desnormalizado: se mantiene en la misma transacción que
+    # el alta de SignosVitales para no recorrer el historial en cada listado
+    ultimo_triage = models.ForeignKey(
+        'triage.SignosVitales',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name="Último Triage"
+    )
+    
+    ultimo_nivel_urgencia = models.CharField(
+        max_length=8,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Último Nivel de Urgencia"
+    )
+    
+    ultimo_news_score = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Último Puntaje NEWS"
+    )
+    
+    ultimo_triage_fecha = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Fecha del Último Triage"
+    )
+    
     # Manager optimizado
     objects = PacienteManager()
 
@@ -163,10 +328,14 @@ class Paciente(models.Model):
             models.Index(fields=['dni'], name='idx_pacientes_dni'),
             # Índice para estadísticas por fecha
             models.Index(fields=['fecha_ingreso'], name='idx_pacientes_fecha'),
+            # Índice para atendidos por rango de fecha (reportes y resúmenes)
+            models.Index(fields=['fecha_atencion'], name='idx_pacientes_fecha_atencion'),
             # NUEVO: Índice compuesto optimizado para dashboard
             models.Index(fields=['activo', 'estado_atencion'], name='idx_estado_activo'),
             # NUEVO: Índice para búsquedas por edad en emergencias
             models.Index(fields=['edad'], name='idx_pacientes_edad'),
+            # Índice para lista de espera y críticos por último triage
+            models.Index(fields=['activo', 'estado_atencion', 'ultimo_nivel_urgencia'], name='idx_pacientes_urgencia'),
         ]
         
     def __str__(self):
@@ -177,6 +346,16 @@ class Paciente(models.Model):
         else:
             return f"Paciente Inconsciente #{self.id}"
     
+    def save(self, *args, **kwargs):
+        """
+        Guarda en una transacción junto con lo que agregan los signals post_save
+        (diario de sincronización, contadores, resúmenes): si algo falla, no
+        queda un paciente sin su entrada en el diario.
+        """
+        using = kwargs.get('using') or router.db_for_write(Paciente, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+    
     @property
     def nombre_completo(self):
         """Retorna el nombre completo del paciente o identificación alternativa."""
@@ -208,16 +387,7 @@ class Paciente(models.Model):
         if not hasattr(self, '_tiempo_delta_cache'):
             self._tiempo_delta_cache = timezone.now() - self.fecha_ingreso
         
-        delta = self._tiempo_delta_cache
-        horas = delta.seconds // 3600
-        minutos = (delta.seconds % 3600) // 60
-        
-        if delta.days > 0:
-            return f"{delta.days}d {horas}h"
-        elif horas > 0:
-            return f"{horas}h {minutos}m"
-        else:
-            return f"{minutos}m"
+        return formatear_espera(self._tiempo_delta_cache)
 
     @property
     def tiempo_espera_minutos(self):
@@ -232,17 +402,45 @@ class Paciente(models.Model):
         return int(self._tiempo_delta_cache.total_seconds() / 60)
     
     def es_critico(self):
-        """Verifica si tiene triage crítico (ROJO/AMARILLO) - OPTIMIZADO."""
-        # Usar select_related para evitar consulta adicional
-        if hasattr(self, '_ultimo_triage_cache'):
-            ultimo_triage = self._ultimo_triage_cache
-        else:
-            ultimo_triage = self.signos_vitales.select_related().first()
-            self._ultimo_triage_cache = ultimo_triage
-            
-        if ultimo_triage and ultimo_triage.nivel_urgencia:
-            return ultimo_triage.nivel_urgencia in ['ROJO', 'AMARILLO']
-        return False
+        """Verifica si tiene triage crítico (ROJO/AMARILLO) - sin consultas extra."""
+        return self.ultimo_nivel_urgencia in ['ROJO', 'AMARILLO']
+    
+    def registrar_ultimo_triage(self, signos):
+        """
+        Actualiza el puntero al último triage si `signos` es el más reciente.
+        
+        Debe llamarse dentro de la transacción que guarda los SignosVitales.
+        Usa update() condicional para no pisar un triage posterior.
+        """
+        actualizados = Paciente.objects.filter(id=self.id).filter(
+            models.Q(ultimo_triage_fecha__isnull=True) |
+            models.Q(ultimo_triage_fecha__lte=signos.fecha_hora)
+        ).update(**self._datos_ultimo_triage(signos))
+        
+        if actualizados:
+            self.asignar_ultimo_triage(signos)
+        return bool(actualizados)
+    
+    def recalcular_ultimo_triage(self):
+        """Vuelve a apuntar al triage más reciente (p. ej. tras borrar uno)."""
+        signos = self.signos_vitales.order_by('-fecha_hora', '-id').first()
+        Paciente.objects.filter(id=self.id).update(**self._datos_ultimo_triage(signos))
+        self.asignar_ultimo_triage(signos)
+    
+    @staticmethod
+    def _datos_ultimo_triage(signos):
+        """Campos desnormalizados a partir de un SignosVitales (o None)."""
+        return {
+            'ultimo_triage': signos,
+            'ultimo_nivel_urgencia': signos.nivel_urgencia if signos else None,
+            'ultimo_news_score': signos.news_score if signos else None,
+            'ultimo_triage_fecha': signos.fecha_hora if signos else None,
+        }
+    
+    def asignar_ultimo_triage(self, signos):
+        """Refleja los campos desnormalizados en la instancia actual (sin guardar)."""
+        for campo, valor in self._datos_ultimo_triage(signos).items():
+            setattr(self, campo, valor)
     
     def marcar_atendido(self, destino='ALTA', profesional=None):
         """Marca el paciente con destino específico, profesional y actualiza fecha - OPTIMIZADO."""
@@ -262,9 +460,6 @@ class Paciente(models.Model):
             
         Paciente.objects.filter(id=self.id).update(**update_data)
         
-        # Actualizar instancia actual
-        self.estado_atencion = destino
-        self.fecha_atencion = timezone.now()
-        if profesional:
-            self.profesional_atencion = profesional
-        self.fecha_atencion = timezone.now()
+        # Actualizar instancia actual (mismos valores que quedaron en la base)
+        for campo, valor in update_data.items():
+            setattr(self, campo, valor)
@@ -0,0 +1,281 @@
+"""
+🧪 Tests de pacientes.
+
+    python manage.py test --settings=config.settings_tests
+"""
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.triage.cache_utils import PACIENTES, nueva_generacion
+from apps.triage.cola import ColaPrioridad
+from apps.triage.models import Profesional, SignosVitales
+from config import paginacion
+from config.paginacion import PaginadorEstimado
+
+from .models import Paciente
+
+# Signos normales (NEWS 0): cada caso cambia solo lo que necesita
+NORMALES = {
+    'frecuencia_respiratoria': 16,
+    'saturacion_oxigeno': 98,
+    'tension_sistolica': 120,
+    'frecuencia_cardiaca': 70,
+    'nivel_conciencia': 'A',
+    'temperatura': Decimal('36.5'),
+}
+
+
+class PacientesBase(TestCase):
+    """Un profesional y pacientes con la espera y los signos que pida cada caso."""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = User.objects.create_user('enfermero', password='x')
+        cls.profesional = Profesional.objects.create(user=usuario, dni='30111222', tipo='enfermero')
+        cls.ahora = timezone.now().replace(microsecond=0)
+
+    def _paciente(self, nombre, espera, edad=40, **signos):
+        """Paciente que ingresó hace `espera`; con signos, un triage (si no, sin triage)."""
+        paciente = Paciente.objects.create(
+            nombre=nombre, apellido='Prueba', edad=edad, motivo_consulta='control',
+            fecha_ingreso=self.ahora - espera,
+        )
+        if signos:
+            SignosVitales.objects.create(
+                paciente=paciente, profesional=self.profesional, **dict(NORMALES, **signos)
+            )
+        return paciente
+
+
+class ColaPriorizadaTests(PacientesBase):
+    """cola_priorizada() ordena igual que el cálculo en Python que reemplaza."""
+
+    def _orden_python(self):
+        """
+        Orden anterior: rojos por calcular_prioridad_critica descendente (sort
+        estable sobre la llegada más reciente), después el resto por llegada.
+        """
+        pacientes = list(Paciente.objects.filter(activo=True, estado_atencion='ESPERANDO').order_by(
+            '-fecha_ingreso', '-id'
+        ))
+        rojos, resto, prioridades = [], [], {}
+        for paciente in pacientes:
+            # Mismo reloj que la consulta
+            paciente._tiempo_delta_cache = self.ahora - paciente.fecha_ingreso
+            ultimo = paciente.signos_vitales.order_by('-fecha_hora', '-id').first()
+            if ultimo is not None and ultimo.nivel_urgencia == 'ROJO':
+                ultimo.paciente = paciente
+                prioridades[paciente.id] = ultimo.calcular_prioridad_critica()
+                rojos.append(paciente)
+            else:
+                prioridades[paciente.id] = 0
+                resto.append(paciente)
+        rojos.sort(key=lambda paciente: prioridades[paciente.id], reverse=True)
+        return [paciente.id for paciente in rojos + resto], prioridades
+
+    def assertMismoOrden(self):
+        esperado, prioridades = self._orden_python()
+        cola = list(Paciente.objects.cola_priorizada(self.ahora))
+        self.assertEqual([paciente.id for paciente in cola], esperado)
+        self.assertEqual({paciente.id: paciente.prioridad_critica for paciente in cola}, prioridades)
+        return cola
+
+    def test_limites_rojo_amarillo_verde(self):
+        # NEWS 4 (VERDE), 5 y 6 (AMARILLO), 7 (ROJO)
+        verde = self._paciente('Verde', timedelta(minutes=50), frecuencia_respiratoria=25, frecuencia_cardiaca=95)
+        amarillo_5 = self._paciente('Amarillo5', timedelta(minutes=40), frecuencia_respiratoria=25, saturacion_oxigeno=92)
+        amarillo_6 = self._paciente('Amarillo6', timedelta(minutes=45), frecuencia_respiratoria=25, saturacion_oxigeno=91)
+        rojo_7 = self._paciente(
+            'Rojo7', timedelta(minutes=5), frecuencia_respiratoria=25, saturacion_oxigeno=91, frecuencia_cardiaca=95
+        )
+        niveles = dict(Paciente.objects.values_list('id', 'ultimo_nivel_urgencia'))
+        self.assertEqual(
+            [niveles[p.id] for p in (verde, amarillo_5, amarillo_6, rojo_7)],
+            ['VERDE', 'AMARILLO', 'AMARILLO', 'ROJO'],
+        )
+
+        cola = self.assertMismoOrden()
+        # Solo el rojo va adelante; amarillos y verdes quedan por llegada, con prioridad 0
+        self.assertEqual([p.id for p in cola], [rojo_7.id, amarillo_5.id, amarillo_6.id, verde.id])
+
+    def test_sin_triage_van_con_el_resto_por_llegada(self):
+        sin_triage_viejo = self._paciente('SinTriage1', timedelta(hours=3))
+        verde = self._paciente('Verde', timedelta(minutes=20), temperatura=Decimal('36.6'))
+        sin_triage_nuevo = self._paciente('SinTriage2', timedelta(minutes=1))
+        rojo = self._paciente(
+            'Rojo', timedelta(minutes=2), nivel_conciencia='U', saturacion_oxigeno=80, frecuencia_respiratoria=25
+        )
+
+        cola = self.assertMismoOrden()
+        self.assertEqual([p.id for p in cola], [rojo.id, sin_triage_nuevo.id, verde.id, sin_triage_viejo.id])
+
+    def test_empates_de_prioridad(self):
+        signos = {'nivel_conciencia': 'V', 'saturacion_oxigeno': 91, 'frecuencia_respiratoria': 25}
+        # Misma prioridad (espera menor a 30 min): el que llegó último va primero
+        primero = self._paciente('Rojo1', timedelta(minutes=20), **signos)
+        segundo = self._paciente('Rojo2', timedelta(minutes=10), **signos)
+        # Misma prioridad y misma llegada: desempata el id mayor
+        mismo_momento_a = self._paciente('Rojo3', timedelta(minutes=15), **signos)
+        mismo_momento_b = self._paciente('Rojo4', timedelta(minutes=15), **signos)
+
+        cola = self.assertMismoOrden()
+        self.assertEqual(len({p.prioridad_critica for p in cola}), 1)
+        self.assertEqual(
+            [p.id for p in cola], [segundo.id, mismo_momento_b.id, mismo_momento_a.id, primero.id]
+        )
+
+    def test_espera_edad_y_signos_criticos(self):
+        signos = {'nivel_conciencia': 'V', 'saturacion_oxigeno': 91, 'frecuencia_respiratoria': 25}
+        casos = [
+            # Justo en el umbral de 30 minutos (no suma) y un segundo antes del minuto 31
+            self._paciente('Espera30', timedelta(minutes=30), **signos),
+            self._paciente('Espera30y59', timedelta(minutes=30, seconds=59), **signos),
+            self._paciente('Espera31', timedelta(minutes=31), **signos),
+            self._paciente('Espera2h', timedelta(hours=2), **signos),
+            self._paciente('Edad65', timedelta(minutes=5), edad=65, **signos),
+            self._paciente('Edad66', timedelta(minutes=5), edad=66, **signos),
+            self._paciente('Saturacion84', timedelta(minutes=5), **dict(signos, saturacion_oxigeno=84)),
+            self._paciente('Tension79', timedelta(minutes=5), **dict(signos, tension_sistolica=79)),
+            self._paciente('Tension80', timedelta(minutes=5), **dict(signos, tension_sistolica=80)),
+            self._paciente('Cardiaca141', timedelta(minutes=5), **dict(signos, frecuencia_cardiaca=141)),
+            self._paciente('Cardiaca39', timedelta(minutes=5), **dict(signos, frecuencia_cardiaca=39)),
+            self._paciente('Temperatura40', timedelta(minutes=5), **dict(signos, temperatura=Decimal('40.0'))),
+            self._paciente('Temperatura40.1', timedelta(minutes=5), **dict(signos, temperatura=Decimal('40.1'))),
+            self._paciente('Temperatura33.9', timedelta(minutes=5), **dict(signos, temperatura=Decimal('33.9'))),
+            self._paciente('ConcienciaP', timedelta(minutes=5), **dict(signos, nivel_conciencia='P')),
+        ]
+        self.assertEqual(
+            set(Paciente.objects.filter(id__in=[p.id for p in casos]).values_list('ultimo_nivel_urgencia', flat=True)),
+            {'ROJO'},
+        )
+        self.assertMismoOrden()
+
+
+# Rojos con distinta prioridad base (signos) para que el cruce de los 30 minutos reordene
+ROJO_GRAVE = {'nivel_conciencia': 'U', 'saturacion_oxigeno': 80, 'frecuencia_respiratoria': 25}
+ROJO = {'nivel_conciencia': 'V', 'saturacion_oxigeno': 91, 'frecuencia_respiratoria': 25}
+
+
+class ColaPrioridadTests(PacientesBase):
+    """El índice en memoria (ColaPrioridad) sirve lo mismo que cola_priorizada()."""
+
+    def setUp(self):
+        # Generaciones y registro de cambios viven en el cache
+        cache.clear()
+        self.cola = ColaPrioridad()
+
+    def _pacientes(self):
+        return {
+            'grave_reciente': self._paciente('GraveReciente', timedelta(minutes=10), **ROJO_GRAVE),
+            'rojo_29': self._paciente('Rojo29', timedelta(minutes=29), **ROJO),
+            'rojo_31': self._paciente('Rojo31', timedelta(minutes=31), **ROJO),
+            'rojo_reciente': self._paciente('RojoReciente', timedelta(minutes=2), **ROJO),
+            'rojo_viejo': self._paciente('RojoViejo', timedelta(hours=2), edad=70, **ROJO),
+            'amarillo': self._paciente('Amarillo', timedelta(minutes=15), frecuencia_respiratoria=25, saturacion_oxigeno=92),
+            'verde': self._paciente('Verde', timedelta(minutes=45), temperatura=Decimal('36.6')),
+            'sin_triage': self._paciente('SinTriage', timedelta(minutes=5)),
+        }
+
+    def assertComoLaBase(self, ahora):
+        filas = self.cola.lista(ahora=ahora)
+        esperado = list(Paciente.objects.cola_priorizada(ahora))
+        self.assertEqual([fila['id'] for fila in filas], [paciente.id for paciente in esperado], ahora)
+        self.assertEqual(
+            [fila['prioridad_critica'] for fila in filas], [paciente.prioridad_critica for paciente in esperado], ahora
+        )
+        return filas
+
+    def test_mismo_orden_a_lo_largo_del_tiempo(self):
+        self._pacientes()
+        # Cada rojo reciente cruza los 30 minutos en algún paso; el grave queda detrás de los demorados
+        for minutos in (0, 1, 2, 5, 21, 28, 29, 40, 90, 240):
+            with self.subTest(minutos=minutos):
+                self.assertComoLaBase(self.ahora + timedelta(minutes=minutos))
+
+    def test_actualizar_y_quitar(self):
+        pacientes = self._pacientes()
+        self.assertComoLaBase(self.ahora)
+        with mock.patch.object(self.cola, 'cargar', wraps=self.cola.cargar) as cargar:
+            # Re-triage: el verde pasa a rojo grave y va adelante
+            verde = pacientes['verde']
+            SignosVitales.objects.create(
+                paciente=verde, profesional=self.profesional, **dict(NORMALES, **ROJO_GRAVE)
+            )
+            cambios = self.cola.actualizar([verde.id])
+            self.assertEqual([(tipo, fila['id']) for tipo, fila in cambios], [('paciente_retriado', verde.id)])
+            self.assertEqual(cambios[0][1]['nivel_urgencia'], 'ROJO')
+            # Primer triage de quien no tenía
+            sin_triage = pacientes['sin_triage']
+            SignosVitales.objects.create(paciente=sin_triage, profesional=self.profesional, **NORMALES)
+            self.assertEqual(self.cola.actualizar([sin_triage.id])[0][0], 'paciente_actualizado')
+            for minutos in (0, 35):
+                self.assertComoLaBase(self.ahora + timedelta(minutes=minutos))
+
+            # Atención: quitar() sin consultar la base, y actualizar() de quien ya no espera
+            grave = pacientes['grave_reciente']
+            grave.marcar_atendido('PASE_A_UTI', self.profesional)
+            self.assertEqual(self.cola.quitar(grave.id), [('paciente_atendido', {'id': grave.id})])
+            amarillo = pacientes['amarillo']
+            amarillo.marcar_atendido('ALTA', self.profesional)
+            self.assertEqual(self.cola.actualizar([amarillo.id]), [('paciente_atendido', {'id': amarillo.id})])
+            self.assertEqual(self.cola.quitar(amarillo.id), [('paciente_atendido', {'id': amarillo.id})])
+            for minutos in (0, 35):
+                filas = self.assertComoLaBase(self.ahora + timedelta(minutes=minutos))
+                self.assertNotIn(grave.id, [fila['id'] for fila in filas])
+            self.assertEqual(len(self.cola), len(pacientes) - 2)
+
+        # Todo por actualización incremental: el índice nunca se recargó
+        cargar.assert_not_called()
+
+    def test_recarga_tras_cambios_de_otro_proceso(self):
+        self._pacientes()
+        self.assertComoLaBase(self.ahora)
+        # Otro proceso ingresa un paciente: este índice no se entera hasta que cambia la generación
+        nuevo = self._paciente('OtroProceso', timedelta(minutes=3), **ROJO_GRAVE)
+        self.assertNotIn(nuevo.id, [fila['id'] for fila in self.cola.lista(ahora=self.ahora)])
+
+        with mock.patch.object(self.cola, 'cargar', wraps=self.cola.cargar) as cargar:
+            nueva_generacion(PACIENTES)
+            self.assertIn(nuevo.id, [fila['id'] for fila in self.assertComoLaBase(self.ahora)])
+            self.assertComoLaBase(self.ahora + timedelta(minutes=1))
+        cargar.assert_called_once_with()
+
+
+class PaginadorEstimadoTests(PacientesBase):
+    """Total acotado/estimado y páginas en dos pasos (clave primaria y filas)."""
+
+    def setUp(self):
+        pacientes = [self._paciente(f'Paciente{i}', timedelta(minutes=i)) for i in range(8)]
+        # Huecos en los ids: la estimación por MAX(id) queda por encima del total real
+        Paciente.objects.filter(pk__in=[pacientes[2].pk, pacientes[3].pk, pacientes[5].pk]).delete()
+        self.listado = Paciente.objects.order_by('fecha_ingreso', 'id')
+        self.ids = list(self.listado.values_list('pk', flat=True))
+
+    def test_conteo_exacto_hasta_el_limite(self):
+        with mock.patch.object(paginacion, 'LIMITE_CONTEO', 5):
+            self.assertEqual(PaginadorEstimado(self.listado, 2).count, 5)
+
+    def test_conteo_estimado_y_paginas_por_clave(self):
+        with mock.patch.object(paginacion, 'LIMITE_CONTEO', 3):
+            paginador = PaginadorEstimado(self.listado, 2)
+            # Conteo acotado (LIMITE + 1 filas) y MAX(id), sin COUNT(*) de la tabla
+            with self.assertNumQueries(2):
+                self.assertEqual(paginador.count, max(self.ids))
+            self.assertGreater(paginador.count, len(self.ids))
+
+            # Cada página: primero las claves en el orden del listado, después las filas
+            with self.assertNumQueries(2):
+                pagina = paginador.page(1)
+            self.assertEqual([paciente.pk for paciente in pagina], self.ids[:2])
+
+            # Recorriendo todas las páginas aparece cada uno una vez y en orden; las últimas pueden venir vacías
+            recorridos = [
+                paciente.pk for numero in paginador.page_range for paciente in paginador.page(numero)
+            ]
+            self.assertEqual(recorridos, self.ids)
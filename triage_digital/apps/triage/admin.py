@@ -1,7 +1,9 @@
 from django import forms
 from django.contrib import admin
 from django.contrib.auth.models import User
-from .models import SignosVitales, Profesional
+from config.paginacion import PaginadorEstimado
+from .models import ConflictoSincronizacion, SignosVitales, Profesional, TriageEnEspera
+from .utils import PUNTAJE_MAXIMO
 
 
 class ProfesionalForm(forms.ModelForm):
@@ -94,6 +96,23 @@ admin.site.site_title = "Triage Admin"
 admin.site.index_title = "Gestión de Profesionales Médicos"
 
 
+class NewsScoreFilter(admin.SimpleListFilter):
+    """
+    Filtro por NEWS score con los puntajes posibles (0 a PUNTAJE_MAXIMO), sin
+    el SELECT DISTINCT sobre toda la tabla que hace el filtro por defecto.
+    """
+    title = 'NEWS score'
+    parameter_name = 'news_score'
+
+    def lookups(self, request, model_admin):
+        return [(str(puntaje), str(puntaje)) for puntaje in range(PUNTAJE_MAXIMO + 1)]
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(news_score=int(self.value()))
+        return queryset
+
+
 @admin.register(SignosVitales)
 class SignosVitalesAdmin(admin.ModelAdmin):
     """
@@ -101,11 +120,14 @@ class SignosVitalesAdmin(admin.ModelAdmin):
     """
     list_display = ('paciente', 'profesional', 'fecha_hora', 'news_score', 
                    'nivel_urgencia', 'tiempo_atencion_max')
-    list_filter = ('nivel_urgencia', 'fecha_hora', 'news_score')
+    list_filter = ('nivel_urgencia', 'fecha_hora', NewsScoreFilter)
     search_fields = ('paciente__nombre', 'paciente__apellido', 'paciente__dni')
     readonly_fields = ('fecha_hora', 'news_score', 'nivel_urgencia', 
                       'tiempo_atencion_max', 'color_hex')
     list_per_page = 20
+    # Sin COUNT(*) exacto ni OFFSET sobre filas completas (tablas grandes)
+    paginator = PaginadorEstimado
+    show_full_result_count = False
     
     fieldsets = (
         ('Paciente y Profesional', {
@@ -120,3 +142,36 @@ class SignosVitalesAdmin(admin.ModelAdmin):
             'fields': ('news_score', 'nivel_urgencia', 'tiempo_atencion_max', 'color_hex')
         }),
     )
+
+
+@admin.register(ConflictoSincronizacion)
+class ConflictoSincronizacionAdmin(admin.ModelAdmin):
+    """
+    Conflictos que la sincronización resolvió sola, para revisarlos (solo lectura).
+    """
+    list_display = ('fecha', 'tipo', 'uid', 'resolucion')
+    list_filter = ('tipo', 'fecha')
+    search_fields = ('uid', 'detalle')
+    readonly_fields = ('fecha', 'tipo', 'uid', 'nodo_origen', 'detalle', 'resolucion')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(TriageEnEspera)
+class TriageEnEsperaAdmin(admin.ModelAdmin):
+    """
+    Triages recibidos que esperan a su paciente o profesional (solo lectura).
+    """
+    list_display = ('fecha', 'uid', 'motivo')
+    search_fields = ('uid', 'motivo')
+    readonly_fields = ('fecha', 'uid', 'operacion', 'nodo_origen', 'datos', 'motivo')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,95 @@
+"""
+🔄 Cache por generaciones para el dashboard y la cola de espera.
+
+En lugar de borrar claves en cada escritura (y que todos los clientes que
+consultan recalculen a la vez), cada escritura incrementa la generación de un
+espacio de nombres. Las claves incluyen la generación vigente, así que las
+viejas simplemente dejan de usarse y vencen solas.
+
+Al cambiar de generación, un solo request recalcula cada valor (lock en el
+cache compartido); mientras tanto los demás sirven el valor anterior.
+"""
+import time
+
+from django.core.cache import cache
+
+# Todo lo que depende de los pacientes en espera: estadísticas, críticos y cola
+PACIENTES = 'pacientes'
+
+# Máximo que puede tardar un recálculo antes de que otro request lo retome
+TIMEOUT_LOCK = 30
+
+# Cuánto espera un request sin valor anterior a que termine el recálculo ajeno
+ESPERA_MAXIMA = 2.0
+INTERVALO_ESPERA = 0.05
+
+
+def _clave_generacion(espacio):
+    return f'gen:{espacio}'
+
+
+def generacion(espacio):
+    """Generación vigente del espacio (se crea en 1 la primera vez)."""
+    actual = cache.get(_clave_generacion(espacio))
+    if actual is None:
+        cache.add(_clave_generacion(espacio), 1, timeout=None)
+        actual = cache.get(_clave_generacion(espacio), 1)
+    return actual
+
+
+def nueva_generacion(espacio):
+    """Invalida todo el espacio pasando a la generación siguiente."""
+    try:
+        return cache.incr(_clave_generacion(espacio))
+    except ValueError:
+        # La clave no existe todavía (cache vacío)
+        if cache.add(_clave_generacion(espacio), 2, timeout=None):
+            return 2
+        return cache.incr(_clave_generacion(espacio))
+
+
+def obtener_o_calcular(espacio, nombre, calcular, timeout):
+    """
+    Valor cacheado de `nombre` para la generación vigente de `espacio`.
+
+    Si falta, solo el request que obtiene el lock ejecuta `calcular()`; los
+    demás devuelven el último valor calculado (de una generación anterior) o,
+    si nunca se calculó, esperan brevemente a que el otro termine.
+
+    Args:
+        espacio: Espacio de nombres (p. ej. PACIENTES)
+        nombre: Nombre del valor dentro del espacio
+        calcular: Función sin argumentos que devuelve el valor (no None)
+        timeout: Segundos de validez del valor
+    """
+    gen = generacion(espacio)
+    clave = f'{espacio}:{gen}:{nombre}'
+    clave_ultimo = f'{espacio}:ultimo:{nombre}'
+
+    valor = cache.get(clave)
+    if valor is not None:
+        return valor
+
+    clave_lock = f'{clave}:lock'
+    if cache.add(clave_lock, 1, timeout=TIMEOUT_LOCK):
+        try:
+            valor = calcular()
+            cache.set_many({clave: valor, clave_ultimo: valor}, timeout=timeout)
+        finally:
+            cache.delete(clave_lock)
+        return valor
+
+    # Otro request está recalculando esta generación
+    anterior = cache.get(clave_ultimo)
+    if anterior is not None:
+        return anterior
+
+    limite = time.monotonic() + ESPERA_MAXIMA
+    while time.monotonic() < limite:
+        time.sleep(INTERVALO_ESPERA)
+        valor = cache.get(clave)
+        if valor is not None:
+            return valor
+
+    # El otro request no terminó a tiempo: calcular sin cachear
+    return calcular()
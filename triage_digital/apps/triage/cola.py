@@ -0,0 +1,493 @@
+"""
+🚨 Índice en memoria de la cola de espera.
+
+Mantiene a los pacientes en espera ordenados igual que
+Paciente.objects.cola_priorizada(), sin reconstruir la cola desde la base en
+cada consulta:
+
+- Se carga una vez desde la base (al arrancar el proceso o en la primera lectura).
+- Se actualiza por paciente al crear un triage o cambiar el estado de atención.
+- Detecta cambios hechos por otros procesos con la generación del espacio
+  PACIENTES (cache compartido) y se recarga cuando no coincide.
+- El término de espera de la prioridad crítica (10 puntos por minuto después de
+  los 30 minutos) se resuelve sin reordenar en cada minuto: los ROJOS se separan
+  en "recientes" (prioridad fija = base) y "demorados", cuya prioridad crece
+  igual para todos y por eso se ordenan con una clave que no depende del reloj.
+"""
+import bisect
+import heapq
+import itertools
+import logging
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.patients.models import Paciente, formatear_espera
+
+from .cache_utils import PACIENTES, generacion, nueva_generacion
+
+logger = logging.getLogger(__name__)
+
+# Después de este tiempo empieza a sumar el término de espera
+UMBRAL_ESPERA = timedelta(minutes=30)
+
+# Registro de qué pacientes cambiaron en cada generación (para sync por delta)
+TIMEOUT_CAMBIOS = 600
+MAX_GENERACIONES_DELTA = 500
+
+ROJOS_RECIENTES = 'recientes'
+ROJOS_DEMORADOS = 'demorados'
+RESTO = 'resto'
+
+# Firma de los cursores de paginación (opacos para el cliente)
+SAL_CURSOR = 'triage.cola.cursor'
+
+
+class _Entrada:
+    """Datos de un paciente en espera necesarios para servir la lista."""
+
+    __slots__ = (
+        'id', 'uid', 'nombre_completo', 'dni', 'edad', 'motivo_consulta',
+        'nivel_urgencia', 'ultimo_triage_id', 'prioridad_base', 'fecha_ingreso',
+        'ingreso_ts', 'grupo',
+    )
+
+    def __init__(self, paciente):
+        self.id = paciente.id
+        self.uid = paciente.uid
+        self.nombre_completo = paciente.nombre_completo
+        self.dni = paciente.dni
+        self.edad = paciente.edad
+        self.motivo_consulta = paciente.motivo_consulta
+        self.nivel_urgencia = paciente.ultimo_nivel_urgencia
+        self.ultimo_triage_id = paciente.ultimo_triage_id
+        self.prioridad_base = paciente.prioridad_base
+        self.fecha_ingreso = paciente.fecha_ingreso
+        self.ingreso_ts = paciente.fecha_ingreso.timestamp()
+        self.grupo = None
+
+    @property
+    def es_rojo(self):
+        return self.nivel_urgencia == 'ROJO'
+
+    def clave(self):
+        """Clave de orden (menor = primero) dentro del grupo actual."""
+        if self.grupo == ROJOS_DEMORADOS:
+            # base + 10 * (minutos - 30) ordena igual que base - ingreso / 6,
+            # porque los minutos de espera avanzan igual para todos
+            return (-(self.prioridad_base - self.ingreso_ts / 6), -self.ingreso_ts, -self.id)
+        if self.grupo == ROJOS_RECIENTES:
+            return (-self.prioridad_base, -self.ingreso_ts, -self.id)
+        return (-self.ingreso_ts, -self.id)
+
+    def posicion(self, ahora):
+        """
+        Clave global de la cola en `ahora` (menor = primero): la misma de
+        cola_priorizada(), ROJOS por prioridad crítica y después el resto,
+        el más reciente primero.
+        """
+        return (0 if self.es_rojo else 1, -self.prioridad_critica(ahora), -self.ingreso_ts, -self.id)
+
+    def prioridad_actual(self, ahora_ts):
+        """Prioridad continua en `ahora_ts` (para intercalar recientes y demorados)."""
+        if self.grupo == ROJOS_DEMORADOS:
+            return self.prioridad_base + max(0, (ahora_ts - self.ingreso_ts) / 6 - 300)
+        return self.prioridad_base
+
+    def prioridad_critica(self, ahora):
+        """Prioridad entera como la calcula SignosVitales.calcular_prioridad_critica."""
+        if not self.es_rojo:
+            return 0
+        minutos = int((ahora - self.fecha_ingreso).total_seconds() / 60)
+        return self.prioridad_base + max(0, minutos - 30) * 10
+
+    def serializar(self, ahora):
+        """Fila de la lista de espera (mismas claves que la API)."""
+        # `ahora` puede venir truncado al minuto: quien ingresó en este minuto espera 0
+        delta = max(ahora - self.fecha_ingreso, timedelta(0))
+        minutos = int(delta.total_seconds() / 60)
+        prioridad = self.prioridad_critica(ahora)
+
+        return {
+            'id': self.id,
+            'uid': str(self.uid),
+            'nombre_completo': self.nombre_completo,
+            'dni': self.dni or 'Sin DNI',
+            'edad': self.edad,
+            'tiempo_espera': formatear_espera(delta),
+            'tiempo_espera_minutos': minutos,
+            'nivel_urgencia': self.nivel_urgencia or 'SIN TRIAGE',
+            'motivo_consulta': self.motivo_consulta or '',
+            'prioridad_critica': prioridad,
+            'fecha_ingreso': self.fecha_ingreso.isoformat(),
+        }
+
+
+class ColaPrioridad:
+    """
+    Heaps con borrado diferido: actualizar o quitar un paciente es O(log n)
+    y la lectura recorre listas ya ordenadas (se reordenan solo si hubo cambios).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Una sola recarga a la vez; mientras tanto se sirve la cola anterior
+        self._recarga = threading.Lock()
+        self._cargada = False
+        self._version = None
+        self._entradas = {}
+        self._heaps = {ROJOS_RECIENTES: [], ROJOS_DEMORADOS: [], RESTO: []}
+        self._ordenadas = {}
+        # Recientes por momento en que cruzan el umbral de 30 minutos
+        self._umbrales = []
+        self._secuencia = 0
+
+    # ------------------------------------------------------------------
+    # Carga y actualización
+    # ------------------------------------------------------------------
+
+    def cargar(self):
+        """Reconstruye el índice completo desde la base (una consulta)."""
+        version = generacion(PACIENTES)
+        ahora = timezone.now()
+        nueva = ColaPrioridad()
+        for paciente in Paciente.objects.cola_priorizada(ahora):
+            nueva._insertar(_Entrada(paciente), ahora)
+
+        # Reemplazo de una vez: las lecturas nunca ven una cola a medio cargar
+        with self._lock:
+            self._entradas = nueva._entradas
+            self._heaps = nueva._heaps
+            self._ordenadas = nueva._ordenadas
+            self._umbrales = nueva._umbrales
+            self._secuencia = nueva._secuencia
+            self._version = version
+            self._cargada = True
+
+    def calentar_en_segundo_plano(self):
+        """Carga inicial en un thread aparte para no demorar el arranque."""
+        def _calentar():
+            try:
+                self.cargar()
+                logger.info(f"Cola de espera cargada: {len(self._entradas)} pacientes")
+            except Exception as e:
+                logger.warning(f"No se pudo precargar la cola de espera: {e}")
+
+        thread = threading.Thread(target=_calentar, daemon=True)
+        thread.start()
+        return thread
+
+    def actualizar(self, paciente_ids):
+        """
+        Relee de la base los pacientes indicados (una consulta) y los reubica.
+        
+        Returns:
+            list: Cambios en la cola como (tipo, datos), para publicar como eventos
+        """
+        paciente_ids = set(paciente_ids)
+        if not paciente_ids:
+            return []
+
+        self._recargar_si_cambio()
+
+        cambios = []
+        with self._lock:
+            ahora = timezone.now()
+            en_espera = Paciente.objects.cola_priorizada(ahora).filter(id__in=paciente_ids)
+            for paciente in en_espera:
+                anterior = self._entradas.get(paciente.id)
+                self._quitar(paciente.id)
+                entrada = _Entrada(paciente)
+                self._insertar(entrada, ahora)
+                paciente_ids.discard(paciente.id)
+                cambios.append((self._tipo_cambio(anterior, entrada), entrada.serializar(ahora)))
+
+            # Los que ya no están en espera (atendidos, inactivos, borrados)
+            for paciente_id in paciente_ids:
+                if self._quitar(paciente_id):
+                    cambios.append(('paciente_atendido', {'id': paciente_id}))
+
+            self._marcar_cambio(cambios)
+        return cambios
+
+    def quitar(self, paciente_id):
+        """Saca a un paciente de la cola sin consultar la base (p. ej. al atenderlo)."""
+        cambios = [('paciente_atendido', {'id': paciente_id})]
+        with self._lock:
+            self._quitar(paciente_id)
+            # Aunque este proceso no lo tenga cargado, los demás sí
+            self._marcar_cambio(cambios)
+        return cambios
+
+    @staticmethod
+    def _tipo_cambio(anterior, entrada):
+        """Tipo de evento según cómo estaba el paciente en la cola."""
+        if anterior is None:
+            return 'paciente_agregado'
+        if anterior.ultimo_triage_id and anterior.ultimo_triage_id != entrada.ultimo_triage_id:
+            return 'paciente_retriado'
+        return 'paciente_actualizado'
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def lista(self, desplazamiento=0, limite=None, ahora=None):
+        """
+        Pacientes en espera en el orden de cola_priorizada(), serializados.
+
+        Args:
+            desplazamiento: Cantidad de pacientes a saltear
+            limite: Cantidad máxima a devolver (None = todos)
+            ahora: Momento de referencia para los tiempos de espera (default: now)
+        """
+        return self.lista_versionada(desplazamiento, limite, ahora)[1]
+
+    def version(self):
+        """Generación que refleja el índice de este proceso (None si está desactualizado)."""
+        self._recargar_si_cambio()
+        return self._version
+
+    def lista_versionada(self, desplazamiento=0, limite=None, ahora=None):
+        """Igual que lista(), junto con la generación de la que sale: (version, filas)."""
+        self._recargar_si_cambio()
+
+        with self._lock:
+            version = self._version
+            if ahora is None:
+                ahora = timezone.now()
+            cola = self._cola(ahora)
+
+        fin = desplazamiento + limite if limite is not None else None
+        return version, [entrada.serializar(ahora) for entrada in cola[desplazamiento:fin]]
+
+    def pagina(self, despues_de=None, limite=None, ahora=None, orden=None):
+        """
+        Página por keyset: los pacientes que siguen a la posición `despues_de`.
+
+        Las posiciones (ver _Entrada.posicion) se evalúan en `orden`, el minuto
+        en que empezó el recorrido: aunque entren o salgan pacientes entre
+        página y página, ninguno se repite ni se saltea por corrimiento.
+
+        Returns:
+            tuple: (version, filas, posición del último o None si no hay más)
+        """
+        self._recargar_si_cambio()
+        if ahora is None:
+            ahora = timezone.now()
+        orden = orden or ahora
+
+        with self._lock:
+            version = self._version
+            # Ya viene en orden; reordenar solo corrige lo que movió el cambio de minuto
+            cola = sorted(self._cola(ahora), key=lambda e: e.posicion(orden))
+
+        inicio = 0
+        if despues_de is not None:
+            inicio = bisect.bisect_right(cola, despues_de, key=lambda e: e.posicion(orden))
+        fin = inicio + limite if limite is not None else len(cola)
+        entradas = cola[inicio:fin]
+
+        siguiente = entradas[-1].posicion(orden) if entradas and fin < len(cola) else None
+        return version, [entrada.serializar(ahora) for entrada in entradas], siguiente
+
+    def cambios_desde(self, version, ahora=None):
+        """
+        Pacientes agregados, modificados y quitados desde la generación `version`.
+
+        Returns:
+            dict: {'version', 'agregados', 'actualizados', 'quitados', 'pacientes'}
+            (filas de agregados y actualizados), o None si ya no hay registro
+            suficiente y el cliente debe pedir la lista completa.
+        """
+        actual = self.version()
+        if actual is None or version > actual or actual - version > MAX_GENERACIONES_DELTA:
+            return None
+
+        claves = [_clave_cambios(generacion) for generacion in range(version + 1, actual + 1)]
+        registros = cache.get_many(claves)
+        if len(registros) != len(claves):
+            return None
+
+        # Primer y último cambio de cada paciente en el intervalo
+        primero, ultimo = {}, {}
+        for clave in claves:
+            for tipo, paciente_id in registros[clave]:
+                primero.setdefault(paciente_id, tipo)
+                ultimo[paciente_id] = tipo
+
+        agregados, actualizados, quitados = [], [], []
+        for paciente_id, tipo in ultimo.items():
+            era_nuevo = primero[paciente_id] == 'paciente_agregado'
+            if tipo == 'paciente_atendido':
+                if not era_nuevo:
+                    quitados.append(paciente_id)
+            elif era_nuevo:
+                agregados.append(paciente_id)
+            else:
+                actualizados.append(paciente_id)
+
+        if ahora is None:
+            ahora = timezone.now()
+        with self._lock:
+            pacientes = [
+                self._entradas[paciente_id].serializar(ahora)
+                for paciente_id in agregados + actualizados
+                if paciente_id in self._entradas
+            ]
+
+        return {
+            'version': actual,
+            'agregados': sorted(agregados),
+            'actualizados': sorted(actualizados),
+            'quitados': sorted(quitados),
+            'pacientes': pacientes,
+        }
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def _recargar_si_cambio(self):
+        """Recarga si otro proceso cambió la generación (o si nunca se cargó)."""
+        if not self._cargada:
+            with self._recarga:
+                if not self._cargada:
+                    self.cargar()
+            return
+
+        if generacion(PACIENTES) != self._version and self._recarga.acquire(blocking=False):
+            # Si otro thread ya está recargando, se sirve la cola actual
+            try:
+                self.cargar()
+            finally:
+                self._recarga.release()
+
+    @staticmethod
+    def _desempatar(rojos, ahora):
+        """
+        Con prioridad entera igual, el más reciente primero (como la base).
+
+        El merge usa minutos continuos; los empates de minuto entero quedan
+        contiguos y se reordenan por llegada, grupo por grupo.
+        """
+        ordenados = []
+        for _, grupo in itertools.groupby(rojos, key=lambda e: e.prioridad_critica(ahora)):
+            grupo = list(grupo)
+            if len(grupo) > 1:
+                grupo.sort(key=lambda e: (-e.ingreso_ts, -e.id))
+            ordenados.extend(grupo)
+        return ordenados
+
+    # ------------------------------------------------------------------
+    # Internos (siempre con el lock tomado)
+    # ------------------------------------------------------------------
+
+    def _cola(self, ahora):
+        """Entradas en espera en el orden de cola_priorizada() en `ahora`."""
+        self._promover_demorados(ahora)
+        ahora_ts = ahora.timestamp()
+
+        rojos = heapq.merge(
+            self._ordenada(ROJOS_RECIENTES),
+            self._ordenada(ROJOS_DEMORADOS),
+            key=lambda e: (-e.prioridad_actual(ahora_ts), -e.ingreso_ts, -e.id),
+        )
+        return self._desempatar(rojos, ahora) + self._ordenada(RESTO)
+
+    def _insertar(self, entrada, ahora):
+        if entrada.es_rojo:
+            # Pasa a 'demorados' recién en la lectura (_promover_demorados), así
+            # los grupos siempre corresponden al `ahora` con el que se lee
+            entrada.grupo = ROJOS_RECIENTES
+            self._secuencia += 1
+            heapq.heappush(self._umbrales, (entrada.ingreso_ts, self._secuencia, entrada))
+        else:
+            entrada.grupo = RESTO
+
+        self._entradas[entrada.id] = entrada
+        self._push(entrada)
+
+    def _push(self, entrada):
+        self._secuencia += 1
+        heapq.heappush(self._heaps[entrada.grupo], (entrada.clave(), self._secuencia, entrada))
+        self._ordenadas.pop(entrada.grupo, None)
+
+    def _quitar(self, paciente_id):
+        # Borrado diferido: la tupla queda en el heap y se descarta al ordenar
+        entrada = self._entradas.pop(paciente_id, None)
+        if entrada is None:
+            return False
+        self._ordenadas.pop(entrada.grupo, None)
+        entrada.grupo = None
+        return True
+
+    def _vigente(self, entrada, grupo):
+        return entrada.grupo == grupo and self._entradas.get(entrada.id) is entrada
+
+    def _promover_demorados(self, ahora):
+        """Pasa a 'demorados' a los ROJOS que cruzaron los 30 minutos."""
+        limite_ts = (ahora - UMBRAL_ESPERA).timestamp()
+        while self._umbrales and self._umbrales[0][0] <= limite_ts:
+            _, _, entrada = heapq.heappop(self._umbrales)
+            if self._vigente(entrada, ROJOS_RECIENTES):
+                self._ordenadas.pop(ROJOS_RECIENTES, None)
+                entrada.grupo = ROJOS_DEMORADOS
+                self._push(entrada)
+
+    def _ordenada(self, grupo):
+        """Entradas vigentes del grupo en orden; se recalcula solo tras cambios."""
+        ordenada = self._ordenadas.get(grupo)
+        if ordenada is None:
+            heap = [item for item in self._heaps[grupo] if self._vigente(item[2], grupo)]
+            heapq.heapify(heap)
+            self._heaps[grupo] = heap
+            ordenada = [item[2] for item in sorted(heap)]
+            self._ordenadas[grupo] = ordenada
+        return ordenada
+
+    def _marcar_cambio(self, cambios):
+        """
+        Pasa a una nueva generación para que los demás procesos recarguen y
+        registra qué pacientes cambiaron en ella.
+        """
+        anterior = self._version
+        actual = nueva_generacion(PACIENTES)
+        cache.set(
+            _clave_cambios(actual),
+            [(tipo, datos['id']) for tipo, datos in cambios],
+            timeout=TIMEOUT_CAMBIOS,
+        )
+        self._version = actual
+        if anterior is None or actual != anterior + 1:
+            # Hubo cambios de otros procesos que este índice no tiene
+            self._version = None
+
+
+def _clave_cambios(generacion):
+    return f'{PACIENTES}:cambios:{generacion}'
+
+
+def cursor(orden, posicion):
+    """Cursor opaco (firmado) para pedir la página que sigue a `posicion`."""
+    return signing.dumps([int(orden.timestamp()), list(posicion)], salt=SAL_CURSOR, compress=True)
+
+
+def leer_cursor(texto):
+    """
+    (orden, posición) de un cursor generado por cursor().
+
+    Raises:
+        ValueError: si el cursor está mal formado o fue alterado
+    """
+    try:
+        orden_ts, posicion = signing.loads(texto, salt=SAL_CURSOR)
+        return datetime.fromtimestamp(orden_ts, tz=dt_timezone.utc), tuple(posicion)
+    except (signing.BadSignature, TypeError, ValueError, OverflowError):
+        raise ValueError('Cursor inválido.')
+
+
+# Índice único por proceso
+cola_espera = ColaPrioridad()
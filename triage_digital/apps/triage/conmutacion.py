@@ -0,0 +1,235 @@
+"""
+🔀 Conmutación en caliente entre la base central y la SQLite local.
+
+En modo online settings.DATABASES tiene la central como 'default' y la
+SQLite local como ALIAS_OFFLINE. La base se elige una vez al arrancar; esto
+permite cambiarla sin reiniciar el proceso:
+
+- RouterConmutado manda lecturas y escrituras a la base activa (las
+  consultas con using= explícito, como la sincronización, no pasan por acá).
+- MonitorSalud (un thread por proceso) prueba la central cada INTERVALO
+  segundos con un SELECT 1. Con FALLOS_PARA_CAER pruebas fallidas seguidas
+  pasa a la local: la caída se detecta en FALLOS_PARA_CAER × (INTERVALO +
+  connect_timeout) como mucho. Un error de base en un request adelanta la
+  próxima prueba (ConmutacionMiddleware).
+- Durante el corte las escrituras van a la local y quedan en su diario de
+  sincronización. Cuando la central vuelve a responder, primero se le envían
+  esos cambios y recién después se vuelve a ella.
+- Con la central sana, la local recibe los cambios de la central en cada
+  ronda, para que al caer tenga los datos del turno.
+- Al conmutar se reconcilian los contadores y los resúmenes recientes de la
+  base que pasa a atender, se invalida la cola (nueva generación) y se
+  avisa a los dashboards que resincronicen: los ids de pacientes que tienen
+  en pantalla son de la otra base.
+- Las cuentas de usuario no viajan por el diario: una sesión abierta sigue
+  valiendo en la local si el usuario tiene ahí la misma cuenta; si no,
+  vuelve a iniciar sesión.
+
+Sin ALIAS_OFFLINE (modo offline) el monitor no arranca y el router no
+interviene. El monitor se inicia con el primer middleware cargado (procesos
+que atienden requests), no en los comandos de manage.py.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils import timezone
+
+from config.database_utils import ALIAS_OFFLINE
+
+logger = logging.getLogger(__name__)
+
+# Segundos entre pruebas de la central
+INTERVALO = 3
+
+# Pruebas fallidas seguidas para pasar a la local (un corte de red aislado no conmuta)
+FALLOS_PARA_CAER = 2
+
+# Al conmutar se recalculan los resúmenes de estos últimos días
+DIAS_A_RECALCULAR = 7
+
+# Una sola sincronización a la vez entre todos los procesos (cache compartido)
+CLAVE_SINCRONIZACION = 'triage.conmutacion.sincronizando'
+TIMEOUT_SINCRONIZACION = 300
+
+_monitor = None
+_inicio = threading.Lock()
+# Base forzada para el thread del monitor mientras prepara la que va a atender
+_hilo = threading.local()
+
+
+def verificar_central():
+    """SELECT 1 contra la central por la conexión de este thread. True si responde."""
+    conexion = connections[DEFAULT_DB_ALIAS]
+    try:
+        with conexion.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return True
+    except DatabaseError:
+        try:
+            conexion.close()
+        except DatabaseError:
+            pass
+        return False
+
+
+class MonitorSalud(threading.Thread):
+    """
+    Estado de la central para este proceso y conmutación de la base activa.
+
+    `verificar` es la prueba de salud (por defecto verificar_central); se
+    puede reemplazar por una que simule cortes.
+    """
+
+    def __init__(self, verificar=None, intervalo=INTERVALO):
+        super().__init__(name='triage-salud-bd', daemon=True)
+        self.verificar = verificar or verificar_central
+        self.intervalo = intervalo
+        self.activa = DEFAULT_DB_ALIAS
+        self.fallos = 0
+        self.desde = timezone.localdate()
+        self._despertar = threading.Event()
+
+    def run(self):
+        while True:
+            try:
+                self.revisar()
+            except Exception as e:
+                logger.error(f"Error en el monitor de la base central: {e}")
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+
+    def avisar_falla(self):
+        """Adelanta la próxima prueba (un request encontró la base caída)."""
+        self._despertar.set()
+
+    def revisar(self):
+        """
+        Una ronda: prueba la central, conmuta si corresponde y sincroniza.
+
+        Returns:
+            str: Alias de la base activa después de la ronda
+        """
+        try:
+            sana = self.verificar()
+        except Exception:
+            sana = False
+
+        if not sana:
+            self.fallos += 1
+            if self.activa == DEFAULT_DB_ALIAS and self.fallos >= FALLOS_PARA_CAER:
+                logger.error(f"Base central sin respuesta ({self.fallos} pruebas): se pasa a la local")
+                self._conmutar(ALIAS_OFFLINE)
+            return self.activa
+
+        self.fallos = 0
+        if self.activa == ALIAS_OFFLINE:
+            # Primero los cambios del corte; si no se pudieron enviar, se sigue en la local
+            if not _sincronizar(ALIAS_OFFLINE, DEFAULT_DB_ALIAS):
+                return self.activa
+            logger.warning("Base central disponible de nuevo: se vuelve a ella")
+            self._conmutar(DEFAULT_DB_ALIAS)
+
+        # Lo escrito en la local mientras se conmutaba, y la local al día con la central
+        _sincronizar(ALIAS_OFFLINE, DEFAULT_DB_ALIAS)
+        _sincronizar(DEFAULT_DB_ALIAS, ALIAS_OFFLINE)
+        return self.activa
+
+    def _conmutar(self, alias):
+        from . import contadores, eventos, resumenes
+        from .cache_utils import PACIENTES, nueva_generacion
+
+        hoy = timezone.localdate()
+        desde = max(self.desde, hoy - timedelta(days=DIAS_A_RECALCULAR - 1))
+        self.desde = hoy
+        # Los derivados de la base que pasa a atender no se mantenían mientras
+        # no atendía: se recalculan antes de mandarle los requests
+        _hilo.base = alias
+        try:
+            contadores.reconciliar_contadores()
+            resumenes.recalcular_dias(desde + timedelta(days=n) for n in range((hoy - desde).days + 1))
+        except DatabaseError as e:
+            logger.error(f"No se pudieron recalcular contadores y resúmenes en {alias}: {e}")
+        finally:
+            del _hilo.base
+
+        self.activa = alias
+        # Cola y fragmentos de todos los procesos se recargan desde la base activa
+        nueva_generacion(PACIENTES)
+        # Los clientes conectados recargan la lista (con los ids de esta base)
+        eventos.publicar('resincronizar', {})
+
+
+def _sincronizar(origen, destino):
+    """
+    Envía los cambios pendientes de `origen` a `destino` si ningún otro
+    proceso está sincronizando. True si quedó todo enviado.
+    """
+    from . import sincronizacion
+
+    if not cache.add(CLAVE_SINCRONIZACION, True, TIMEOUT_SINCRONIZACION):
+        return False
+    try:
+        resultado = sincronizacion.sincronizar(origen, destino)
+        if resultado.entradas:
+            logger.info(f"Conmutación: {resultado.entradas} cambios enviados {origen} → {destino}")
+        return True
+    except (sincronizacion.ErrorSincronizacion, DatabaseError) as e:
+        logger.error(f"Conmutación: no se pudo sincronizar {origen} → {destino}: {e}")
+        return False
+    finally:
+        cache.delete(CLAVE_SINCRONIZACION)
+
+
+def iniciar_monitor(verificar=None, intervalo=INTERVALO):
+    """Arranca el monitor de este proceso si hay base local de respaldo (una vez)."""
+    global _monitor
+    if ALIAS_OFFLINE not in settings.DATABASES:
+        return None
+    with _inicio:
+        if _monitor is None:
+            _monitor = MonitorSalud(verificar, intervalo)
+            _monitor.start()
+            logger.info("Monitor de la base central iniciado")
+    return _monitor
+
+
+def base_activa():
+    """Alias de la base que atiende en este proceso (None: la que elija Django)."""
+    forzada = getattr(_hilo, 'base', None)
+    if forzada:
+        return forzada
+    return _monitor.activa if _monitor else None
+
+
+class RouterConmutado:
+    """Router de Django: todo a la base activa mientras haya monitor."""
+
+    def db_for_read(self, model, **hints):
+        return base_activa()
+
+    def db_for_write(self, model, **hints):
+        return base_activa()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las dos bases tienen el mismo esquema; los ids valen dentro de la activa
+        return True
+
+
+class ConmutacionMiddleware:
+    """Inicia el monitor y le avisa cuando un request falla por la base."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        iniciar_monitor()
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if _monitor and isinstance(exception, DatabaseError):
+            _monitor.avisar_falla()
+        return None
@@ -0,0 +1,158 @@
+"""
+📊 Contadores en vivo de pacientes en espera por nivel de urgencia.
+
+En lugar de contar sobre la tabla de pacientes en cada consulta, cada
+triage o cambio de estado ajusta ContadorEspera en la misma transacción.
+PacienteContado guarda con qué nivel suma cada paciente: el ajuste compara
+eso con el estado actual, así que es idempotente y sirve para cualquier
+camino de escritura (formulario, ingreso masivo, admin, borrados).
+
+Una reconciliación periódica recalcula todo desde los pacientes: corrige
+desvíos y saca a quienes superaron la ventana de 24 h desde su triage.
+"""
+import logging
+from collections import Counter, namedtuple
+from datetime import timedelta
+
+from django.db import router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.patients.models import Paciente
+
+from . import cache_utils, eventos
+from .models import ContadorEspera, PacienteContado, SignosVitales
+
+logger = logging.getLogger(__name__)
+
+Estadisticas = namedtuple('Estadisticas', 'rojos amarillos verdes total')
+
+# Solo cuentan los triados en las últimas 24 horas
+VENTANA_ESPERA = timedelta(hours=24)
+
+NIVELES = [nivel for nivel, _ in SignosVitales.NIVEL_URGENCIA_CHOICES]
+
+
+def _en_espera(ahora=None):
+    """Pacientes que deben sumar en los contadores (en espera o atención, triados en la ventana)."""
+    desde = (ahora or timezone.now()) - VENTANA_ESPERA
+    return Paciente.objects.filter(
+        activo=True,
+        estado_atencion__in=['ESPERANDO', 'EN_ATENCION'],
+        ultimo_nivel_urgencia__isnull=False,
+        ultimo_triage_fecha__gte=desde,
+    )
+
+
+def estadisticas_en_espera():
+    """Conteo por nivel de urgencia desde los contadores (una consulta de 3 filas)."""
+    cantidades = dict(ContadorEspera.objects.values_list('nivel_urgencia', 'cantidad'))
+    rojos = cantidades.get('ROJO', 0)
+    amarillos = cantidades.get('AMARILLO', 0)
+    verdes = cantidades.get('VERDE', 0)
+    return Estadisticas(rojos, amarillos, verdes, rojos + amarillos + verdes)
+
+
+def _bloquear_contadores():
+    """Bloquea las filas de contadores (serializa ajustes y reconciliación) y crea las que falten."""
+    existentes = set(ContadorEspera.objects.select_for_update().values_list('nivel_urgencia', flat=True))
+    faltantes = [ContadorEspera(nivel_urgencia=nivel) for nivel in NIVELES if nivel not in existentes]
+    if faltantes:
+        ContadorEspera.objects.bulk_create(faltantes, ignore_conflicts=True)
+
+
+def _aplicar(paciente_ids, contado, actual):
+    """
+    Lleva PacienteContado de `contado` a `actual` para `paciente_ids` y
+    suma las diferencias en ContadorEspera.
+
+    Returns:
+        int: Cantidad de pacientes cuyo aporte cambió
+    """
+    deltas = Counter()
+    quitar = []
+    agregar = []
+    cambiados = 0
+    for paciente_id in paciente_ids:
+        antes, despues = contado.get(paciente_id), actual.get(paciente_id)
+        if antes == despues:
+            continue
+        cambiados += 1
+        if antes:
+            deltas[antes] -= 1
+            quitar.append(paciente_id)
+        if despues:
+            deltas[despues] += 1
+            agregar.append(PacienteContado(paciente_id=paciente_id, nivel_urgencia=despues))
+
+    if quitar:
+        PacienteContado.objects.filter(paciente_id__in=quitar).delete()
+    if agregar:
+        PacienteContado.objects.bulk_create(agregar)
+    for nivel, delta in deltas.items():
+        if delta:
+            ContadorEspera.objects.filter(nivel_urgencia=nivel).update(cantidad=F('cantidad') + delta)
+
+    return cambiados
+
+
+def ajustar_contadores(paciente_ids, ahora=None):
+    """
+    Ajusta los contadores según el estado actual de `paciente_ids`.
+
+    Llamar después de escribir el cambio y dentro de su transacción: si la
+    transacción se revierte, el ajuste también.
+    """
+    paciente_ids = set(paciente_ids)
+    if not paciente_ids:
+        return 0
+
+    with transaction.atomic(using=router.db_for_write(ContadorEspera)):
+        _bloquear_contadores()
+        actual = dict(
+            _en_espera(ahora).filter(id__in=paciente_ids).values_list('id', 'ultimo_nivel_urgencia')
+        )
+        contado = dict(
+            PacienteContado.objects.filter(paciente_id__in=paciente_ids).values_list('paciente_id', 'nivel_urgencia')
+        )
+        return _aplicar(paciente_ids, contado, actual)
+
+
+def reconciliar_contadores(ahora=None):
+    """
+    Recalcula los contadores desde los pacientes y corrige las diferencias.
+
+    Returns:
+        dict: {'pacientes': aportes corregidos, 'niveles': {nivel: (antes, después)}}
+    """
+    with transaction.atomic(using=router.db_for_write(ContadorEspera)):
+        _bloquear_contadores()
+        antes = dict(ContadorEspera.objects.values_list('nivel_urgencia', 'cantidad'))
+
+        actual = dict(_en_espera(ahora).values_list('id', 'ultimo_nivel_urgencia'))
+        contado = dict(PacienteContado.objects.values_list('paciente_id', 'nivel_urgencia'))
+        pacientes = _aplicar(contado.keys() | actual.keys(), contado, actual)
+
+        # Desvíos que no vienen de un aporte (p. ej. una fila editada a mano)
+        conteo = Counter(actual.values())
+        for nivel in NIVELES:
+            ContadorEspera.objects.filter(nivel_urgencia=nivel).exclude(
+                cantidad=conteo[nivel]
+            ).update(cantidad=conteo[nivel])
+
+        niveles = {
+            nivel: (antes.get(nivel, 0), conteo[nivel])
+            for nivel in NIVELES if antes.get(nivel, 0) != conteo[nivel]
+        }
+        if niveles:
+            transaction.on_commit(_avisar_correccion, using=router.db_for_write(ContadorEspera))
+
+    if pacientes or niveles:
+        logger.info(f"Contadores reconciliados: {pacientes} pacientes, niveles {niveles}")
+    return {'pacientes': pacientes, 'niveles': niveles}
+
+
+def _avisar_correccion():
+    """Nueva generación (fragmentos del dashboard) y contadores nuevos a los conectados."""
+    cache_utils.nueva_generacion(cache_utils.PACIENTES)
+    eventos.publicar('estadisticas', estadisticas_en_espera()._asdict())
@@ -0,0 +1,45 @@
+"""
+📑 Reportes de períodos en CSV (para planillas de cálculo).
+
+Una sola tabla en formato largo: por cada día una fila con los totales
+(profesional vacío) y una fila por cada profesional con actividad ese día.
+Filtrando o armando una tabla dinámica sale la evolución por nivel de
+urgencia, destino o profesional. Se genera solo desde los resúmenes.
+"""
+import csv
+import io
+
+from . import reportes
+
+ENCABEZADO = ['fecha', 'profesional_id', 'profesional', 'tipo'] + reportes.CAMPOS + ['espera_promedio_minutos']
+
+
+def _fila(fecha, conteos, profesional_id='', nombre='', tipo=''):
+    """`conteos` es un Totales o una FilaProfesional (mismos campos de conteo)."""
+    espera = round(conteos.espera_total_minutos / conteos.atendidos) if conteos.atendidos else ''
+    return (
+        [fecha.isoformat(), profesional_id, nombre, tipo]
+        + [getattr(conteos, campo) for campo in reportes.CAMPOS]
+        + [espera]
+    )
+
+
+def reporte_periodo(destino, desde, hasta):
+    """Escribe el CSV de [desde, hasta] en `destino` (archivo binario, UTF-8 con BOM para Excel)."""
+    texto = io.TextIOWrapper(destino, encoding='utf-8-sig', newline='')
+    try:
+        escritor = csv.writer(texto)
+        escritor.writerow(ENCABEZADO)
+
+        por_dia = {}
+        for dia in reportes.serie_profesionales(desde, hasta):
+            por_dia.setdefault(dia.fecha, []).append(dia.fila)
+
+        for dia in reportes.serie_diaria(desde, hasta):
+            escritor.writerow(_fila(dia.fecha, dia.totales))
+            for fila in por_dia.get(dia.fecha, ()):
+                escritor.writerow(_fila(dia.fecha, fila, fila.profesional_id, fila.nombre, fila.tipo))
+    finally:
+        # El archivo lo cierra quien lo abrió
+        texto.flush()
+        texto.detach()
@@ -0,0 +1,177 @@
+"""
+📡 Eventos en vivo de la cola de espera (Server-Sent Events).
+
+Los cambios de la cola (paciente agregado, re-triado, atendido y contadores)
+se publican en un journal dentro del cache compartido, numerados con un
+contador atómico. En cada proceso un único thread lee el journal y despierta
+a las conexiones SSE abiertas: el costo crece con los eventos, no con la
+cantidad de puestos conectados.
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import cache_utils
+
+logger = logging.getLogger(__name__)
+
+# El número de evento es la "generación" de este espacio
+EVENTOS = 'eventos'
+
+# Vida de cada evento en el journal compartido (segundos)
+TIMEOUT_EVENTO = 600
+
+# Eventos recientes que guarda cada proceso para reconexiones
+MAX_EVENTOS_MEMORIA = 500
+
+# Cada cuánto revisa cada proceso si hay eventos nuevos
+INTERVALO_LECTURA = 0.5
+
+# Cuánto se espera un evento ya numerado que todavía no aparece en el journal
+ESPERA_FALTANTE = 5
+
+
+def _clave_evento(numero):
+    return f'{EVENTOS}:{numero}'
+
+
+def publicar(tipo, datos):
+    """Agrega un evento al journal compartido y devuelve su número."""
+    numero = cache_utils.nueva_generacion(EVENTOS)
+    evento = json.dumps({'id': numero, 'tipo': tipo, 'datos': datos}, default=str)
+    cache.set(_clave_evento(numero), evento, timeout=TIMEOUT_EVENTO)
+    return numero
+
+
+def publicar_cambios(cambios):
+    """Publica los cambios de la cola y, si hubo alguno, los contadores nuevos."""
+    if not cambios:
+        return
+    for tipo, datos in cambios:
+        publicar(tipo, datos)
+
+    # Contadores en vivo (ya ajustados en la transacción del cambio)
+    from .contadores import estadisticas_en_espera
+    publicar('estadisticas', estadisticas_en_espera()._asdict())
+
+
+class Distribuidor:
+    """Lee el journal una vez por proceso y reparte los eventos a los suscriptores."""
+
+    def __init__(self):
+        self._condicion = threading.Condition()
+        self._eventos = deque(maxlen=MAX_EVENTOS_MEMORIA)
+        self._ultimo = None
+        self._faltante = None
+        self._thread = None
+
+    def ultimo_id(self):
+        """Número del último evento publicado (punto de partida de un cliente nuevo)."""
+        self._iniciar()
+        with self._condicion:
+            return self._ultimo
+
+    def esperar(self, desde, timeout):
+        """
+        Eventos posteriores a `desde`; si no hay, espera hasta `timeout` segundos.
+
+        Si `desde` es tan viejo que ya no está en memoria, devuelve un único
+        evento 'resincronizar' para que el cliente recargue todo.
+        """
+        self._iniciar()
+        with self._condicion:
+            eventos = self._posteriores(desde)
+            if not eventos:
+                self._condicion.wait(timeout)
+                eventos = self._posteriores(desde)
+            return eventos
+
+    def _posteriores(self, desde):
+        if self._ultimo is None or desde >= self._ultimo:
+            return []
+        if not self._eventos or self._eventos[0]['id'] > desde + 1:
+            return [{'id': self._ultimo, 'tipo': 'resincronizar', 'datos': {}}]
+        return [evento for evento in self._eventos if evento['id'] > desde]
+
+    def _iniciar(self):
+        if self._thread is not None:
+            return
+        with self._condicion:
+            if self._thread is None:
+                self._ultimo = cache_utils.generacion(EVENTOS)
+                self._thread = threading.Thread(target=self._bucle, daemon=True)
+                self._thread.start()
+
+    def _bucle(self):
+        while True:
+            try:
+                self._leer_nuevos()
+            except Exception as e:
+                logger.warning(f"Error leyendo eventos: {e}")
+            time.sleep(INTERVALO_LECTURA)
+
+    def _leer_nuevos(self):
+        actual = cache_utils.generacion(EVENTOS)
+        if actual <= self._ultimo:
+            return
+
+        desde = max(self._ultimo + 1, actual - MAX_EVENTOS_MEMORIA + 1)
+        leidos = cache.get_many([_clave_evento(n) for n in range(desde, actual + 1)])
+
+        nuevos = []
+        ultimo = desde - 1
+        for numero in range(desde, actual + 1):
+            evento = leidos.get(_clave_evento(numero))
+            if evento is None:
+                if self._esperar_faltante(numero):
+                    # Numerado pero todavía no guardado: se lee en la próxima vuelta
+                    break
+                continue  # Perdido (expiró): se saltea
+            nuevos.append(json.loads(evento))
+            ultimo = numero
+
+        with self._condicion:
+            if desde > self._ultimo + 1:
+                # Se perdieron eventos: los clientes atrasados deben resincronizar
+                self._eventos.clear()
+            self._eventos.extend(nuevos)
+            self._ultimo = max(self._ultimo, ultimo)
+            self._condicion.notify_all()
+
+    def _esperar_faltante(self, numero):
+        """True mientras un evento faltante pueda estar por guardarse (hasta 5 s)."""
+        if self._faltante is None or self._faltante[0] != numero:
+            self._faltante = (numero, time.monotonic())
+        return time.monotonic() - self._faltante[1] < ESPERA_FALTANTE
+
+
+# Un distribuidor por proceso
+distribuidor = Distribuidor()
+
+
+class Cupo:
+    """Tope de flujos SSE abiertos a la vez en este proceso."""
+
+    def __init__(self, maximo):
+        self._semaforo = threading.BoundedSemaphore(maximo)
+
+    def tomar(self):
+        """True si hay lugar para otro flujo (sin esperar)."""
+        return self._semaforo.acquire(blocking=False)
+
+    def liberar(self):
+        self._semaforo.release()
+
+
+cupo_sse = Cupo(settings.SSE_MAX_CONEXIONES)
+
+
+def formatear_sse(evento):
+    """Evento en formato text/event-stream."""
+    datos = json.dumps(evento['datos'], default=str)
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {datos}\n\n"
@@ -0,0 +1,195 @@
+"""
+📤 Exportación del historial de triages (CSV o JSON Lines, opcionalmente gzip).
+
+Recorre SignosVitales + Paciente + Profesional por keyset sobre
+(fecha_hora, id): cada lote es una consulta por índice que arranca donde
+terminó la anterior, sin OFFSET ni cursores abiertos. Las filas se
+convierten en texto y se comprimen a medida que salen, así que exportar un
+año usa la misma memoria que exportar un día.
+
+Lo usan la vista de descarga (respuesta en streaming) y el comando
+`python manage.py exportar_historial`.
+"""
+import csv
+import io
+import json
+import zlib
+from collections import namedtuple
+from datetime import date
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import SignosVitales
+from .resumenes import rango_dia
+
+# Filas por consulta de keyset
+TAMANO_LOTE = 1000
+
+# Texto acumulado antes de pasarlo al compresor / a la respuesta
+TAMANO_BLOQUE = 64 * 1024
+
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+}
+
+# columna -> campo de SignosVitales (con joins a paciente y profesional)
+COLUMNAS = {
+    'registro_id': 'id',
+    'fecha_hora': 'fecha_hora',
+    'paciente_id': 'paciente_id',
+    'paciente_nombre': 'paciente__nombre',
+    'paciente_apellido': 'paciente__apellido',
+    'paciente_dni': 'paciente__dni',
+    'paciente_edad': 'paciente__edad',
+    'motivo_consulta': 'paciente__motivo_consulta',
+    'fecha_ingreso': 'paciente__fecha_ingreso',
+    'estado_atencion': 'paciente__estado_atencion',
+    'fecha_atencion': 'paciente__fecha_atencion',
+    'frecuencia_respiratoria': 'frecuencia_respiratoria',
+    'saturacion_oxigeno': 'saturacion_oxigeno',
+    'tension_sistolica': 'tension_sistolica',
+    'frecuencia_cardiaca': 'frecuencia_cardiaca',
+    'nivel_conciencia': 'nivel_conciencia',
+    'temperatura': 'temperatura',
+    'news_score': 'news_score',
+    'nivel_urgencia': 'nivel_urgencia',
+    'tiempo_atencion_max': 'tiempo_atencion_max',
+    'profesional_id': 'profesional_id',
+    'profesional_nombre': 'profesional__user__first_name',
+    'profesional_apellido': 'profesional__user__last_name',
+    'profesional_tipo': 'profesional__tipo',
+}
+
+Filtros = namedtuple('Filtros', 'desde hasta niveles profesional_id')
+
+
+def consulta(filtros):
+    """Triages que entran en la exportación (sin orden ni columnas todavía)."""
+    registros = SignosVitales.objects.all()
+    if filtros.desde:
+        registros = registros.filter(fecha_hora__gte=rango_dia(filtros.desde)[0])
+    if filtros.hasta:
+        registros = registros.filter(fecha_hora__lt=rango_dia(filtros.hasta)[1])
+    if filtros.niveles:
+        registros = registros.filter(nivel_urgencia__in=filtros.niveles)
+    if filtros.profesional_id:
+        registros = registros.filter(profesional_id=filtros.profesional_id)
+    return registros
+
+
+def filas(filtros):
+    """
+    Generador de dicts {columna: valor} en orden (fecha_hora, id).
+
+    Keyset: cada lote pide las TAMANO_LOTE filas posteriores a la última
+    entregada; el costo por lote no crece con lo ya exportado.
+    """
+    base = consulta(filtros).order_by('fecha_hora', 'id').values_list(*COLUMNAS.values())
+    columnas = list(COLUMNAS)
+    posicion_fecha = columnas.index('fecha_hora')
+    posicion_id = columnas.index('registro_id')
+
+    lote = list(base[:TAMANO_LOTE])
+    while lote:
+        for valores in lote:
+            yield dict(zip(columnas, valores))
+        ultima_fecha, ultimo_id = lote[-1][posicion_fecha], lote[-1][posicion_id]
+        lote = list(
+            base.filter(fecha_hora__gte=ultima_fecha).filter(
+                Q(fecha_hora__gt=ultima_fecha) | Q(id__gt=ultimo_id)
+            )[:TAMANO_LOTE]
+        )
+
+
+def _texto(valor):
+    """Valor listo para CSV/JSON: fechas en hora local ISO 8601, decimales como texto."""
+    if valor is None:
+        return None
+    if hasattr(valor, 'tzinfo'):
+        return timezone.localtime(valor).isoformat()
+    if not isinstance(valor, (int, str)):
+        return str(valor)
+    return valor
+
+
+def _lineas_csv(registros):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUMNAS)
+    for registro in registros:
+        escritor.writerow(['' if valor is None else _texto(valor) for valor in registro.values()])
+        if buffer.tell() >= TAMANO_BLOQUE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _lineas_jsonl(registros):
+    bloque = []
+    tamano = 0
+    for registro in registros:
+        linea = json.dumps({columna: _texto(valor) for columna, valor in registro.items()}, ensure_ascii=False)
+        bloque.append(linea)
+        tamano += len(linea) + 1
+        if tamano >= TAMANO_BLOQUE:
+            yield '\n'.join(bloque) + '\n'
+            bloque, tamano = [], 0
+    if bloque:
+        yield '\n'.join(bloque) + '\n'
+
+
+def _gzip(bloques):
+    """Comprime un flujo de bytes al vuelo (formato gzip, un bloque por vez)."""
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for bloque in bloques:
+        comprimido = compresor.compress(bloque)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+
+def exportar(filtros, formato='csv', comprimir=True):
+    """Generador de bytes con la exportación completa (para streaming o archivo)."""
+    lineas = _lineas_csv if formato == 'csv' else _lineas_jsonl
+    bloques = (texto.encode('utf-8') for texto in lineas(filas(filtros)) if texto)
+    return _gzip(bloques) if comprimir else bloques
+
+
+def nombre_archivo(filtros, formato='csv', comprimir=True):
+    partes = ['triage_historial']
+    if filtros.desde:
+        partes.append(str(filtros.desde))
+    if filtros.hasta:
+        partes.append(str(filtros.hasta))
+    nombre = '_'.join(partes) + '.' + FORMATOS[formato][1]
+    return nombre + '.gz' if comprimir else nombre
+
+
+def filtros_de_parametros(parametros):
+    """
+    Filtros desde un QueryDict (desde, hasta, nivel repetible, profesional).
+
+    Raises:
+        ValueError: con el mensaje para el usuario si algún parámetro no es válido
+    """
+    try:
+        desde = date.fromisoformat(parametros['desde']) if parametros.get('desde') else None
+        hasta = date.fromisoformat(parametros['hasta']) if parametros.get('hasta') else None
+    except ValueError:
+        raise ValueError('Fechas inválidas: usar AAAA-MM-DD.')
+    if desde and hasta and desde > hasta:
+        raise ValueError('La fecha "desde" es posterior a "hasta".')
+
+    niveles = [nivel.upper() for nivel in parametros.getlist('nivel') if nivel]
+    validos = {nivel for nivel, _ in SignosVitales.NIVEL_URGENCIA_CHOICES}
+    if any(nivel not in validos for nivel in niveles):
+        raise ValueError(f'Nivel inválido: usar {", ".join(sorted(validos))}.')
+
+    profesional = parametros.get('profesional') or None
+    if profesional is not None and not profesional.isdigit():
+        raise ValueError('Profesional inválido: usar el ID numérico.')
+
+    return Filtros(desde, hasta, niveles, int(profesional) if profesional else None)
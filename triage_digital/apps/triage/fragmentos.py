@@ -0,0 +1,95 @@
+"""
+🧩 Fragmentos del dashboard y scripts versionados.
+
+El dashboard se arma con partes independientes (contadores, casos críticos,
+ingresos recientes). Cada una se renderiza una vez por generación de la cola y
+se guarda ya como HTML en el cache compartido, con su propio ETag: el
+navegador pide y reemplaza solo la parte que cambió.
+
+Los scripts de las páginas no cambian entre requests: se sirven aparte con
+una versión (hash del contenido) en la URL y cache de larga duración.
+"""
+import hashlib
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import cache_utils, contadores, snapshots
+
+Fragmento = namedtuple('Fragmento', 'etag html')
+
+# Validez máxima de un fragmento aunque la generación no cambie (segundos)
+TIMEOUT_FRAGMENTO = 120
+
+
+def _contexto_estadisticas():
+    return {'estadisticas': contadores.estadisticas_en_espera()}
+
+
+def _contexto_casos_criticos():
+    return {'casos_criticos': snapshots.casos_criticos_sin_atender()}
+
+
+def _contexto_pacientes_recientes():
+    return {'pacientes_recientes': snapshots.pacientes_recientes()}
+
+
+# nombre en la URL -> (plantilla, contexto: una sola consulta por fragmento)
+FRAGMENTOS = {
+    'estadisticas': ('triage/fragmentos/estadisticas.html', _contexto_estadisticas),
+    'casos-criticos': ('triage/fragmentos/casos_criticos.html', _contexto_casos_criticos),
+    'pacientes-recientes': ('triage/fragmentos/pacientes_recientes.html', _contexto_pacientes_recientes),
+}
+
+SCRIPTS = {
+    'base': 'triage/js/base.js',
+    'dashboard': 'triage/js/dashboard.js',
+    'reporte': 'triage/js/reporte.js',
+}
+
+
+def _version(contenido):
+    return hashlib.sha256(contenido.encode()).hexdigest()[:16]
+
+
+def _renderizar(nombre):
+    plantilla, contexto = FRAGMENTOS[nombre]
+    html = render_to_string(plantilla, contexto()).strip()
+    return Fragmento(etag=f'"{nombre}-{_version(html)}"', html=str(html))
+
+
+def fragmento(nombre):
+    """Fragmento `nombre` de la generación vigente (se renderiza una vez por cambio)."""
+    return cache_utils.obtener_o_calcular(
+        cache_utils.PACIENTES, f'fragmento:{nombre}',
+        lambda: _renderizar(nombre), timeout=TIMEOUT_FRAGMENTO,
+    )
+
+
+def fragmentos_dashboard():
+    """Todos los fragmentos para el primer render, con claves usables en plantillas."""
+    fragmentos = {}
+    for nombre in FRAGMENTOS:
+        etag, html = fragmento(nombre)
+        fragmentos[nombre.replace('-', '_')] = Fragmento(etag, mark_safe(html))
+    return fragmentos
+
+
+def script(nombre):
+    """(versión, contenido) del script `nombre`; en DEBUG se relee en cada request."""
+    if settings.DEBUG:
+        return _renderizar_script(nombre)
+    return _script_en_memoria(nombre)
+
+
+def _renderizar_script(nombre):
+    contenido = render_to_string(SCRIPTS[nombre])
+    return _version(contenido), contenido
+
+
+@lru_cache(maxsize=None)
+def _script_en_memoria(nombre):
+    return _renderizar_script(nombre)
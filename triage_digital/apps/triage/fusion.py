@@ -0,0 +1,91 @@
+"""
+🔀 Reglas para fusionar un paciente que cambió en dos bases desconectadas.
+
+Funciones puras sobre dicts de valores (los campos de
+sincronizacion.CAMPOS_PACIENTE más profesional_atencion_id). Son
+deterministas: las dos bases llegan al mismo resultado sin importar en qué
+sentido se sincronice primero.
+
+- Atención: el estado nunca retrocede (en espera < en atención < destino
+  final). Si las dos bases registraron un destino final (distinto, o el
+  mismo a otra hora), vale el primero que se registró: es el momento en que
+  el paciente dejó la sala.
+- Mismo DNI con dos uid: queda el paciente que ingresó primero (a igual
+  hora, el de uid menor). Los datos vacíos se completan con los del otro y
+  la fecha de ingreso es la más temprana.
+"""
+from .resumenes import DESTINOS
+
+# Orden del estado de atención: un cambio nunca vuelve a un estado anterior
+PRECEDENCIA_ESTADO = {
+    'ESPERANDO': 0,
+    'EN_ATENCION': 1,
+    **{destino: 2 for destino in DESTINOS},
+}
+
+CAMPOS_ATENCION = ('estado_atencion', 'fecha_atencion', 'profesional_atencion_id')
+
+# Datos personales: el sobreviviente completa con los del otro si le faltan
+CAMPOS_PERSONALES = ('nombre', 'apellido', 'dni', 'edad', 'motivo_consulta')
+
+
+def _atencion(valores):
+    return {campo: valores[campo] for campo in CAMPOS_ATENCION}
+
+
+def _orden_destino(valores):
+    """Primero el destino registrado antes (a igual hora, por nombre del estado)."""
+    fecha = valores['fecha_atencion']
+    return (fecha is None, fecha.timestamp() if fecha else 0, valores['estado_atencion'])
+
+
+def resolver_atencion(local, entrante):
+    """
+    Estado, fecha y profesional de atención que quedan.
+
+    Returns:
+        tuple: (valores de atención, True si hubo dos atenciones distintas)
+    """
+    rango_local = PRECEDENCIA_ESTADO.get(local['estado_atencion'], 0)
+    rango_entrante = PRECEDENCIA_ESTADO.get(entrante['estado_atencion'], 0)
+    if rango_local != rango_entrante:
+        return _atencion(local if rango_local > rango_entrante else entrante), False
+    if rango_local < PRECEDENCIA_ESTADO['ALTA']:
+        return _atencion(entrante), False
+
+    mismo_destino = (
+        local['estado_atencion'] == entrante['estado_atencion']
+        and local['fecha_atencion'] == entrante['fecha_atencion']
+    )
+    if mismo_destino:
+        return _atencion(entrante), False
+    return _atencion(min(local, entrante, key=_orden_destino)), True
+
+
+def gana_entrante(local, uid_local, entrante, uid_entrante):
+    """True si, de dos pacientes con el mismo DNI, sobrevive el entrante."""
+    return (entrante['fecha_ingreso'], str(uid_entrante)) < (local['fecha_ingreso'], str(uid_local))
+
+
+def fusionar(sobreviviente, absorbido):
+    """
+    Valores del paciente que queda al fusionar dos registros del mismo DNI.
+
+    Returns:
+        tuple: (valores, True si los dos tenían atenciones distintas)
+    """
+    valores = dict(sobreviviente)
+    for campo in CAMPOS_PERSONALES:
+        if valores[campo] in (None, ''):
+            valores[campo] = absorbido[campo]
+    valores['fecha_ingreso'] = min(sobreviviente['fecha_ingreso'], absorbido['fecha_ingreso'])
+    valores['activo'] = sobreviviente['activo'] or absorbido['activo']
+    atencion, choque = resolver_atencion(absorbido, sobreviviente)
+    valores.update(atencion)
+    return valores, choque
+
+
+def describir(valores):
+    """Texto corto de un estado de atención para el registro de conflictos."""
+    fecha = valores['fecha_atencion']
+    return f"{valores['estado_atencion']} ({fecha.isoformat() if fecha else 'sin fecha'})"
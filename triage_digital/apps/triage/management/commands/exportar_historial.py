@@ -0,0 +1,67 @@
+"""
+📤 Exporta el historial de triages a CSV o JSON Lines (opcionalmente gzip).
+
+Recorre la tabla por keyset en lotes, con memoria constante: sirve para
+exportar años completos (p. ej. para el departamento de calidad):
+
+    python manage.py exportar_historial --desde 2025-01-01 --hasta 2025-12-31 --salida historial_2025.csv.gz
+    python manage.py exportar_historial --formato jsonl --nivel ROJO --salida - | head
+"""
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.triage import exportacion
+from apps.triage.models import SignosVitales
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f'Fecha inválida: {valor} (usar AAAA-MM-DD)')
+
+
+class Command(BaseCommand):
+    help = 'Exporta SignosVitales + Paciente + Profesional a CSV o JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=_fecha, help='Primer día (AAAA-MM-DD)')
+        parser.add_argument('--hasta', type=_fecha, help='Último día (AAAA-MM-DD)')
+        parser.add_argument(
+            '--nivel', action='append', default=[],
+            choices=[nivel for nivel, _ in SignosVitales.NIVEL_URGENCIA_CHOICES],
+            help='Nivel de urgencia (repetible)',
+        )
+        parser.add_argument('--profesional', type=int, help='ID del profesional que registró el triage')
+        parser.add_argument('--formato', choices=list(exportacion.FORMATOS), default='csv')
+        parser.add_argument('--salida', default='-', help="Archivo de salida ('-' = salida estándar)")
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Comprimir con gzip (automático si la salida termina en .gz)',
+        )
+
+    def handle(self, *args, **options):
+        if options['desde'] and options['hasta'] and options['desde'] > options['hasta']:
+            raise CommandError('--desde es posterior a --hasta')
+
+        filtros = exportacion.Filtros(
+            options['desde'], options['hasta'], options['nivel'], options['profesional'],
+        )
+        salida = options['salida']
+        comprimir = options['gzip'] or salida.endswith('.gz')
+        bloques = exportacion.exportar(filtros, options['formato'], comprimir)
+
+        if salida == '-':
+            for bloque in bloques:
+                sys.stdout.buffer.write(bloque)
+            sys.stdout.buffer.flush()
+            return
+
+        escritos = 0
+        with open(salida, 'wb') as archivo:
+            for bloque in bloques:
+                archivo.write(bloque)
+                escritos += len(bloque)
+        self.stderr.write(self.style.SUCCESS(f'✅ Historial exportado en {salida} ({escritos / 1024:.0f} KB)'))
@@ -0,0 +1,63 @@
+"""
+🗄️ Verifica que las bases SQLite tengan aplicado el perfil de pragmas.
+
+Cada conexión nueva aplica config.database_utils.PERFIL_SQLITE (Django
+corre el init_command de OPTIONS); este comando abre una conexión y lee
+cada pragma para confirmar que tomó:
+
+    python manage.py perfil_sqlite
+    python manage.py perfil_sqlite --database offline
+    python manage.py perfil_sqlite --vacuum   # pasar una base existente a auto_vacuum incremental
+
+auto_vacuum solo cambia en una base vacía o con un VACUUM, que reescribe el
+archivo completo y bloquea la base mientras tanto: correrlo fuera de turno.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from config.database_utils import PERFIL_SQLITE
+
+
+class Command(BaseCommand):
+    help = 'Muestra los pragmas de cada base SQLite y los compara con el perfil configurado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', help='Alias de una sola base (por defecto, todas las SQLite)')
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='Correr VACUUM si auto_vacuum no coincide (reescribe el archivo)',
+        )
+
+    def handle(self, *args, **options):
+        alias = [options['database']] if options['database'] else list(connections)
+        sqlite = [nombre for nombre in alias if connections[nombre].vendor == 'sqlite']
+        if not sqlite:
+            raise CommandError('No hay bases SQLite configuradas')
+
+        diferencias = 0
+        for nombre in sqlite:
+            conexion = connections[nombre]
+            self.stdout.write(f"🗄️ {nombre}: {conexion.settings_dict['NAME']}")
+            if options['vacuum'] and _leer(conexion, 'auto_vacuum') != PERFIL_SQLITE['auto_vacuum'][1]:
+                self.stdout.write('   VACUUM para aplicar auto_vacuum...')
+                with conexion.cursor() as cursor:
+                    cursor.execute(f"PRAGMA auto_vacuum={PERFIL_SQLITE['auto_vacuum'][0]}")
+                    cursor.execute('VACUUM')
+
+            for pragma, (_, esperado) in PERFIL_SQLITE.items():
+                actual = _leer(conexion, pragma)
+                if actual == esperado:
+                    self.stdout.write(f'   ✅ {pragma} = {actual}')
+                else:
+                    diferencias += 1
+                    self.stdout.write(self.style.WARNING(f'   ⚠️  {pragma} = {actual} (perfil: {esperado})'))
+
+        if diferencias:
+            raise CommandError(f'{diferencias} pragmas no coinciden con el perfil')
+        self.stdout.write(self.style.SUCCESS('✅ Perfil SQLite aplicado'))
+
+
+def _leer(conexion, pragma):
+    with conexion.cursor() as cursor:
+        cursor.execute(f'PRAGMA {pragma}')
+        return cursor.fetchone()[0]
@@ -0,0 +1,29 @@
+"""
+📊 Reconcilia los contadores del dashboard con los pacientes en espera.
+
+Lo mismo corre solo cada 15 minutos en el thread de mantenimiento; este
+comando sirve para correrlo a mano o desde cron:
+
+    python manage.py reconciliar_contadores
+"""
+from django.core.management.base import BaseCommand
+
+from apps.triage.contadores import estadisticas_en_espera, reconciliar_contadores
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores de pacientes en espera y corrige diferencias'
+
+    def handle(self, *args, **options):
+        resultado = reconciliar_contadores()
+
+        for nivel, (antes, despues) in resultado['niveles'].items():
+            self.stdout.write(self.style.WARNING(f'⚠️  {nivel}: {antes} → {despues}'))
+        if resultado['pacientes']:
+            self.stdout.write(f"🔧 Aportes de pacientes corregidos: {resultado['pacientes']}")
+
+        estadisticas = estadisticas_en_espera()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Contadores al día - ROJO: {estadisticas.rojos}, AMARILLO: {estadisticas.amarillos}, '
+            f'VERDE: {estadisticas.verdes} (total {estadisticas.total})'
+        ))
@@ -0,0 +1,49 @@
+"""
+📅 Reconstruye los resúmenes diarios, horarios y por profesional.
+
+Recalcula día por día desde las tablas crudas (rangos indexados por día).
+Correrlo una vez después de migrar para cargar la historia, o para un
+rango puntual tras una corrección manual de datos:
+
+    python manage.py reconstruir_resumenes
+    python manage.py reconstruir_resumenes --desde 2025-01-01 --hasta 2025-01-31
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.triage.resumenes import primer_dia_con_datos, recalcular_dias
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f'Fecha inválida: {valor} (usar AAAA-MM-DD)')
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los resúmenes de reportes desde pacientes y triages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=_fecha, help='Primer día (AAAA-MM-DD); default: primer dato')
+        parser.add_argument('--hasta', type=_fecha, help='Último día (AAAA-MM-DD); default: hoy')
+
+    def handle(self, *args, **options):
+        desde = options['desde'] or primer_dia_con_datos()
+        hasta = options['hasta'] or timezone.localdate()
+        if desde is None:
+            self.stdout.write('ℹ️  No hay datos para resumir')
+            return
+        if desde > hasta:
+            raise CommandError('--desde es posterior a --hasta')
+
+        dias = (hasta - desde).days + 1
+        for numero in range(dias):
+            fecha = desde + timedelta(days=numero)
+            recalcular_dias([fecha])
+            if (numero + 1) % 30 == 0:
+                self.stdout.write(f'📅 {numero + 1}/{dias} días ({fecha})')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Resúmenes reconstruidos: {desde} a {hasta} ({dias} días)'))
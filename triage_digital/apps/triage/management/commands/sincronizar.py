@@ -0,0 +1,78 @@
+"""
+🔄 Envía a otra base los cambios del diario de sincronización.
+
+Aplica en el destino las altas, modificaciones y bajas de pacientes y
+triages posteriores al último punto confirmado, en lotes. Se puede cortar y
+volver a correr: retoma desde el último lote aplicado. Los triages cuyo
+paciente o profesional no está en el destino quedan en espera y se
+reintentan en cada corrida.
+
+    python manage.py sincronizar --origen offline --destino default
+    python manage.py sincronizar --origen default --destino offline --lote 1000
+    python manage.py sincronizar --registrar-existentes   # anotar datos previos al diario
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from apps.triage import sincronizacion
+
+
+def _alias(valor):
+    if valor not in connections.databases:
+        raise CommandError(
+            f"Base '{valor}' no configurada (disponibles: {', '.join(connections.databases)})"
+        )
+    return valor
+
+
+class Command(BaseCommand):
+    help = 'Sincroniza pacientes y triages de una base a otra por el diario de cambios'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--origen', type=_alias, default=DEFAULT_DB_ALIAS, help='Alias de la base de origen')
+        parser.add_argument('--destino', type=_alias, help='Alias de la base de destino')
+        parser.add_argument(
+            '--lote', type=int, default=sincronizacion.TAMANO_LOTE,
+            help='Entradas del diario por transacción',
+        )
+        parser.add_argument(
+            '--registrar-existentes', action='store_true',
+            help='Anotar en el diario del origen las filas que todavía no tienen entradas',
+        )
+
+    def handle(self, *args, **options):
+        origen, destino = options['origen'], options['destino']
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+
+        if options['registrar_existentes']:
+            anotadas = sincronizacion.registrar_existentes(origen, options['lote'])
+            self.stdout.write(f'📒 {anotadas} filas existentes anotadas en el diario de {origen}')
+        if destino is None:
+            if not options['registrar_existentes']:
+                raise CommandError('Indicar --destino')
+            return
+
+        self.stdout.write(
+            f'🔄 {origen} → {destino}: {sincronizacion.pendientes(origen, destino)} cambios pendientes'
+        )
+        try:
+            resultado = sincronizacion.sincronizar(origen, destino, options['lote'])
+        except sincronizacion.ErrorSincronizacion as e:
+            raise CommandError(f'{e} (los lotes anteriores quedaron aplicados; volver a correr para reintentar)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {resultado.entradas} cambios en {resultado.lotes} lotes: '
+            f'{resultado.pacientes} pacientes, {resultado.signos_vitales} triages '
+            f'(confirmado hasta #{resultado.ultima_secuencia})'
+        ))
+        if resultado.conflictos:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {resultado.conflictos} conflictos resueltos automáticamente '
+                f'(ver Conflictos de Sincronización en el admin de {destino})'
+            ))
+        if resultado.triages_en_espera:
+            self.stdout.write(self.style.WARNING(
+                f'⏸️ {resultado.triages_en_espera} triages esperan a su paciente o profesional '
+                f'(ver Triages en Espera en el admin de {destino})'
+            ))
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:11
+
+from collections import Counter
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def contar_pacientes_en_espera(apps, schema_editor):
+    """Carga los contadores con los pacientes que hoy están en espera."""
+    Paciente = apps.get_model('patients', 'Paciente')
+    ContadorEspera = apps.get_model('triage', 'ContadorEspera')
+    PacienteContado = apps.get_model('triage', 'PacienteContado')
+    alias = schema_editor.connection.alias
+    
+    en_espera = Paciente.objects.using(alias).filter(
+        activo=True,
+        estado_atencion__in=['ESPERANDO', 'EN_ATENCION'],
+        ultimo_nivel_urgencia__isnull=False,
+        ultimo_triage_fecha__gte=timezone.now() - timedelta(hours=24),
+    ).values_list('id', 'ultimo_nivel_urgencia')
+    
+    contados = [PacienteContado(paciente_id=id, nivel_urgencia=nivel) for id, nivel in en_espera]
+    PacienteContado.objects.using(alias).bulk_create(contados)
+    
+    conteo = Counter(contado.nivel_urgencia for contado in contados)
+    ContadorEspera.objects.using(alias).bulk_create([
+        ContadorEspera(nivel_urgencia=nivel, cantidad=conteo[nivel])
+        for nivel in ('VERDE', 'AMARILLO', 'ROJO')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0005_paciente_ultimo_triage'),
+        ('triage', '0002_alter_profesional_tipo_signosvitales_idx_fecha_nivel_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorEspera',
+            fields=[
+                ('nivel_urgencia', models.CharField(choices=[('VERDE', 'Verde - Sin riesgo vital (atención dentro de 60 minutos)'), ('AMARILLO', 'Amarillo - Riesgo moderado (atención dentro de 30 minutos)'), ('ROJO', 'Rojo - Riesgo vital inmediato (atención inmediata)')], max_length=10, primary_key=True, serialize=False, verbose_name='Nivel de Urgencia')),
+                ('cantidad', models.IntegerField(default=0, verbose_name='Pacientes en espera')),
+            ],
+            options={
+                'verbose_name': 'Contador de Espera',
+                'verbose_name_plural': 'Contadores de Espera',
+            },
+        ),
+        migrations.CreateModel(
+            name='PacienteContado',
+            fields=[
+                ('paciente_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID del Paciente')),
+                ('nivel_urgencia', models.CharField(choices=[('VERDE', 'Verde - Sin riesgo vital (atención dentro de 60 minutos)'), ('AMARILLO', 'Amarillo - Riesgo moderado (atención dentro de 30 minutos)'), ('ROJO', 'Rojo - Riesgo vital inmediato (atención inmediata)')], max_length=10, verbose_name='Nivel de Urgencia')),
+            ],
+            options={
+                'verbose_name': 'Paciente Contado',
+                'verbose_name_plural': 'Pacientes Contados',
+            },
+        ),
+        migrations.RunPython(contar_pacientes_en_espera, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:15
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('triage', '0003_contadores_espera'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ingresos', models.PositiveIntegerField(default=0)),
+                ('evaluaciones', models.PositiveIntegerField(default=0)),
+                ('rojos', models.PositiveIntegerField(default=0)),
+                ('amarillos', models.PositiveIntegerField(default=0)),
+                ('verdes', models.PositiveIntegerField(default=0)),
+                ('atendidos', models.PositiveIntegerField(default=0)),
+                ('pase_a_sala', models.PositiveIntegerField(default=0)),
+                ('altas', models.PositiveIntegerField(default=0)),
+                ('pase_a_uti', models.PositiveIntegerField(default=0)),
+                ('derivados', models.PositiveIntegerField(default=0)),
+                ('espera_total_minutos', models.PositiveBigIntegerField(default=0)),
+                ('espera_hasta_15', models.PositiveIntegerField(default=0)),
+                ('espera_hasta_30', models.PositiveIntegerField(default=0)),
+                ('espera_hasta_60', models.PositiveIntegerField(default=0)),
+                ('espera_hasta_120', models.PositiveIntegerField(default=0)),
+                ('espera_mas_120', models.PositiveIntegerField(default=0)),
+                ('fecha', models.DateField(unique=True, verbose_name='Fecha')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario',
+                'verbose_name_plural': 'Resúmenes Diarios',
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenHorario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ingresos', models.PositiveIntegerField(default=0)),
+                ('evaluaciones', models.PositiveIntegerField(default=0)),
+                ('rojos', models.PositiveIntegerField(default=0)),
+                ('amarillos', models.PositiveIntegerField(default=0)),
+                ('verdes', models.PositiveIntegerField(default=0)),
+                ('atendidos', models.PositiveIntegerField(default=0)),
+                ('pase_a_sala', models.PositiveIntegerField(default=0)),
+                ('altas', models.PositiveIntegerField(default=0)),
+                ('pase_a_uti', models.PositiveIntegerField(default=0)),
+                ('derivados', models.PositiveIntegerField(default=0)),
+                ('espera_total_minutos', models.PositiveBigIntegerField(default=0)),
+                ('espera_hasta_15', models.PositiveIntegerField(default=0)),
+                ('espera_hasta_30', models.PositiveIntegerField(default=0)),
+                ('espera_hasta_60', models.PositiveIntegerField(default=0)),
+                ('espera_hasta_120', models.PositiveIntegerField(default=0)),
+                ('espera_mas_120', models.PositiveIntegerField(default=0)),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('hora', models.PositiveSmallIntegerField(validators=[django.core.validators.MaxValueValidator(23)], verbose_name='Hora')),
+            ],
+            options={
+                'verbose_name': 'Resumen Horario',
+                'verbose_name_plural': 'Resúmenes Horarios',
+                'ordering': ['-fecha', '-hora'],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'hora'), name='uniq_resumen_fecha_hora')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenProfesional',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ingresos', models.PositiveIntegerField(default=0)),
+                ('evaluaciones', models.PositiveIntegerField(default=0)),
+                ('rojos', models.PositiveIntegerField(default=0)),
+                ('amarillos', models.PositiveIntegerField(default=0)),
+                ('verdes', models.PositiveIntegerField(default=0)),
+                ('atendidos', models.PositiveIntegerField(default=0)),
+                ('pase_a_sala', models.PositiveIntegerField(default=0)),
+                ('altas', models.PositiveIntegerField(default=0)),
+                ('pase_a_uti', models.PositiveIntegerField(default=0)),
+                ('derivados', models.PositiveIntegerField(default=0)),
+                ('espera_total_minutos', models.PositiveBigIntegerField(default=0)),
+                ('espera_hasta_15', models.PositiveIntegerField(default=0)),
+                ('espera_hasta_30', models.PositiveIntegerField(default=0)),
+                ('espera_hasta_60', models.PositiveIntegerField(default=0)),
+                ('espera_hasta_120', models.PositiveIntegerField(default=0)),
+                ('espera_mas_120', models.PositiveIntegerField(default=0)),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('profesional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes', to='triage.profesional', verbose_name='Profesional')),
+            ],
+            options={
+                'verbose_name': 'Resumen por Profesional',
+                'verbose_name_plural': 'Resúmenes por Profesional',
+                'ordering': ['-fecha', '-evaluaciones'],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'profesional'), name='uniq_resumen_fecha_profesional')],
+            },
+        ),
+    ]
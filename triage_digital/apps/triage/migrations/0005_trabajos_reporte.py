@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('triage', '0004_resumenes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoReporte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('DIARIO_PDF', 'Reporte diario (PDF)')], max_length=20, verbose_name='Tipo de Reporte')),
+                ('desde', models.DateField(verbose_name='Desde')),
+                ('hasta', models.DateField(verbose_name='Hasta')),
+                ('huella', models.CharField(help_text='Hash de los datos del período al momento del pedido', max_length=64, verbose_name='Huella de los datos')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En proceso'), ('LISTO', 'Listo'), ('ERROR', 'Error')], default='PENDIENTE', max_length=15, verbose_name='Estado')),
+                ('archivo', models.CharField(blank=True, help_text='Nombre del archivo generado dentro de REPORTES_DIR', max_length=255, verbose_name='Archivo')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('fecha_solicitud', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Solicitud')),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Inicio de Generación')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin de Generación')),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trabajos_reporte', to='triage.profesional', verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Reporte',
+                'verbose_name_plural': 'Trabajos de Reporte',
+                'ordering': ['-fecha_solicitud'],
+                'indexes': [models.Index(fields=['estado', 'fecha_inicio'], name='idx_trabajo_estado_inicio')],
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'desde', 'hasta', 'huella'), name='uniq_trabajo_reporte_datos')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('triage', '0005_trabajos_reporte'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trabajoreporte',
+            name='tipo',
+            field=models.CharField(choices=[('DIARIO_PDF', 'Reporte diario (PDF)'), ('PERIODO_PDF', 'Reporte del período (PDF)'), ('PERIODO_CSV', 'Reporte del período (CSV)')], max_length=20, verbose_name='Tipo de Reporte'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0006_paciente_idx_fecha_atencion'),
+        ('triage', '0006_tipos_reporte_periodo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='signosvitales',
+            index=models.Index(fields=['fecha_hora', 'id'], name='idx_signos_fecha_id'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:32
+
+import apps.triage.models
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+def asignar_uids(apps, schema_editor):
+    """Un uid distinto por registro existente (el default se evalúa una sola vez)."""
+    SignosVitales = apps.get_model('triage', 'SignosVitales')
+    alias = schema_editor.connection.alias
+    registros = list(SignosVitales.objects.using(alias).only('id'))
+    for registro in registros:
+        registro.uid = uuid.uuid4()
+    SignosVitales.objects.using(alias).bulk_update(registros, ['uid'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0007_paciente_uid'),
+        ('triage', '0007_idx_signos_fecha_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodoSincronizacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uid', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='ID del Nodo')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+            ],
+            options={
+                'verbose_name': 'Nodo de Sincronización',
+                'verbose_name_plural': 'Nodos de Sincronización',
+            },
+        ),
+        migrations.CreateModel(
+            name='PuntoSincronizacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origen', models.UUIDField(unique=True, verbose_name='Nodo de Origen')),
+                ('ultima_secuencia', models.BigIntegerField(default=0, verbose_name='Última Secuencia Aplicada')),
+                ('fecha', models.DateTimeField(auto_now=True, verbose_name='Última Sincronización')),
+            ],
+            options={
+                'verbose_name': 'Punto de Sincronización',
+                'verbose_name_plural': 'Puntos de Sincronización',
+            },
+        ),
+        migrations.CreateModel(
+            name='CambioSincronizacion',
+            fields=[
+                ('secuencia', models.BigAutoField(primary_key=True, serialize=False, verbose_name='Secuencia')),
+                ('modelo', models.CharField(choices=[('paciente', 'Paciente'), ('signos_vitales', 'Signos Vitales')], max_length=20, verbose_name='Modelo')),
+                ('uid', models.UUIDField(verbose_name='ID Global de la Fila')),
+                ('operacion', models.CharField(choices=[('ALTA', 'Alta'), ('MODIFICACION', 'Modificación')], max_length=12, verbose_name='Operación')),
+                ('datos', models.JSONField(encoder=apps.triage.models.DiarioJSONEncoder, help_text='Estado de la fila después del cambio (referencias por uid/DNI)', verbose_name='Datos')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha del Cambio')),
+                ('nodo_origen', models.UUIDField(blank=True, null=True, verbose_name='Nodo de Origen')),
+            ],
+            options={
+                'verbose_name': 'Cambio para Sincronizar',
+                'verbose_name_plural': 'Cambios para Sincronizar',
+                'ordering': ['secuencia'],
+                'indexes': [models.Index(fields=['modelo', 'uid'], name='idx_cambio_modelo_uid')],
+            },
+        ),
+        migrations.AddField(
+            model_name='signosvitales',
+            name='uid',
+            field=models.UUIDField(editable=False, null=True, verbose_name='ID Global'),
+        ),
+        migrations.RunPython(asignar_uids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='signosvitales',
+            name='uid',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='ID Global'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0007_paciente_uid'),
+        ('triage', '0008_sincronizacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConflictoSincronizacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('DNI_DUPLICADO', 'Mismo DNI registrado en dos bases'), ('ATENCION', 'Atención registrada en las dos bases')], max_length=15, verbose_name='Tipo')),
+                ('uid', models.UUIDField(verbose_name='ID Global del Paciente')),
+                ('nodo_origen', models.UUIDField(verbose_name='Nodo de Origen')),
+                ('detalle', models.TextField(verbose_name='Detalle')),
+                ('resolucion', models.TextField(verbose_name='Resolución')),
+                ('fecha', models.DateTimeField(auto_now_add=True, verbose_name='Fecha')),
+            ],
+            options={
+                'verbose_name': 'Conflicto de Sincronización',
+                'verbose_name_plural': 'Conflictos de Sincronización',
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AliasPaciente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uid', models.UUIDField(unique=True, verbose_name='ID Global Fusionado')),
+                ('fecha', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Fusión')),
+                ('paciente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='patients.paciente', verbose_name='Paciente')),
+            ],
+            options={
+                'verbose_name': 'Alias de Paciente',
+                'verbose_name_plural': 'Alias de Pacientes',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:19
+
+import apps.triage.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('triage', '0009_conflictos_sincronizacion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cambiosincronizacion',
+            name='datos',
+            field=models.JSONField(encoder=apps.triage.models.DiarioJSONEncoder, help_text='Estado de la fila después del cambio (referencias por uid/DNI; vacío en las bajas)', verbose_name='Datos'),
+        ),
+        migrations.AlterField(
+            model_name='cambiosincronizacion',
+            name='operacion',
+            field=models.CharField(choices=[('ALTA', 'Alta'), ('MODIFICACION', 'Modificación'), ('BAJA', 'Baja')], max_length=12, verbose_name='Operación'),
+        ),
+    ]
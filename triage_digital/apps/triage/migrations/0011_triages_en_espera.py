@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:23
+
+import apps.triage.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('triage', '0010_bajas_sincronizacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TriageEnEspera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uid', models.UUIDField(unique=True, verbose_name='ID Global del Triage')),
+                ('operacion', models.CharField(choices=[('ALTA', 'Alta'), ('MODIFICACION', 'Modificación'), ('BAJA', 'Baja')], max_length=12, verbose_name='Operación')),
+                ('datos', models.JSONField(encoder=apps.triage.models.DiarioJSONEncoder, help_text='Entrada del diario tal como llegó', verbose_name='Datos')),
+                ('fecha', models.DateTimeField(verbose_name='Fecha del Cambio')),
+                ('nodo_origen', models.UUIDField(verbose_name='Nodo de Origen')),
+                ('motivo', models.TextField(verbose_name='Motivo')),
+            ],
+            options={
+                'verbose_name': 'Triage en Espera',
+                'verbose_name_plural': 'Triages en Espera',
+                'ordering': ['fecha'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='conflictosincronizacion',
+            name='tipo',
+            field=models.CharField(choices=[('DNI_DUPLICADO', 'Mismo DNI registrado en dos bases'), ('ATENCION', 'Atención registrada en las dos bases'), ('SIN_REFERENCIA', 'Triage sin su paciente o profesional en el destino')], max_length=15, verbose_name='Tipo'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('triage', '0011_triages_en_espera'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trabajoreporte',
+            name='solicitado_por',
+            field=models.ForeignKey(blank=True, help_text='Quien lo pidió primero; cada descarga queda en DescargaReporte', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trabajos_reporte', to='triage.profesional', verbose_name='Solicitado por'),
+        ),
+        migrations.CreateModel(
+            name='DescargaReporte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Descarga')),
+                ('profesional', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='descargas_reporte', to='triage.profesional', verbose_name='Profesional')),
+                ('trabajo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descargas', to='triage.trabajoreporte', verbose_name='Trabajo')),
+            ],
+            options={
+                'verbose_name': 'Descarga de Reporte',
+                'verbose_name_plural': 'Descargas de Reportes',
+                'ordering': ['-fecha'],
+            },
+        ),
+    ]
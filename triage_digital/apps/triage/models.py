@@ -1,6 +1,10 @@
 """Modelos para Triage Digital y cálculo NEWS Score."""
 
-from django.db import models
+import uuid
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -58,6 +62,10 @@ class Profesional(models.Model):
         """🔒 Control de permisos: Solo administradores pueden descargar PDFs."""
         return self.tipo in ['administrador', 'medico']
     
+    def puede_exportar_datos(self):
+        """🔒 Control de permisos: Solo administradores exportan el historial completo."""
+        return self.tipo == 'administrador'
+    
     def puede_gestionar_usuarios(self):
         """🔒 Control de permisos: Solo administradores pueden gestionar usuarios."""
         return self.tipo == 'administrador'
@@ -71,7 +79,7 @@ class Profesional(models.Model):
         permisos = {
             'enfermero': '👩‍⚕️ Realizar triage, ver pacientes en espera',
             'medico': '👨‍⚕️ Realizar triage, descargar reportes PDF',
-            'administrador': '🔧 Todos los permisos: triage, reportes, gestión de usuarios'
+            'administrador': '🔧 Todos los permisos: triage, reportes, exportación de datos, gestión de usuarios'
         }
         return permisos.get(self.tipo, 'Sin permisos definidos')
     
@@ -133,6 +141,14 @@ class SignosVitales(models.Model):
         verbose_name="Fecha y hora del registro"
     )
     
+    # Identificador global para sincronizar bases (ver Paciente.uid)
+    uid = models.UUIDField(
+        default=uuid.uuid4,
+        unique=True,
+        editable=False,
+        verbose_name="ID Global"
+    )
+    
     # Parámetros vitales del NEWS Score
     frecuencia_respiratoria = models.PositiveIntegerField(
         validators=[MinValueValidator(1), MaxValueValidator(60)],
@@ -207,6 +223,8 @@ class SignosVitales(models.Model):
             models.Index(fields=['fecha_hora', 'nivel_urgencia'], name='idx_fecha_nivel'),
             # Índice para casos críticos
             models.Index(fields=['nivel_urgencia', 'paciente'], name='idx_triage_critico'),
+            # Índice para recorrer el historial por keyset (exportación)
+            models.Index(fields=['fecha_hora', 'id'], name='idx_signos_fecha_id'),
         ]
         
     def __str__(self):
@@ -261,8 +279,27 @@ class SignosVitales(models.Model):
         self.nivel_urgencia = resultado_news['clasificacion']
         self.tiempo_atencion_max = resultado_news['tiempo_atencion_maximo']
         
-        # Guardar con triage calculado
-        super().save(*args, **kwargs)
+        # Import lazy para evitar circular imports
+        from . import resumenes
+        from .contadores import ajustar_contadores
+        
+        # Guardar con triage calculado y actualizar el último triage del
+        # paciente en la misma transacción
+        nuevo = self._state.adding
+        with transaction.atomic(using=router.db_for_write(SignosVitales, instance=self)):
+            super().save(*args, **kwargs)
+            self.paciente.registrar_ultimo_triage(self)
+            
+            # Contadores del dashboard en la misma transacción (post_save llega
+            # antes de registrar el último triage, por eso se ajustan acá)
+            ajustar_contadores([self.paciente_id])
+            
+            # Resúmenes para reportes: un triage nuevo suma; una edición
+            # puede cambiar el nivel, se recalcula su día
+            if nuevo:
+                resumenes.registrar_evaluaciones([self])
+            else:
+                resumenes.recalcular_dias([resumenes.fecha_y_hora_local(self.fecha_hora)[0]])
 
     def calcular_prioridad_critica(self):
         """
@@ -317,3 +354,568 @@ class SignosVitales(models.Model):
             prioridad += 100
             
         return prioridad
+
+
+class ContadorEspera(models.Model):
+    """
+    📊 Pacientes en espera por nivel de urgencia (contadores del dashboard).
+    
+    Se ajusta en la misma transacción que cada triage o cambio de estado,
+    así leer las estadísticas son 3 filas sin importar el tamaño de la base.
+    """
+    
+    nivel_urgencia = models.CharField(
+        max_length=10,
+        choices=SignosVitales.NIVEL_URGENCIA_CHOICES,
+        primary_key=True,
+        verbose_name="Nivel de Urgencia"
+    )
+    
+    cantidad = models.IntegerField(
+        default=0,
+        verbose_name="Pacientes en espera"
+    )
+    
+    class Meta:
+        verbose_name = "Contador de Espera"
+        verbose_name_plural = "Contadores de Espera"
+    
+    def __str__(self):
+        return f"{self.nivel_urgencia}: {self.cantidad}"
+
+
+class PacienteContado(models.Model):
+    """
+    Nivel con el que cada paciente suma en ContadorEspera.
+    
+    Permite ajustar los contadores comparando lo contado con el estado actual
+    del paciente (idempotente, sirva o no la señal que lo disparó). Sin FK:
+    la fila tiene que sobrevivir al borrado del paciente para poder restarlo.
+    """
+    
+    paciente_id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name="ID del Paciente"
+    )
+    
+    nivel_urgencia = models.CharField(
+        max_length=10,
+        choices=SignosVitales.NIVEL_URGENCIA_CHOICES,
+        verbose_name="Nivel de Urgencia"
+    )
+    
+    class Meta:
+        verbose_name = "Paciente Contado"
+        verbose_name_plural = "Pacientes Contados"
+    
+    def __str__(self):
+        return f"Paciente {self.paciente_id}: {self.nivel_urgencia}"
+
+
+class ResumenBase(models.Model):
+    """
+    Conteos de un período (día u hora local del hospital) para reportes.
+    
+    Se suman en la misma transacción que cada ingreso, triage o atención;
+    los reportes de meses leen cientos de filas en lugar de las tablas crudas.
+    """
+    
+    # Pacientes ingresados (por fecha de ingreso)
+    ingresos = models.PositiveIntegerField(default=0)
+    
+    # Evaluaciones de triage (por fecha del registro)
+    evaluaciones = models.PositiveIntegerField(default=0)
+    rojos = models.PositiveIntegerField(default=0)
+    amarillos = models.PositiveIntegerField(default=0)
+    verdes = models.PositiveIntegerField(default=0)
+    
+    # Destinos (por fecha de atención)
+    atendidos = models.PositiveIntegerField(default=0)
+    pase_a_sala = models.PositiveIntegerField(default=0)
+    altas = models.PositiveIntegerField(default=0)
+    pase_a_uti = models.PositiveIntegerField(default=0)
+    derivados = models.PositiveIntegerField(default=0)
+    
+    # Tiempo de espera de los atendidos: suma (para el promedio) e histograma
+    espera_total_minutos = models.PositiveBigIntegerField(default=0)
+    espera_hasta_15 = models.PositiveIntegerField(default=0)
+    espera_hasta_30 = models.PositiveIntegerField(default=0)
+    espera_hasta_60 = models.PositiveIntegerField(default=0)
+    espera_hasta_120 = models.PositiveIntegerField(default=0)
+    espera_mas_120 = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        abstract = True
+    
+    @property
+    def espera_promedio_minutos(self):
+        """Espera promedio de los atendidos del período (None si no hubo)."""
+        if not self.atendidos:
+            return None
+        return round(self.espera_total_minutos / self.atendidos)
+
+
+class ResumenDiario(ResumenBase):
+    """📅 Resumen de un día (fecha local del hospital)."""
+    
+    fecha = models.DateField(
+        unique=True,
+        verbose_name="Fecha"
+    )
+    
+    class Meta:
+        verbose_name = "Resumen Diario"
+        verbose_name_plural = "Resúmenes Diarios"
+        ordering = ['-fecha']
+    
+    def __str__(self):
+        return f"Resumen {self.fecha}"
+
+
+class ResumenHorario(ResumenBase):
+    """🕐 Resumen de una hora (fecha y hora local del hospital)."""
+    
+    fecha = models.DateField(verbose_name="Fecha")
+    
+    hora = models.PositiveSmallIntegerField(
+        validators=[MaxValueValidator(23)],
+        verbose_name="Hora"
+    )
+    
+    class Meta:
+        verbose_name = "Resumen Horario"
+        verbose_name_plural = "Resúmenes Horarios"
+        ordering = ['-fecha', '-hora']
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'hora'], name='uniq_resumen_fecha_hora'),
+        ]
+    
+    def __str__(self):
+        return f"Resumen {self.fecha} {self.hora:02d}h"
+
+
+class ResumenProfesional(ResumenBase):
+    """👩‍⚕️ Resumen diario de un profesional (sus evaluaciones y sus atenciones)."""
+    
+    fecha = models.DateField(verbose_name="Fecha")
+    
+    profesional = models.ForeignKey(
+        Profesional,
+        on_delete=models.CASCADE,
+        related_name='resumenes',
+        verbose_name="Profesional"
+    )
+    
+    class Meta:
+        verbose_name = "Resumen por Profesional"
+        verbose_name_plural = "Resúmenes por Profesional"
+        ordering = ['-fecha', '-evaluaciones']
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'profesional'], name='uniq_resumen_fecha_profesional'),
+        ]
+    
+    def __str__(self):
+        return f"Resumen {self.fecha} - {self.profesional}"
+
+
+class TrabajoReporte(models.Model):
+    """
+    📄 Pedido de un reporte que se genera en segundo plano.
+    
+    Uno por tipo, período y huella de los datos: mientras los datos no
+    cambien, el archivo ya generado se vuelve a servir sin renderizar.
+    """
+    
+    TIPO_CHOICES = [
+        ('DIARIO_PDF', 'Reporte diario (PDF)'),
+        ('PERIODO_PDF', 'Reporte del período (PDF)'),
+        ('PERIODO_CSV', 'Reporte del período (CSV)'),
+    ]
+    
+    ESTADO_CHOICES = [
+        ('PENDIENTE', 'Pendiente'),
+        ('EN_PROCESO', 'En proceso'),
+        ('LISTO', 'Listo'),
+        ('ERROR', 'Error'),
+    ]
+    
+    tipo = models.CharField(
+        max_length=20,
+        choices=TIPO_CHOICES,
+        verbose_name="Tipo de Reporte"
+    )
+    
+    desde = models.DateField(verbose_name="Desde")
+    hasta = models.DateField(verbose_name="Hasta")
+    
+    huella = models.CharField(
+        max_length=64,
+        verbose_name="Huella de los datos",
+        help_text="Hash de los datos del período al momento del pedido"
+    )
+    
+    estado = models.CharField(
+        max_length=15,
+        choices=ESTADO_CHOICES,
+        default='PENDIENTE',
+        verbose_name="Estado"
+    )
+    
+    archivo = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="Archivo",
+        help_text="Nombre del archivo generado dentro de REPORTES_DIR"
+    )
+    
+    error = models.TextField(
+        blank=True,
+        verbose_name="Error"
+    )
+    
+    solicitado_por = models.ForeignKey(
+        Profesional,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='trabajos_reporte',
+        verbose_name="Solicitado por",
+        help_text="Quien lo pidió primero; cada descarga queda en DescargaReporte"
+    )
+    
+    fecha_solicitud = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Fecha de Solicitud"
+    )
+    
+    fecha_inicio = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Inicio de Generación"
+    )
+    
+    fecha_fin = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Fin de Generación"
+    )
+    
+    class Meta:
+        verbose_name = "Trabajo de Reporte"
+        verbose_name_plural = "Trabajos de Reporte"
+        ordering = ['-fecha_solicitud']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tipo', 'desde', 'hasta', 'huella'], name='uniq_trabajo_reporte_datos'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['estado', 'fecha_inicio'], name='idx_trabajo_estado_inicio'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.desde} - {self.hasta} ({self.estado})"
+
+
+class DescargaReporte(models.Model):
+    """
+    📥 Descarga del archivo de un TrabajoReporte.
+    
+    El archivo se comparte entre todos los que piden los mismos datos: acá
+    queda quién descargó cada uno y cuándo.
+    """
+    
+    trabajo = models.ForeignKey(
+        TrabajoReporte,
+        on_delete=models.CASCADE,
+        related_name='descargas',
+        verbose_name="Trabajo"
+    )
+    
+    profesional = models.ForeignKey(
+        Profesional,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='descargas_reporte',
+        verbose_name="Profesional"
+    )
+    
+    fecha = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Fecha de Descarga"
+    )
+    
+    class Meta:
+        verbose_name = "Descarga de Reporte"
+        verbose_name_plural = "Descargas de Reportes"
+        ordering = ['-fecha']
+    
+    def __str__(self):
+        return f"{self.trabajo} → {self.profesional} ({self.fecha:%d/%m/%Y %H:%M})"
+
+
+class NodoSincronizacion(models.Model):
+    """
+    🔄 Identidad de esta base para la sincronización (una sola fila).
+    
+    Las secuencias del diario son locales a cada base: el destino recuerda
+    hasta dónde aplicó los cambios de cada nodo de origen por este uid.
+    """
+    
+    uid = models.UUIDField(
+        default=uuid.uuid4,
+        unique=True,
+        editable=False,
+        verbose_name="ID del Nodo"
+    )
+    
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Fecha de Creación"
+    )
+    
+    class Meta:
+        verbose_name = "Nodo de Sincronización"
+        verbose_name_plural = "Nodos de Sincronización"
+    
+    @classmethod
+    def propio(cls, using='default'):
+        """Nodo de la base `using` (se crea la primera vez)."""
+        nodo = cls.objects.using(using).order_by('id').first()
+        return nodo or cls.objects.using(using).create()
+    
+    def __str__(self):
+        return f"Nodo {self.uid}"
+
+
+class DiarioJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder con fechas completas (el original corta a milisegundos)."""
+    
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CambioSincronizacion(models.Model):
+    """
+    📒 Diario de cambios (solo se agregan filas) de Paciente y SignosVitales.
+    
+    Cada alta o modificación deja una entrada con el estado completo de la
+    fila, identificada por su uid global, en la misma transacción que el
+    cambio; cada borrado, una baja con solo el uid. La secuencia es creciente
+    y no se reutiliza: la sincronización envía las entradas posteriores al
+    último punto confirmado por el destino.
+    Los cambios recibidos de otro nodo también se anotan, para que la base
+    central los reenvíe al resto de las estaciones.
+    """
+    
+    MODELO_CHOICES = [
+        ('paciente', 'Paciente'),
+        ('signos_vitales', 'Signos Vitales'),
+    ]
+    
+    OPERACION_CHOICES = [
+        ('ALTA', 'Alta'),
+        ('MODIFICACION', 'Modificación'),
+        ('BAJA', 'Baja'),
+    ]
+    
+    secuencia = models.BigAutoField(
+        primary_key=True,
+        verbose_name="Secuencia"
+    )
+    
+    modelo = models.CharField(
+        max_length=20,
+        choices=MODELO_CHOICES,
+        verbose_name="Modelo"
+    )
+    
+    uid = models.UUIDField(verbose_name="ID Global de la Fila")
+    
+    operacion = models.CharField(
+        max_length=12,
+        choices=OPERACION_CHOICES,
+        verbose_name="Operación"
+    )
+    
+    datos = models.JSONField(
+        encoder=DiarioJSONEncoder,
+        verbose_name="Datos",
+        help_text="Estado de la fila después del cambio (referencias por uid/DNI; vacío en las bajas)"
+    )
+    
+    fecha = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Fecha del Cambio"
+    )
+    
+    # Nodo donde se hizo el cambio si llegó sincronizado (None = en esta base):
+    # se reenvía a otros nodos pero nunca de vuelta al que lo originó
+    nodo_origen = models.UUIDField(
+        null=True,
+        blank=True,
+        verbose_name="Nodo de Origen"
+    )
+    
+    class Meta:
+        verbose_name = "Cambio para Sincronizar"
+        verbose_name_plural = "Cambios para Sincronizar"
+        ordering = ['secuencia']
+        indexes = [
+            models.Index(fields=['modelo', 'uid'], name='idx_cambio_modelo_uid'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.secuencia} {self.operacion} {self.modelo} {self.uid}"
+
+
+class PuntoSincronizacion(models.Model):
+    """
+    ✅ Último cambio aplicado en esta base de cada nodo de origen.
+    
+    Se guarda en la misma transacción que aplica el lote: si la
+    sincronización se corta, la próxima retoma desde acá sin repetir.
+    """
+    
+    origen = models.UUIDField(
+        unique=True,
+        verbose_name="Nodo de Origen"
+    )
+    
+    ultima_secuencia = models.BigIntegerField(
+        default=0,
+        verbose_name="Última Secuencia Aplicada"
+    )
+    
+    fecha = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Última Sincronización"
+    )
+    
+    class Meta:
+        verbose_name = "Punto de Sincronización"
+        verbose_name_plural = "Puntos de Sincronización"
+    
+    def __str__(self):
+        return f"{self.origen} hasta #{self.ultima_secuencia}"
+
+
+class AliasPaciente(models.Model):
+    """
+    🔗 uid de un paciente que se fusionó con otro al sincronizar.
+    
+    Pasa cuando el mismo DNI se registró en dos bases desconectadas: queda
+    una sola fila y los cambios y triages que sigan llegando con el uid
+    fusionado se aplican sobre ella.
+    """
+    
+    uid = models.UUIDField(
+        unique=True,
+        verbose_name="ID Global Fusionado"
+    )
+    
+    paciente = models.ForeignKey(
+        Paciente,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Paciente"
+    )
+    
+    fecha = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Fecha de Fusión"
+    )
+    
+    class Meta:
+        verbose_name = "Alias de Paciente"
+        verbose_name_plural = "Alias de Pacientes"
+    
+    def __str__(self):
+        return f"{self.uid} → paciente {self.paciente_id}"
+
+
+class ConflictoSincronizacion(models.Model):
+    """
+    ⚠️ Colisión resuelta automáticamente al aplicar cambios de otra base.
+    
+    Se anota en la misma transacción que el lote (que sigue adelante) para
+    que un administrador pueda revisar cómo se resolvió.
+    """
+    
+    TIPO_CHOICES = [
+        ('DNI_DUPLICADO', 'Mismo DNI registrado en dos bases'),
+        ('ATENCION', 'Atención registrada en las dos bases'),
+        ('SIN_REFERENCIA', 'Triage sin su paciente o profesional en el destino'),
+    ]
+    
+    tipo = models.CharField(
+        max_length=15,
+        choices=TIPO_CHOICES,
+        verbose_name="Tipo"
+    )
+    
+    uid = models.UUIDField(verbose_name="ID Global del Paciente")
+    
+    nodo_origen = models.UUIDField(verbose_name="Nodo de Origen")
+    
+    detalle = models.TextField(verbose_name="Detalle")
+    
+    resolucion = models.TextField(verbose_name="Resolución")
+    
+    fecha = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Fecha"
+    )
+    
+    class Meta:
+        verbose_name = "Conflicto de Sincronización"
+        verbose_name_plural = "Conflictos de Sincronización"
+        ordering = ['-fecha']
+    
+    def __str__(self):
+        return f"{self.get_tipo_display()} ({self.uid})"
+
+
+class TriageEnEspera(models.Model):
+    """
+    ⏸️ Triage recibido de otra base que todavía no se pudo aplicar.
+    
+    Su paciente (por uid) o su profesional (por DNI) no existen en esta
+    base. El lote sigue adelante sin él y se reintenta al final de cada
+    sincronización: se aplica cuando llega el paciente o se crea la cuenta
+    del profesional. Una versión posterior del mismo triage lo reemplaza.
+    """
+    
+    uid = models.UUIDField(
+        unique=True,
+        verbose_name="ID Global del Triage"
+    )
+    
+    operacion = models.CharField(
+        max_length=12,
+        choices=CambioSincronizacion.OPERACION_CHOICES,
+        verbose_name="Operación"
+    )
+    
+    datos = models.JSONField(
+        encoder=DiarioJSONEncoder,
+        verbose_name="Datos",
+        help_text="Entrada del diario tal como llegó"
+    )
+    
+    fecha = models.DateTimeField(verbose_name="Fecha del Cambio")
+    
+    nodo_origen = models.UUIDField(verbose_name="Nodo de Origen")
+    
+    motivo = models.TextField(verbose_name="Motivo")
+    
+    class Meta:
+        verbose_name = "Triage en Espera"
+        verbose_name_plural = "Triages en Espera"
+        ordering = ['fecha']
+    
+    def __str__(self):
+        return f"Triage {self.uid}: {self.motivo}"
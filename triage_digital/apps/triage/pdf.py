@@ -0,0 +1,311 @@
+"""
+📄 Render de reportes PDF con reportlab.
+
+Las funciones escriben en cualquier destino tipo archivo: los trabajos de
+trabajos.py las corren fuera del request y guardan el resultado en disco.
+
+Hoja lleva la posición vertical y pagina sola: las tablas no tienen límite
+de filas (repiten el encabezado en cada página) y se dibujan fila por fila
+desde generadores, así que un día de 20 o de 20.000 atenciones no cambia la
+memoria usada para leer los datos. Cada página cerrada queda comprimida.
+"""
+from django.utils import timezone
+
+from . import reportes
+
+# Márgenes (puntos): arriba, y abajo el espacio reservado para el pie
+MARGEN_SUPERIOR = 50
+MARGEN_INFERIOR = 60
+
+DESTINO_EMOJIS = {
+    'PASE_A_SALA': '🏥 Sala',
+    'ALTA': '✅ Alta',
+    'PASE_A_UTI': '🚨 UTI',
+    'DERIVADO': '🏥 Derivado',
+}
+
+
+def _lazy_import_pdf():
+    # Import lazy para ahorrar memoria
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    return canvas, letter
+
+
+class Hoja:
+    """Canvas con cursor vertical, salto de página automático y pie numerado."""
+
+    def __init__(self, destino, pie):
+        canvas, letter = _lazy_import_pdf()
+        self.ancho, self.alto = letter
+        self.canvas = canvas.Canvas(destino, pagesize=letter, pageCompression=1)
+        self.pie = pie
+        self.pagina = 1
+        self.y = self.alto - MARGEN_SUPERIOR
+        self._encabezado = None
+
+    def reservar(self, alto):
+        """Pasa a una página nueva si lo que sigue (`alto` puntos) no entra."""
+        if self.y - alto < MARGEN_INFERIOR:
+            self.nueva_pagina()
+
+    def nueva_pagina(self):
+        self._dibujar_pie()
+        self.canvas.showPage()
+        self.pagina += 1
+        self.y = self.alto - MARGEN_SUPERIOR
+        if self._encabezado:
+            self._dibujar_encabezado()
+
+    def bajar(self, puntos):
+        self.y -= puntos
+
+    def texto(self, x, texto, fuente="Helvetica", tamano=12):
+        self.canvas.setFont(fuente, tamano)
+        self.canvas.drawString(x, self.y, texto)
+
+    def titulo(self, texto, espacio_siguiente=0):
+        """Título de sección; salta de página si no entra junto con `espacio_siguiente`."""
+        self.reservar(25 + espacio_siguiente)
+        self.texto(50, texto, "Helvetica-Bold", 18)
+        self.bajar(25)
+
+    def tabla(self, columnas, filas, tamano=10, alto_fila=14):
+        """
+        Tabla sin límite de filas: `columnas` es [(título, x)] y `filas` un
+        iterable de tuplas de textos (se consume de a una fila).
+        """
+        self._encabezado = (columnas, tamano)
+        self.reservar(2 * alto_fila + 4)
+        self._dibujar_encabezado()
+        for fila in filas:
+            self.reservar(alto_fila)
+            self.canvas.setFont("Helvetica", tamano)
+            for (_, x), valor in zip(columnas, fila):
+                self.canvas.drawString(x, self.y, valor)
+            self.bajar(alto_fila)
+        self._encabezado = None
+
+    def _dibujar_encabezado(self):
+        columnas, tamano = self._encabezado
+        self.canvas.setFont("Helvetica-Bold", tamano)
+        for titulo, x in columnas:
+            self.canvas.drawString(x, self.y, titulo)
+        self.bajar(tamano + 6)
+
+    def _dibujar_pie(self):
+        self.canvas.setFont("Helvetica", 8)
+        for indice, linea in enumerate(self.pie):
+            self.canvas.drawString(50, 30 - 10 * indice, linea)
+        self.canvas.drawRightString(self.ancho - 50, 30, f"Página {self.pagina}")
+
+    def cerrar(self):
+        self._dibujar_pie()
+        self.canvas.showPage()
+        self.canvas.save()
+
+
+def formato_espera(minutos):
+    return f"{minutos}m" if minutos < 60 else f"{minutos // 60}h{minutos % 60}m"
+
+
+def _icono_tipo(tipo):
+    return "🔧" if tipo == 'administrador' else "👨‍⚕️" if tipo == 'medico' else "👩‍⚕️"
+
+
+def _filas_profesionales(profesionales):
+    for stat in profesionales:
+        if not stat.evaluaciones:
+            continue
+        yield (
+            f"{_icono_tipo(stat.tipo)} {stat.nombre}",
+            str(stat.evaluaciones),
+            str(stat.rojos),
+            str(stat.amarillos),
+            str(stat.verdes),
+        )
+
+
+def _filas_atendidos(atendidos):
+    for atendido in atendidos:
+        yield (
+            timezone.localtime(atendido.fecha_atencion).strftime('%H:%M'),
+            atendido.nombre_completo[:22],
+            DESTINO_EMOJIS.get(atendido.destino, atendido.destino),
+            formato_espera(atendido.minutos_espera),
+            atendido.profesional[:20] or "N/A",
+        )
+
+
+def _pie():
+    return [
+        f"📄 Reporte generado por Sistema Triage Digital - {timezone.localtime().strftime('%d/%m/%Y %H:%M')}",
+        "🔒 Acceso autorizado para: Médico / Administrador",
+    ]
+
+
+def _secciones_conteos(hoja, totales):
+    """Evaluaciones por nivel y destinos de los pacientes."""
+    hoja.titulo("📊 EVALUACIONES", espacio_siguiente=90)
+    hoja.bajar(5)
+    hoja.texto(70, f"🔴 Casos Críticos (ROJO): {totales.rojos}", tamano=14)
+    hoja.bajar(20)
+    hoja.texto(70, f"🟡 Casos Urgentes (AMARILLO): {totales.amarillos}", tamano=14)
+    hoja.bajar(20)
+    hoja.texto(70, f"🟢 Casos Leves (VERDE): {totales.verdes}", tamano=14)
+    hoja.bajar(20)
+    hoja.texto(70, f"📈 TOTAL EVALUACIONES: {totales.evaluaciones}", "Helvetica-Bold", 14)
+    hoja.bajar(50)
+
+    hoja.titulo("🏥 DESTINOS DE PACIENTES", espacio_siguiente=130)
+    hoja.bajar(5)
+    hoja.texto(70, f"🏥 Pase a Sala: {totales.pase_a_sala}", tamano=14)
+    hoja.bajar(20)
+    hoja.texto(70, f"✅ Altas: {totales.altas}", tamano=14)
+    hoja.bajar(20)
+    hoja.texto(70, f"🚨 Pase a UTI: {totales.pase_a_uti}", tamano=14)
+    hoja.bajar(20)
+    if totales.derivados:
+        hoja.texto(70, f"🏥 Derivados: {totales.derivados}", tamano=14)
+        hoja.bajar(20)
+    hoja.texto(70, f"📈 TOTAL ATENDIDOS: {totales.atendidos}", "Helvetica-Bold", 14)
+    espera = totales.espera_promedio_minutos
+    if espera is not None:
+        hoja.bajar(20)
+        hoja.texto(70, f"⏱️ Espera promedio: {formato_espera(espera)}", tamano=14)
+    hoja.bajar(50)
+
+
+def _seccion_profesionales(hoja, profesionales):
+    hoja.titulo("👩‍⚕️ EVALUACIONES POR PROFESIONAL", espacio_siguiente=30)
+    hoja.tabla(
+        [("PROFESIONAL", 70), ("TOTAL", 260), ("ROJOS", 310), ("AMARILLOS", 370), ("VERDES", 440)],
+        _filas_profesionales(profesionales),
+        alto_fila=15,
+    )
+    hoja.bajar(30)
+
+
+def _seccion_atendidos(hoja, titulo, atendidos):
+    hoja.titulo(titulo, espacio_siguiente=30)
+    hoja.tabla(
+        [("HORA ATEN.", 50), ("PACIENTE", 110), ("DESTINO", 250), ("T.ESPERA", 330), ("PROFESIONAL", 400)],
+        _filas_atendidos(atendidos),
+        tamano=9,
+        alto_fila=12,
+    )
+
+
+def reporte_diario(destino, fecha):
+    """
+    📋 Reporte diario de triage de `fecha` (día local) escrito en `destino`.
+
+    Incluye:
+    - 👩‍⚕️ Profesional que atendió cada paciente
+    - ⏰ Horarios de atención y tiempo de espera
+    - 🏥 Destino de cada paciente (Sala/Alta/UTI/Derivado)
+    - 📈 Estadísticas por profesional y destino
+
+    Sin límite de filas: todas las atenciones del día, en las páginas que hagan falta.
+    """
+    # 📅 Totales y filas por profesional desde los resúmenes (2 consultas)
+    resumen = reportes.resumen_del_dia(fecha)
+
+    hoja = Hoja(destino, _pie())
+
+    # 🏥 HEADER INSTITUCIONAL
+    hoja.texto(50, "🏥 REPORTE DIARIO DE TRIAGE", "Helvetica-Bold", 24)
+    hoja.bajar(30)
+    hoja.texto(50, f"📅 Fecha: {fecha.strftime('%d/%m/%Y')}", tamano=16)
+    hoja.bajar(20)
+    # Sin "generado por": el archivo se sirve a todos los que piden los mismos datos
+    hoja.texto(50, f"⏰ Hora: {timezone.localtime().strftime('%H:%M')}", tamano=16)
+    hoja.bajar(40)
+
+    _secciones_conteos(hoja, resumen.totales)
+    _seccion_profesionales(hoja, resumen.profesionales)
+
+    # 📋 Detalle: una consulta leída en lotes, dibujada fila por fila
+    _seccion_atendidos(hoja, "📋 PACIENTES ATENDIDOS", reportes.atendidos(fecha))
+
+    hoja.cerrar()
+
+
+def _filas_serie(serie):
+    for dia in serie:
+        totales = dia.totales
+        espera = totales.espera_promedio_minutos
+        yield (
+            dia.fecha.strftime('%d/%m/%Y'),
+            str(totales.evaluaciones),
+            str(totales.rojos),
+            str(totales.amarillos),
+            str(totales.verdes),
+            str(totales.atendidos),
+            str(totales.pase_a_sala),
+            str(totales.altas),
+            str(totales.pase_a_uti),
+            str(totales.derivados),
+            formato_espera(espera) if espera is not None else "-",
+        )
+
+
+def _filas_serie_profesionales(serie):
+    for dia in serie:
+        fila = dia.fila
+        yield (
+            dia.fecha.strftime('%d/%m/%Y'),
+            f"{_icono_tipo(fila.tipo)} {fila.nombre}"[:28],
+            str(fila.evaluaciones),
+            str(fila.rojos),
+            str(fila.amarillos),
+            str(fila.verdes),
+            str(fila.atendidos),
+        )
+
+
+def reporte_periodo(destino, desde, hasta):
+    """
+    📆 Reporte de un período (semana, mes o rango) escrito en `destino`.
+
+    Totales, filas por profesional y la evolución día por día (por nivel,
+    destino y profesional), todo desde los resúmenes: un mes son unas
+    decenas de filas aunque haya miles de atenciones.
+    """
+    resumen = reportes.resumen_periodo(desde, hasta)
+
+    hoja = Hoja(destino, _pie())
+
+    # 🏥 HEADER INSTITUCIONAL
+    hoja.texto(50, "🏥 REPORTE DE TRIAGE POR PERÍODO", "Helvetica-Bold", 24)
+    hoja.bajar(30)
+    hoja.texto(50, f"📅 Del {desde.strftime('%d/%m/%Y')} al {hasta.strftime('%d/%m/%Y')} ({(hasta - desde).days + 1} días)", tamano=16)
+    hoja.bajar(20)
+    # Sin "generado por": el archivo se sirve a todos los que piden los mismos datos
+    hoja.texto(50, f"⏰ Hora: {timezone.localtime().strftime('%d/%m/%Y %H:%M')}", tamano=16)
+    hoja.bajar(40)
+
+    _secciones_conteos(hoja, resumen.totales)
+    _seccion_profesionales(hoja, resumen.profesionales)
+
+    # 📈 Evolución por día: nivel de urgencia, destinos y espera promedio
+    hoja.titulo("📈 EVOLUCIÓN DIARIA", espacio_siguiente=30)
+    hoja.tabla(
+        [("FECHA", 50), ("EVAL.", 115), ("ROJOS", 155), ("AMAR.", 195), ("VERDES", 235), ("ATEND.", 280),
+         ("SALA", 325), ("ALTAS", 360), ("UTI", 400), ("DERIV.", 430), ("ESPERA", 475)],
+        _filas_serie(reportes.serie_diaria(desde, hasta)),
+        tamano=8,
+        alto_fila=12,
+    )
+    hoja.bajar(30)
+
+    # 👩‍⚕️ Evolución por profesional (solo los días con actividad)
+    hoja.titulo("👩‍⚕️ ACTIVIDAD DIARIA POR PROFESIONAL", espacio_siguiente=30)
+    hoja.tabla(
+        [("FECHA", 50), ("PROFESIONAL", 115), ("EVAL.", 285), ("ROJOS", 325), ("AMAR.", 365), ("VERDES", 405), ("ATEND.", 450)],
+        _filas_serie_profesionales(reportes.serie_profesionales(desde, hasta)),
+        tamano=8,
+        alto_fila=12,
+    )
+
+    hoja.cerrar()
@@ -0,0 +1,219 @@
+"""
+📋 Datos de reportes: resumen de un día (o período) y detalle de atendidos.
+
+Un solo servicio para el PDF, el dashboard y las exportaciones. Los conteos
+salen de los resúmenes (resumenes.py) con una consulta de agregación por
+tabla: ResumenDiario para los totales y ResumenProfesional agrupado por
+profesional. El detalle de pacientes atendidos se recorre en lotes con
+`iterator()`, sin cargar el día entero en memoria.
+
+Los reportes de períodos (semana, mes, rango) usan solo los resúmenes:
+series por día y por profesional, una fila por día sin importar el volumen.
+"""
+import hashlib
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db.models import Count, Max, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.patients.models import Paciente
+
+from .models import ResumenDiario, ResumenProfesional
+from .resumenes import DESTINOS, minutos_espera, rango_dia
+
+# Campos sumables de los resúmenes (todos menos la identificación de la fila)
+CAMPOS = [
+    campo.name for campo in ResumenDiario._meta.concrete_fields
+    if campo.name not in ('id', 'fecha')
+]
+
+# Filas por lote al recorrer el detalle de atendidos
+TAMANO_LOTE = 500
+
+
+class Totales(namedtuple('Totales', CAMPOS)):
+    """Conteos del período (mismos campos que ResumenDiario)."""
+
+    __slots__ = ()
+
+    @property
+    def espera_promedio_minutos(self):
+        """Espera promedio de los atendidos del período (None si no hubo)."""
+        if not self.atendidos:
+            return None
+        return round(self.espera_total_minutos / self.atendidos)
+
+
+FilaProfesional = namedtuple(
+    'FilaProfesional',
+    ['profesional_id', 'nombre', 'tipo'] + CAMPOS,
+)
+
+Atendido = namedtuple(
+    'Atendido',
+    'paciente_id nombre_completo fecha_ingreso fecha_atencion destino minutos_espera profesional',
+)
+
+ResumenPeriodo = namedtuple('ResumenPeriodo', 'desde hasta totales profesionales')
+
+
+def _sumas():
+    """Sum de cada campo con alias propio (el ORM no permite repetir el nombre del campo)."""
+    return {f'suma_{campo}': Coalesce(Sum(campo), Value(0)) for campo in CAMPOS}
+
+
+def totales(desde, hasta=None):
+    """Totales de [desde, hasta] (fechas locales) en una consulta."""
+    sumas = ResumenDiario.objects.filter(
+        fecha__gte=desde, fecha__lte=hasta or desde
+    ).aggregate(**_sumas())
+    return Totales(*(sumas[f'suma_{campo}'] for campo in CAMPOS))
+
+
+def por_profesional(desde, hasta=None):
+    """Una fila por profesional con evaluaciones o atenciones en el período (una consulta)."""
+    filas = ResumenProfesional.objects.filter(
+        fecha__gte=desde, fecha__lte=hasta or desde
+    ).values(
+        'profesional_id', 'profesional__tipo',
+        'profesional__user__first_name', 'profesional__user__last_name',
+    ).annotate(**_sumas()).order_by('-suma_evaluaciones', '-suma_atendidos', 'profesional_id')
+
+    return tuple(
+        FilaProfesional(
+            fila['profesional_id'],
+            f"{fila['profesional__user__first_name']} {fila['profesional__user__last_name']}".strip(),
+            fila['profesional__tipo'],
+            *(fila[f'suma_{campo}'] for campo in CAMPOS),
+        )
+        for fila in filas
+    )
+
+
+def resumen_periodo(desde, hasta=None):
+    """Totales y filas por profesional de [desde, hasta] (2 consultas)."""
+    hasta = hasta or desde
+    return ResumenPeriodo(desde, hasta, totales(desde, hasta), por_profesional(desde, hasta))
+
+
+def resumen_del_dia(fecha=None):
+    """Resumen de un día local (por defecto hoy)."""
+    return resumen_periodo(fecha or timezone.localdate())
+
+
+def atendidos(desde, hasta=None, limite=None):
+    """
+    Pacientes atendidos en [desde, hasta], del más reciente al más antiguo.
+
+    Generador: una consulta leída en lotes de TAMANO_LOTE filas.
+    """
+    inicio = rango_dia(desde)[0]
+    fin = rango_dia(hasta or desde)[1]
+    pacientes = Paciente.objects.filter(
+        fecha_atencion__gte=inicio,
+        fecha_atencion__lt=fin,
+        estado_atencion__in=DESTINOS,
+    ).select_related('profesional_atencion__user').only(
+        'id', 'nombre', 'apellido', 'dni',
+        'fecha_ingreso', 'fecha_atencion', 'estado_atencion',
+        'profesional_atencion__tipo',
+        'profesional_atencion__user__first_name', 'profesional_atencion__user__last_name',
+    ).order_by('-fecha_atencion', '-id')
+    if limite is not None:
+        pacientes = pacientes[:limite]
+
+    for paciente in pacientes.iterator(chunk_size=TAMANO_LOTE):
+        profesional = paciente.profesional_atencion
+        yield Atendido(
+            paciente_id=paciente.id,
+            nombre_completo=paciente.nombre_completo,
+            fecha_ingreso=paciente.fecha_ingreso,
+            fecha_atencion=paciente.fecha_atencion,
+            destino=paciente.estado_atencion,
+            minutos_espera=minutos_espera(paciente.fecha_ingreso, paciente.fecha_atencion),
+            profesional=(
+                f"{profesional.user.first_name} {profesional.user.last_name}".strip()
+                if profesional and profesional.user else ''
+            ),
+        )
+
+
+def huella(desde, hasta=None):
+    """
+    Versión de los datos de un reporte de [desde, hasta]: resúmenes del
+    período más cantidad y última fecha de atención del detalle. Igual
+    huella, mismo reporte.
+
+    Son 3 consultas de agregación (el detalle se resuelve con el índice de
+    fecha_atencion), sin recorrer las filas de atendidos. Una corrección de
+    nombre de un paciente ya atendido no cambia la huella.
+    """
+    inicio = rango_dia(desde)[0]
+    fin = rango_dia(hasta or desde)[1]
+    detalle = Paciente.objects.filter(
+        fecha_atencion__gte=inicio,
+        fecha_atencion__lt=fin,
+        estado_atencion__in=DESTINOS,
+    ).aggregate(cantidad=Count('id'), ultima=Max('fecha_atencion'))
+
+    contenido = hashlib.sha256(repr(resumen_periodo(desde, hasta)).encode())
+    contenido.update(repr((detalle['cantidad'], detalle['ultima'])).encode())
+    return contenido.hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Series por día para reportes de períodos (solo resúmenes, sin tablas crudas)
+# ----------------------------------------------------------------------
+
+SerieDia = namedtuple('SerieDia', 'fecha totales')
+
+SerieProfesional = namedtuple('SerieProfesional', 'fecha fila')
+
+
+def dias(desde, hasta):
+    """Fechas de [desde, hasta], una por día."""
+    return [desde + timedelta(days=numero) for numero in range((hasta - desde).days + 1)]
+
+
+def serie_diaria(desde, hasta):
+    """Totales de cada día de [desde, hasta], con ceros en los días sin datos (una consulta)."""
+    filas = {
+        fila['fecha']: fila
+        for fila in ResumenDiario.objects.filter(
+            fecha__gte=desde, fecha__lte=hasta
+        ).values('fecha', *CAMPOS)
+    }
+    vacio = Totales(*(0 for _ in CAMPOS))
+    return tuple(
+        SerieDia(fecha, Totales(*(filas[fecha][campo] for campo in CAMPOS)) if fecha in filas else vacio)
+        for fecha in dias(desde, hasta)
+    )
+
+
+def serie_profesionales(desde, hasta):
+    """Fila de cada profesional en cada día con actividad de [desde, hasta] (una consulta)."""
+    filas = ResumenProfesional.objects.filter(
+        fecha__gte=desde, fecha__lte=hasta
+    ).values(
+        'fecha', 'profesional_id', 'profesional__tipo',
+        'profesional__user__first_name', 'profesional__user__last_name', *CAMPOS,
+    ).order_by('fecha', 'profesional__user__last_name', 'profesional__user__first_name', 'profesional_id')
+
+    return tuple(
+        SerieProfesional(fila['fecha'], FilaProfesional(
+            fila['profesional_id'],
+            f"{fila['profesional__user__first_name']} {fila['profesional__user__last_name']}".strip(),
+            fila['profesional__tipo'],
+            *(fila[campo] for campo in CAMPOS),
+        ))
+        for fila in filas
+    )
+
+
+def huella_series(desde, hasta):
+    """Como huella() pero solo de los resúmenes: reportes de períodos sin detalle de pacientes."""
+    contenido = hashlib.sha256(repr(serie_diaria(desde, hasta)).encode())
+    contenido.update(repr(serie_profesionales(desde, hasta)).encode())
+    return contenido.hexdigest()
@@ -0,0 +1,247 @@
+"""
+📅 Resúmenes diarios, horarios y por profesional para reportes.
+
+Cada ingreso, triage y atención suma en ResumenDiario, ResumenHorario y
+ResumenProfesional (fecha y hora local del hospital) en la misma
+transacción. Los cambios cuyo estado anterior no se conoce (ediciones en el
+admin, borrados) recalculan el día completo desde las tablas crudas, con
+rangos sobre columnas indexadas en lugar de `__date`.
+
+Para reconstruir la historia: python manage.py reconstruir_resumenes
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.patients.models import Paciente
+
+from .models import ResumenDiario, ResumenHorario, ResumenProfesional, SignosVitales
+
+CAMPO_NIVEL = {
+    'ROJO': 'rojos',
+    'AMARILLO': 'amarillos',
+    'VERDE': 'verdes',
+}
+
+CAMPO_DESTINO = {
+    'PASE_A_SALA': 'pase_a_sala',
+    'ALTA': 'altas',
+    'PASE_A_UTI': 'pase_a_uti',
+    'DERIVADO': 'derivados',
+}
+
+# Estados finales: el paciente ya fue atendido y tiene fecha de atención
+DESTINOS = list(CAMPO_DESTINO)
+
+# Límites (minutos) del histograma de espera: <15, <30, <60, <120 y el resto
+LIMITES_ESPERA = (15, 30, 60, 120)
+
+
+def fecha_y_hora_local(momento):
+    """(fecha, hora) en la zona horaria del hospital."""
+    local = timezone.localtime(momento)
+    return local.date(), local.hour
+
+
+def rango_dia(fecha):
+    """[inicio, fin) del día local `fecha`: filtra por rango y usa el índice de la columna."""
+    inicio = timezone.make_aware(datetime.combine(fecha, time.min))
+    fin = timezone.make_aware(datetime.combine(fecha + timedelta(days=1), time.min))
+    return inicio, fin
+
+
+def minutos_espera(fecha_ingreso, fecha_atencion):
+    """Minutos enteros entre el ingreso y la atención (nunca negativo)."""
+    return max(0, int((fecha_atencion - fecha_ingreso).total_seconds() // 60))
+
+
+def campo_espera(minutos):
+    """Campo del histograma donde cae una espera de `minutos`."""
+    for limite in LIMITES_ESPERA:
+        if minutos < limite:
+            return f'espera_hasta_{limite}'
+    return f'espera_mas_{LIMITES_ESPERA[-1]}'
+
+
+# ----------------------------------------------------------------------
+# Acumulación: {(fecha, hora, profesional_id): Counter de campos}
+#   (fecha, None, None) -> ResumenDiario
+#   (fecha, hora, None) -> ResumenHorario
+#   (fecha, None, id)   -> ResumenProfesional
+# ----------------------------------------------------------------------
+
+def _sumar(acumulado, momento, profesional_id, **campos):
+    fecha, hora = fecha_y_hora_local(momento)
+    acumulado[(fecha, None, None)].update(campos)
+    acumulado[(fecha, hora, None)].update(campos)
+    if profesional_id:
+        acumulado[(fecha, None, profesional_id)].update(campos)
+
+
+def _sumar_ingreso(acumulado, fecha_ingreso):
+    _sumar(acumulado, fecha_ingreso, None, ingresos=1)
+
+
+def _sumar_evaluacion(acumulado, fecha_hora, nivel_urgencia, profesional_id):
+    campos = {'evaluaciones': 1}
+    if nivel_urgencia in CAMPO_NIVEL:
+        campos[CAMPO_NIVEL[nivel_urgencia]] = 1
+    _sumar(acumulado, fecha_hora, profesional_id, **campos)
+
+
+def _sumar_atencion(acumulado, fecha_ingreso, fecha_atencion, estado, profesional_id):
+    minutos = minutos_espera(fecha_ingreso, fecha_atencion)
+    _sumar(acumulado, fecha_atencion, profesional_id, **{
+        'atendidos': 1,
+        CAMPO_DESTINO[estado]: 1,
+        'espera_total_minutos': minutos,
+        campo_espera(minutos): 1,
+    })
+
+
+def _fila(clave):
+    """(modelo, campos que identifican la fila) para una clave del acumulado."""
+    fecha, hora, profesional_id = clave
+    if profesional_id:
+        return ResumenProfesional, {'fecha': fecha, 'profesional_id': profesional_id}
+    if hora is not None:
+        return ResumenHorario, {'fecha': fecha, 'hora': hora}
+    return ResumenDiario, {'fecha': fecha}
+
+
+def _aplicar(acumulado):
+    """Suma el acumulado sobre las filas existentes (las crea en cero si faltan)."""
+    if not acumulado:
+        return
+
+    nuevas = defaultdict(list)
+    for clave in acumulado:
+        modelo, identificacion = _fila(clave)
+        nuevas[modelo].append(modelo(**identificacion))
+
+    with transaction.atomic(using=router.db_for_write(ResumenDiario)):
+        for modelo, filas in nuevas.items():
+            modelo.objects.bulk_create(filas, ignore_conflicts=True)
+        for clave, campos in acumulado.items():
+            modelo, identificacion = _fila(clave)
+            modelo.objects.filter(**identificacion).update(
+                **{campo: F(campo) + valor for campo, valor in campos.items()}
+            )
+
+
+def _crear(acumulado):
+    """Inserta el acumulado como filas nuevas (días ya borrados)."""
+    filas = defaultdict(list)
+    for clave, campos in acumulado.items():
+        modelo, identificacion = _fila(clave)
+        filas[modelo].append(modelo(**identificacion, **campos))
+    for modelo, nuevas in filas.items():
+        modelo.objects.bulk_create(nuevas)
+
+
+# ----------------------------------------------------------------------
+# Registro incremental (llamar dentro de la transacción del cambio)
+# ----------------------------------------------------------------------
+
+def registrar_pacientes_nuevos(pacientes):
+    """Suma el ingreso de pacientes recién creados (y la atención, si ya vienen atendidos)."""
+    acumulado = defaultdict(Counter)
+    for paciente in pacientes:
+        _sumar_ingreso(acumulado, paciente.fecha_ingreso)
+        if paciente.estado_atencion in DESTINOS and paciente.fecha_atencion:
+            _sumar_atencion(
+                acumulado, paciente.fecha_ingreso, paciente.fecha_atencion,
+                paciente.estado_atencion, paciente.profesional_atencion_id,
+            )
+    _aplicar(acumulado)
+
+
+def registrar_evaluaciones(registros):
+    """Suma triages recién creados."""
+    acumulado = defaultdict(Counter)
+    for signos in registros:
+        _sumar_evaluacion(acumulado, signos.fecha_hora, signos.nivel_urgencia, signos.profesional_id)
+    _aplicar(acumulado)
+
+
+def registrar_atencion(paciente, atencion_anterior=None):
+    """
+    Suma la atención de un paciente recién marcado con destino.
+
+    Si ya estaba atendido (`atencion_anterior`), su destino anterior se
+    desconoce en los resúmenes: se recalculan los días involucrados.
+    """
+    if atencion_anterior is not None:
+        recalcular_dias([
+            fecha_y_hora_local(atencion_anterior)[0],
+            fecha_y_hora_local(paciente.fecha_atencion)[0],
+        ])
+        return
+
+    acumulado = defaultdict(Counter)
+    _sumar_atencion(
+        acumulado, paciente.fecha_ingreso, paciente.fecha_atencion,
+        paciente.estado_atencion, paciente.profesional_atencion_id,
+    )
+    _aplicar(acumulado)
+
+
+def dias_del_paciente(paciente):
+    """Días locales cuyos resúmenes dependen del paciente (ingreso y atención)."""
+    momentos = [paciente.fecha_ingreso, paciente.fecha_atencion]
+    return {fecha_y_hora_local(momento)[0] for momento in momentos if momento}
+
+
+# ----------------------------------------------------------------------
+# Recálculo desde las tablas crudas
+# ----------------------------------------------------------------------
+
+def _acumular_dia(fecha):
+    """Acumulado completo de un día leyendo solo sus filas (3 consultas por rango)."""
+    inicio, fin = rango_dia(fecha)
+    acumulado = defaultdict(Counter)
+
+    ingresos = Paciente.objects.filter(
+        fecha_ingreso__gte=inicio, fecha_ingreso__lt=fin
+    ).values_list('fecha_ingreso', flat=True)
+    for fecha_ingreso in ingresos.iterator():
+        _sumar_ingreso(acumulado, fecha_ingreso)
+
+    evaluaciones = SignosVitales.objects.filter(
+        fecha_hora__gte=inicio, fecha_hora__lt=fin
+    ).values_list('fecha_hora', 'nivel_urgencia', 'profesional_id')
+    for fila in evaluaciones.iterator():
+        _sumar_evaluacion(acumulado, *fila)
+
+    atenciones = Paciente.objects.filter(
+        fecha_atencion__gte=inicio, fecha_atencion__lt=fin, estado_atencion__in=DESTINOS
+    ).values_list('fecha_ingreso', 'fecha_atencion', 'estado_atencion', 'profesional_atencion_id')
+    for fila in atenciones.iterator():
+        _sumar_atencion(acumulado, *fila)
+
+    return acumulado
+
+
+def recalcular_dias(fechas):
+    """Reemplaza los resúmenes de cada fecha por el recálculo desde las tablas crudas."""
+    for fecha in sorted(set(fechas)):
+        acumulado = _acumular_dia(fecha)
+        with transaction.atomic(using=router.db_for_write(ResumenDiario)):
+            for modelo in (ResumenDiario, ResumenHorario, ResumenProfesional):
+                modelo.objects.filter(fecha=fecha).delete()
+            _crear(acumulado)
+
+
+def primer_dia_con_datos():
+    """Fecha local del primer ingreso o triage registrado (None si no hay datos)."""
+    momentos = [
+        Paciente.objects.order_by('fecha_ingreso').values_list('fecha_ingreso', flat=True).first(),
+        SignosVitales.objects.order_by('fecha_hora').values_list('fecha_hora', flat=True).first(),
+    ]
+    momentos = [momento for momento in momentos if momento]
+    if not momentos:
+        return None
+    return fecha_y_hora_local(min(momentos))[0]
@@ -5,13 +5,16 @@ Se ejecutan automáticamente sin intervención del usuario.
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.core.cache import cache
-from django.db import connection
+from django.db import connection, router, transaction
 from django.utils import timezone
 from datetime import timedelta
 import threading
 import logging
 
 from .models import SignosVitales, Profesional
+from . import eventos, resumenes, sincronizacion, trabajos
+from .contadores import ajustar_contadores, reconciliar_contadores
+from .cola import cola_espera
 from apps.patients.models import Paciente
 
 logger = logging.getLogger(__name__)
@@ -20,12 +23,21 @@ logger = logging.getLogger(__name__)
 OPERATIONS_COUNTER = 'triage_operations_count'
 LAST_OPTIMIZATION = 'triage_last_optimization'
 
+# Mantenimiento en background: reconciliar contadores y el resumen del día
+# cada 15 minutos; limpiar datos antiguos y reportes generados cada 6 horas
+INTERVALO_RECONCILIACION = 15 * 60
+INTERVALO_LIMPIEZA = 6 * 3600
 
-def increment_operations():
-    """Incrementa el contador de operaciones."""
-    current = cache.get(OPERATIONS_COUNTER, 0)
-    cache.set(OPERATIONS_COUNTER, current + 1, timeout=3600)  # 1 hora
-    return current + 1
+
+def increment_operations(cantidad=1):
+    """Incrementa el contador de operaciones (atómico entre procesos)."""
+    try:
+        return cache.incr(OPERATIONS_COUNTER, cantidad)
+    except ValueError:
+        # Primera operación de la hora: crear el contador
+        if cache.add(OPERATIONS_COUNTER, cantidad, timeout=3600):  # 1 hora
+            return cantidad
+        return cache.incr(OPERATIONS_COUNTER, cantidad)
 
 
 def should_optimize():
@@ -63,43 +75,102 @@ def auto_optimize_background():
         logger.warning(f"Error en auto-optimización: {e}")
 
 
+def _optimizar_si_corresponde():
+    """Lanza la auto-optimización en background si se alcanzó el umbral."""
+    # Auto-optimización inteligente cada 100 triages
+    if should_optimize():
+        # Ejecutar en thread separado para no bloquear
+        thread = threading.Thread(target=auto_optimize_background)
+        thread.daemon = True
+        thread.start()
+
+
+def actualizar_cola(paciente_ids):
+    """
+    Reubica a los pacientes en el índice de la cola cuando se confirma la
+    transacción; eso pasa el espacio PACIENTES a una nueva generación y
+    publica los cambios para los dashboards conectados (SSE).
+    """
+    paciente_ids = list(paciente_ids)
+    transaction.on_commit(
+        lambda: eventos.publicar_cambios(cola_espera.actualizar(paciente_ids)),
+        using=router.db_for_write(Paciente),
+    )
+
+
 @receiver(post_save, sender=SignosVitales)
 def optimize_after_triage(sender, instance, created, **kwargs):
     """Optimización automática después de crear triage."""
+    sincronizacion.registrar_cambios([instance], alta=created)
+    actualizar_cola([instance.paciente_id])
     if created:
         count = increment_operations()
-        
-        # Auto-optimización inteligente cada 100 triages
-        if should_optimize():
-            # Ejecutar en thread separado para no bloquear
-            thread = threading.Thread(target=auto_optimize_background)
-            thread.daemon = True
-            thread.start()
+        _optimizar_si_corresponde()
+
+
+def after_bulk_triage(pacientes, registros):
+    """
+    Equivalente agregado de los receivers post_save para ingresos por lote.
+    
+    bulk_create no dispara post_save: se hace una sola invalidación de cache,
+    un solo ajuste de contadores y resúmenes y un solo incremento del
+    contador de operaciones para todo el lote. Llamar dentro de la
+    transacción del lote.
+    """
+    cache.delete_many([f'patient_{paciente.id}' for paciente in pacientes])
+    sincronizacion.registrar_cambios(pacientes, alta=True)
+    sincronizacion.registrar_cambios(registros, alta=True)
+    ajustar_contadores(paciente.id for paciente in pacientes)
+    resumenes.registrar_pacientes_nuevos(pacientes)
+    resumenes.registrar_evaluaciones(registros)
+    actualizar_cola(paciente.id for paciente in pacientes)
+    
+    increment_operations(len(pacientes))
+    _optimizar_si_corresponde()
 
 
 @receiver(post_save, sender=Paciente)
-def cache_invalidation_patient(sender, instance, **kwargs):
+def cache_invalidation_patient(sender, instance, created, **kwargs):
     """Invalidar cache automáticamente cuando cambia un paciente."""
-    # Invalidar caches específicos para que el dashboard se actualice
-    cache_keys = [
-        'dashboard_stats',
-        'patients_waiting',
-        f'patient_{instance.id}',
-    ]
-    cache.delete_many(cache_keys)
+    # La cola pasa a una nueva generación: el dashboard se actualiza solo
+    cache.delete(f'patient_{instance.id}')
+    sincronizacion.registrar_cambios([instance], alta=created)
+    ajustar_contadores([instance.id])
+    actualizar_cola([instance.id])
+    
+    # Resúmenes: un ingreso nuevo suma; una edición recalcula sus días
+    if created:
+        resumenes.registrar_pacientes_nuevos([instance])
+    else:
+        resumenes.recalcular_dias(resumenes.dias_del_paciente(instance))
+
+
+@receiver(post_delete, sender=SignosVitales)
+def repoint_after_triage_delete(sender, instance, **kwargs):
+    """Si se borró el último triage de un paciente, apuntar al anterior."""
+    sincronizacion.registrar_bajas([instance])
+    # El FK ultimo_triage (SET_NULL) ya quedó en NULL al borrar el registro
+    paciente = Paciente.objects.filter(
+        id=instance.paciente_id, ultimo_triage__isnull=True
+    ).first()
+    if paciente:
+        paciente.recalcular_ultimo_triage()
+    ajustar_contadores([instance.paciente_id])
+    actualizar_cola([instance.paciente_id])
+    resumenes.recalcular_dias([resumenes.fecha_y_hora_local(instance.fecha_hora)[0]])
 
 
 @receiver(post_delete, sender=Paciente)
 def cleanup_after_patient_delete(sender, instance, **kwargs):
     """Limpieza automática después de eliminar paciente."""
+    sincronizacion.registrar_bajas([instance])
     increment_operations()
     
     # Invalidar caches relacionados
-    cache.delete_many([
-        'dashboard_stats',
-        'patients_waiting',
-        f'patient_{instance.id}',
-    ])
+    cache.delete(f'patient_{instance.id}')
+    ajustar_contadores([instance.id])
+    actualizar_cola([instance.id])
+    resumenes.recalcular_dias(resumenes.dias_del_paciente(instance))
 
 
 # Signal para limpieza automática de datos antiguos
@@ -160,11 +231,19 @@ class AutoMaintenanceThread(threading.Thread):
         
     def run(self):
         import time
+        ultima_limpieza = time.monotonic()
         while True:
             try:
-                # Ejecutar cada 6 horas
-                time.sleep(6 * 3600)
-                auto_cleanup_old_data()
+                time.sleep(INTERVALO_RECONCILIACION)
+                # Corrige desvíos y saca a los que superaron la ventana de 24 h
+                reconciliar_contadores()
+                # Resumen del día en curso recalculado desde las tablas crudas
+                resumenes.recalcular_dias([timezone.localdate()])
+                
+                if time.monotonic() - ultima_limpieza >= INTERVALO_LIMPIEZA:
+                    ultima_limpieza = time.monotonic()
+                    auto_cleanup_old_data()
+                    trabajos.limpiar_trabajos()
             except Exception as e:
                 logger.error(f"Error en thread de mantenimiento: {e}")
                 time.sleep(3600)  # Esperar 1 hora antes de reintentar
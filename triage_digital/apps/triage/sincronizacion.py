@@ -0,0 +1,776 @@
+"""
+🔄 Sincronización incremental entre bases (estación offline ↔ central).
+
+Diario: cada alta o modificación de Paciente y SignosVitales deja una
+entrada en CambioSincronizacion, en la misma base y la misma transacción
+que el cambio (save() de los dos modelos es atómico con sus signals; los
+update() y bulk_create anotan dentro de su transacción), con el estado
+completo de la fila; cada borrado deja una baja con el uid. Las filas se
+identifican por su uid global y las referencias viajan como uid del
+paciente y DNI del profesional: los ids autoincrementales se repiten entre
+bases.
+
+Envío: sincronizar(origen, destino) lee del origen las entradas
+posteriores al punto que el destino tiene confirmado para ese nodo y las
+aplica en lotes. Cada lote se aplica en una transacción del destino junto
+con el nuevo punto: si se corta a mitad, la próxima vez sigue desde el
+último lote confirmado, y aplicar dos veces la misma entrada no cambia nada
+(upsert por uid).
+
+Colisiones: el mismo DNI registrado en dos bases, un paciente atendido en
+las dos o datos editados de los dos lados se resuelven con las reglas
+deterministas de fusion.py y quedan en ConflictoSincronizacion; el lote
+sigue adelante. Un triage cuyo paciente o profesional (por DNI) no está en
+el destino tampoco lo frena: queda en TriageEnEspera, con su conflicto
+anotado, y se reintenta al final de cada sincronización.
+
+Bajas: el destino borra la fila con ese uid (un paciente, con sus triages
+y alias). Un uid que en el destino quedó como alias de un paciente fusionado
+no borra nada: ese paciente sigue existiendo por la otra base.
+
+Las filas se aplican sin save() ni signals. El destino anota lo recibido en
+su propio diario con el nodo que lo originó: la base central reenvía a
+cada estación los cambios de las demás, pero nunca le devuelve los suyos.
+
+Uso: python manage.py sincronizar --origen offline --destino default
+"""
+import logging
+from collections import namedtuple
+
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+from django.db.models import Max, Q
+
+from apps.patients.models import Paciente
+
+from . import fusion, resumenes
+from .contadores import ajustar_contadores
+from .models import (
+    AliasPaciente, CambioSincronizacion, ConflictoSincronizacion, NodoSincronizacion, Profesional,
+    PuntoSincronizacion, SignosVitales, TriageEnEspera,
+)
+
+logger = logging.getLogger(__name__)
+
+# Entradas del diario por lote (una transacción del destino por lote)
+TAMANO_LOTE = 500
+
+# Campos que viajan tal cual; los desnormalizados (ultimo_*) se recalculan en el destino
+CAMPOS_PACIENTE = (
+    'nombre', 'apellido', 'dni', 'edad', 'motivo_consulta',
+    'fecha_ingreso', 'estado_atencion', 'fecha_atencion', 'activo',
+)
+
+CAMPOS_SIGNOS = (
+    'fecha_hora', 'frecuencia_respiratoria', 'saturacion_oxigeno', 'tension_sistolica',
+    'frecuencia_cardiaca', 'nivel_conciencia', 'temperatura',
+    'news_score', 'nivel_urgencia', 'tiempo_atencion_max',
+)
+
+MODELOS = {
+    Paciente: 'paciente',
+    SignosVitales: 'signos_vitales',
+}
+
+Resultado = namedtuple(
+    'Resultado', 'lotes entradas pacientes signos_vitales conflictos ultima_secuencia triages_en_espera'
+)
+
+
+class ErrorSincronizacion(Exception):
+    """Un lote no se pudo aplicar (el punto confirmado queda en el lote anterior)."""
+
+
+# ----------------------------------------------------------------------
+# Diario
+# ----------------------------------------------------------------------
+
+def registrar_cambios(instancias, alta=False):
+    """
+    Anota en el diario el estado actual de `instancias` (todas del mismo modelo).
+
+    Llamar dentro de la transacción que las guarda; escribe en la base de
+    la que salen las instancias (una consulta, más una para los DNI de los
+    profesionales si hace falta).
+    """
+    instancias = list(instancias)
+    if not instancias:
+        return []
+
+    using = instancias[0]._state.db or DEFAULT_DB_ALIAS
+    modelo = MODELOS[type(instancias[0])]
+    serializar = _datos_paciente if modelo == 'paciente' else _datos_signos
+    dnis = _dnis_profesionales(instancias, using)
+
+    return CambioSincronizacion.objects.using(using).bulk_create([
+        CambioSincronizacion(
+            modelo=modelo,
+            uid=instancia.uid,
+            operacion='ALTA' if alta else 'MODIFICACION',
+            datos=serializar(instancia, dnis),
+        )
+        for instancia in instancias
+    ])
+
+
+def registrar_bajas(instancias):
+    """
+    Anota en el diario el borrado de `instancias` (todas del mismo modelo).
+
+    Llamar desde post_delete, dentro de la transacción del borrado. Solo
+    viaja el uid.
+    """
+    instancias = list(instancias)
+    if not instancias:
+        return []
+
+    using = instancias[0]._state.db or DEFAULT_DB_ALIAS
+    modelo = MODELOS[type(instancias[0])]
+    return CambioSincronizacion.objects.using(using).bulk_create([
+        CambioSincronizacion(modelo=modelo, uid=instancia.uid, operacion='BAJA', datos={})
+        for instancia in instancias
+    ])
+
+
+def registrar_existentes(using=DEFAULT_DB_ALIAS, tamano_lote=TAMANO_LOTE):
+    """
+    Anota como altas las filas que todavía no tienen ninguna entrada en el
+    diario (datos previos a la sincronización). Devuelve cuántas anotó.
+    """
+    total = 0
+    for modelo, nombre in MODELOS.items():
+        anotados = set(
+            CambioSincronizacion.objects.using(using).filter(modelo=nombre).values_list('uid', flat=True)
+        )
+        consulta = modelo.objects.using(using).order_by('id')
+        if modelo is SignosVitales:
+            consulta = consulta.select_related('paciente')
+        sin_anotar = []
+        for instancia in consulta.iterator(chunk_size=tamano_lote):
+            if instancia.uid not in anotados:
+                sin_anotar.append(instancia)
+            if len(sin_anotar) >= tamano_lote:
+                total += len(registrar_cambios(sin_anotar, alta=True))
+                sin_anotar = []
+        total += len(registrar_cambios(sin_anotar, alta=True))
+    return total
+
+
+def _dnis_profesionales(instancias, using):
+    """{profesional_id: dni} de los profesionales que referencian las instancias."""
+    ids = {
+        getattr(instancia, 'profesional_id', None) or getattr(instancia, 'profesional_atencion_id', None)
+        for instancia in instancias
+    }
+    ids.discard(None)
+    if not ids:
+        return {}
+    return dict(Profesional.objects.using(using).filter(id__in=ids).values_list('id', 'dni'))
+
+
+def _datos_paciente(paciente, dnis):
+    datos = {campo: getattr(paciente, campo) for campo in CAMPOS_PACIENTE}
+    datos['profesional_atencion'] = dnis.get(paciente.profesional_atencion_id)
+    return datos
+
+
+def _datos_signos(signos, dnis):
+    datos = {campo: getattr(signos, campo) for campo in CAMPOS_SIGNOS}
+    datos['paciente'] = signos.paciente.uid
+    datos['profesional'] = dnis.get(signos.profesional_id)
+    return datos
+
+
+# ----------------------------------------------------------------------
+# Envío
+# ----------------------------------------------------------------------
+
+def punto_confirmado(origen, destino):
+    """Última secuencia del origen que el destino ya aplicó (0 si nunca sincronizaron)."""
+    nodo = NodoSincronizacion.propio(origen)
+    punto = PuntoSincronizacion.objects.using(destino).filter(origen=nodo.uid).first()
+    return punto.ultima_secuencia if punto else 0
+
+
+def _por_enviar(origen, destino, desde):
+    """Entradas del origen posteriores a `desde`, sin las que originó el destino."""
+    return CambioSincronizacion.objects.using(origen).filter(secuencia__gt=desde).exclude(
+        nodo_origen=NodoSincronizacion.propio(destino).uid
+    )
+
+
+def pendientes(origen, destino):
+    """Entradas del diario del origen que el destino todavía no aplicó."""
+    return _por_enviar(origen, destino, punto_confirmado(origen, destino)).count()
+
+
+def sincronizar(origen, destino, tamano_lote=TAMANO_LOTE, max_lotes=None):
+    """
+    Aplica en `destino` las entradas del diario de `origen` posteriores al
+    punto confirmado, en lotes de `tamano_lote`.
+
+    Raises:
+        ErrorSincronizacion: si un lote no se puede aplicar; los anteriores
+        quedan confirmados y la próxima llamada reintenta desde ese lote
+    """
+    if origen == destino:
+        raise ErrorSincronizacion('El origen y el destino son la misma base.')
+
+    nodo = NodoSincronizacion.propio(origen).uid
+    ultima = punto_confirmado(origen, destino)
+    lotes = entradas = pacientes = signos = conflictos = 0
+
+    while max_lotes is None or lotes < max_lotes:
+        lote = list(_por_enviar(origen, destino, ultima)[:tamano_lote])
+        if not lote:
+            break
+        try:
+            aplicados = _aplicar_lote(lote, nodo, destino)
+        except ErrorSincronizacion:
+            raise
+        except Exception as e:
+            raise ErrorSincronizacion(
+                f'Lote #{lote[0].secuencia}-#{lote[-1].secuencia}: {e}'
+            ) from e
+
+        ultima = lote[-1].secuencia
+        lotes += 1
+        entradas += len(lote)
+        pacientes += aplicados[0]
+        signos += aplicados[1]
+        conflictos += aplicados[2]
+        logger.info(f"Sincronización {origen} → {destino}: aplicado hasta #{ultima}")
+
+    aplicados, en_espera = _reintentar_en_espera(destino)
+    signos += aplicados
+    return Resultado(lotes, entradas, pacientes, signos, conflictos, ultima, en_espera)
+
+
+def _aplicar_lote(lote, nodo, destino):
+    """
+    Aplica un lote y confirma su última secuencia en una transacción del destino.
+
+    Returns:
+        tuple: (pacientes, signos vitales aplicados, conflictos anotados)
+    """
+    # Solo importa el último estado de cada fila dentro del lote
+    ultimas = {}
+    for entrada in lote:
+        ultimas[(entrada.modelo, entrada.uid)] = entrada
+    bajas = [entrada for entrada in ultimas.values() if entrada.operacion == 'BAJA']
+    de_pacientes = [
+        entrada for (modelo, _), entrada in ultimas.items()
+        if modelo == 'paciente' and entrada.operacion != 'BAJA'
+    ]
+    # Los triages de un paciente dado de baja en el mismo lote se van con él
+    pacientes_bajas = {str(entrada.uid) for entrada in bajas if entrada.modelo == 'paciente'}
+    de_signos = [
+        entrada for (modelo, _), entrada in ultimas.items()
+        if modelo == 'signos_vitales' and entrada.operacion != 'BAJA'
+        and str(entrada.datos['paciente']) not in pacientes_bajas
+    ]
+
+    with transaction.atomic(using=destino):
+        punto, _ = PuntoSincronizacion.objects.using(destino).select_for_update().get_or_create(origen=nodo)
+        if punto.ultima_secuencia >= lote[-1].secuencia:
+            # Otro proceso ya aplicó este lote
+            return 0, 0, 0
+
+        profesionales = _profesionales_destino(de_pacientes + de_signos, destino)
+        pacientes = _PacientesDelLote(de_pacientes, profesionales, nodo, destino)
+        pacientes.aplicar()
+        afectados, dias = pacientes.guardar()
+        con_triage, dias_signos, aplicados, sin_referencia = _aplicar_signos(
+            de_signos, pacientes.ids(), profesionales, destino
+        )
+        borrados, dias_bajas = _aplicar_bajas(bajas, destino)
+        afectados |= con_triage | borrados
+        _recalcular_ultimo_triage(afectados, destino)
+        # Lo que reemplaza o borra a un triage en espera lo saca de la espera
+        TriageEnEspera.objects.using(destino).filter(
+            Q(uid__in=[entrada.uid for entrada in aplicados + bajas])
+            | Q(datos__paciente__in=sorted(pacientes_bajas))
+        ).delete()
+        en_espera = _poner_en_espera(sin_referencia, nodo, destino)
+
+        punto.ultima_secuencia = lote[-1].secuencia
+        punto.save(using=destino, update_fields=['ultima_secuencia', 'fecha'])
+        # Pacientes antes que sus triages, como en el diario de origen
+        _anotar_recibidos(pacientes.recibidos(), nodo, destino)
+        _anotar_recibidos(aplicados, nodo, destino)
+        _anotar_recibidos(bajas, nodo, destino)
+
+        # Contadores, resúmenes y cola son los de la base que está atendiendo
+        if destino == router.db_for_write(Paciente):
+            _actualizar_derivados(afectados, dias | dias_signos | dias_bajas)
+
+    bajas_pacientes = sum(entrada.modelo == 'paciente' for entrada in bajas)
+    return (
+        len(de_pacientes) + bajas_pacientes,
+        len(aplicados) + len(bajas) - bajas_pacientes,
+        len(pacientes.conflictos) + en_espera,
+    )
+
+
+def _poner_en_espera(entradas, nodo, destino):
+    """
+    Guarda en TriageEnEspera los triages que no se pudieron aplicar, con su
+    motivo. Anota un conflicto la primera vez que cada uno queda en espera.
+
+    Args:
+        entradas: lista de (entrada, motivo)
+
+    Returns:
+        int: conflictos anotados
+    """
+    if not entradas:
+        return 0
+
+    ya_en_espera = set(TriageEnEspera.objects.using(destino).filter(
+        uid__in=[entrada.uid for entrada, _ in entradas]
+    ).values_list('uid', flat=True))
+    TriageEnEspera.objects.using(destino).filter(uid__in=ya_en_espera).delete()
+    TriageEnEspera.objects.using(destino).bulk_create([
+        TriageEnEspera(
+            uid=entrada.uid,
+            operacion=entrada.operacion,
+            datos=entrada.datos,
+            fecha=entrada.fecha,
+            nodo_origen=entrada.nodo_origen or nodo,
+            motivo=motivo,
+        )
+        for entrada, motivo in entradas
+    ])
+
+    conflictos = [
+        ConflictoSincronizacion(
+            tipo='SIN_REFERENCIA',
+            uid=entrada.datos['paciente'],
+            nodo_origen=entrada.nodo_origen or nodo,
+            detalle=f'Triage {entrada.uid}: {motivo}',
+            resolucion='En espera: se aplica cuando estén el paciente y el profesional en esta base.',
+        )
+        for entrada, motivo in entradas
+        if entrada.uid not in ya_en_espera
+    ]
+    ConflictoSincronizacion.objects.using(destino).bulk_create(conflictos)
+    for conflicto in conflictos:
+        logger.warning(f"Sincronización: {conflicto.detalle} (queda en espera)")
+    return len(conflictos)
+
+
+def _reintentar_en_espera(destino):
+    """
+    Aplica los triages en espera cuyo paciente y profesional ya están en el
+    destino; el resto sigue esperando.
+
+    Returns:
+        tuple: (triages aplicados, triages que siguen en espera)
+    """
+    if not TriageEnEspera.objects.using(destino).exists():
+        return 0, 0
+
+    with transaction.atomic(using=destino):
+        entradas = [
+            CambioSincronizacion(
+                modelo='signos_vitales',
+                uid=triage.uid,
+                operacion=triage.operacion,
+                datos=triage.datos,
+                fecha=triage.fecha,
+                nodo_origen=triage.nodo_origen,
+            )
+            for triage in TriageEnEspera.objects.using(destino).select_for_update()
+        ]
+        profesionales = _profesionales_destino(entradas, destino)
+        afectados, dias, aplicados, sin_referencia = _aplicar_signos(entradas, {}, profesionales, destino)
+        if aplicados:
+            TriageEnEspera.objects.using(destino).filter(uid__in=[entrada.uid for entrada in aplicados]).delete()
+            _recalcular_ultimo_triage(afectados, destino)
+            _anotar_recibidos(aplicados, None, destino)
+            if destino == router.db_for_write(Paciente):
+                _actualizar_derivados(afectados, dias)
+
+    return len(aplicados), len(sin_referencia)
+
+
+def _anotar_recibidos(entradas, nodo, destino):
+    """Diario del destino: lo recibido, con el nodo donde se hizo cada cambio."""
+    CambioSincronizacion.objects.using(destino).bulk_create([
+        CambioSincronizacion(
+            modelo=entrada.modelo,
+            uid=entrada.uid,
+            operacion=entrada.operacion,
+            datos=entrada.datos,
+            fecha=entrada.fecha,
+            nodo_origen=entrada.nodo_origen or nodo,
+        )
+        for entrada in entradas
+    ])
+
+
+def _valores(modelo, campos, datos):
+    """Valores de la entrada convertidos al tipo de cada campo (fechas, decimales)."""
+    return {campo: modelo._meta.get_field(campo).to_python(datos[campo]) for campo in campos}
+
+
+def _profesionales_destino(entradas, destino):
+    """{dni: id} en el destino de los profesionales que nombran las entradas."""
+    dnis = {
+        entrada.datos.get('profesional') or entrada.datos.get('profesional_atencion')
+        for entrada in entradas
+    }
+    dnis.discard(None)
+    if not dnis:
+        return {}
+    return dict(Profesional.objects.using(destino).filter(dni__in=dnis).values_list('dni', 'id'))
+
+
+def _dias(*momentos):
+    return {resumenes.fecha_y_hora_local(momento)[0] for momento in momentos if momento}
+
+
+def _valores_de(paciente):
+    """Valores de un paciente en la forma que usan las reglas de fusion."""
+    valores = {campo: getattr(paciente, campo) for campo in CAMPOS_PACIENTE}
+    valores['profesional_atencion_id'] = paciente.profesional_atencion_id
+    return valores
+
+
+def _asignar(paciente, valores):
+    for campo, valor in valores.items():
+        setattr(paciente, campo, valor)
+
+
+class _PacientesDelLote:
+    """
+    Pacientes del destino que toca un lote de entradas.
+
+    Upsert por uid (o por un uid ya fusionado, vía AliasPaciente) con las
+    reglas de fusion.py:
+
+    - Datos generales: gana el cambio más reciente según la fecha del diario.
+    - Atención: el estado nunca retrocede; si las dos bases registraron un
+      destino final, vale el primero registrado y se anota como conflicto.
+    - Un DNI que ya tiene otro paciente: los dos se fusionan en una fila, los
+      triages pasan a la que queda y el uid que sale queda como alias. Lo
+      que siga llegando con ese uid solo completa datos y atención.
+
+    Todo se resuelve en memoria (tres consultas de lectura) y se escribe
+    junto en guardar().
+    """
+
+    def __init__(self, entradas, profesionales, nodo, destino):
+        self.nodo = nodo
+        self.destino = destino
+        self.conflictos = []
+        self.entrantes = []
+        for entrada in entradas:
+            valores = _valores(Paciente, CAMPOS_PACIENTE, entrada.datos)
+            # Si el profesional no tiene cuenta en el destino, la atención queda sin firmar
+            valores['profesional_atencion_id'] = profesionales.get(entrada.datos['profesional_atencion'])
+            self.entrantes.append((entrada, valores))
+
+        uids = [entrada.uid for entrada in entradas]
+        dnis = {valores['dni'] for _, valores in self.entrantes if valores['dni']}
+        alias = dict(AliasPaciente.objects.using(destino).filter(uid__in=uids).values_list('uid', 'paciente_id'))
+        self.filas = {
+            paciente.pk: paciente
+            for paciente in Paciente.objects.using(destino).filter(
+                Q(uid__in=uids) | Q(id__in=alias.values()) | Q(dni__in=dnis)
+            )
+        }
+        self.por_uid = {paciente.uid: paciente for paciente in self.filas.values()}
+        self.por_uid.update({uid: self.filas[paciente_id] for uid, paciente_id in alias.items()})
+        self.por_dni = {paciente.dni: paciente for paciente in self.filas.values() if paciente.dni}
+
+        # Último cambio de cada uid vigente que ya pasó por el diario del destino
+        self.modificado = dict(CambioSincronizacion.objects.using(destino).filter(
+            modelo='paciente', uid__in=[paciente.uid for paciente in self.filas.values()]
+        ).values('uid').annotate(ultima=Max('fecha')).values_list('uid', 'ultima'))
+
+        self.dias = set()
+        for paciente in self.filas.values():
+            self.dias |= _dias(paciente.fecha_ingreso, paciente.fecha_atencion)
+        self.nuevos = []
+        self.absorbidos = {}  # id(fila que sale): fila que queda
+        self.alias = []
+        self.resultado = {}  # uid entrante: fila donde quedó
+
+    def aplicar(self):
+        for entrada, valores in self.entrantes:
+            fila = self._vigente(self.por_uid.get(entrada.uid))
+            if fila is None:
+                fila = Paciente(uid=entrada.uid, **valores)
+                self.nuevos.append(fila)
+                self.por_uid[entrada.uid] = fila
+            elif fila.uid != entrada.uid:
+                self._completar(fila, entrada, valores)
+            else:
+                self._actualizar(fila, entrada, valores)
+
+            otro = self._vigente(self.por_dni.get(fila.dni)) if fila.dni else None
+            if otro is not None and otro is not fila:
+                fila = self._fusionar(fila, otro, entrada)
+            elif fila.dni:
+                self.por_dni[fila.dni] = fila
+            self.resultado[entrada.uid] = fila
+
+    def _vigente(self, fila):
+        """La fila que quedó después de las fusiones del lote."""
+        while fila is not None and id(fila) in self.absorbidos:
+            fila = self.absorbidos[id(fila)]
+        return fila
+
+    def _actualizar(self, fila, entrada, valores):
+        anteriores = _valores_de(fila)
+        atencion, choque = fusion.resolver_atencion(anteriores, valores)
+        if choque:
+            self._conflicto(
+                'ATENCION', fila.uid, entrada,
+                f'Local: {fusion.describir(anteriores)}; recibido: {fusion.describir(valores)}',
+                f'Queda {fusion.describir(atencion)}, el primero registrado',
+            )
+
+        if entrada.fecha >= self.modificado.get(fila.uid, entrada.fecha):
+            nuevos = dict(valores)
+            self.modificado[fila.uid] = entrada.fecha
+        else:
+            # El destino tiene un cambio posterior: conserva sus datos generales
+            nuevos = dict(anteriores)
+        nuevos.update(atencion)
+        nuevos['fecha_ingreso'] = min(anteriores['fecha_ingreso'], valores['fecha_ingreso'])
+
+        if fila.dni and nuevos['dni'] != fila.dni and self.por_dni.get(fila.dni) is fila:
+            del self.por_dni[fila.dni]
+        _asignar(fila, nuevos)
+
+    def _completar(self, fila, entrada, valores):
+        """
+        Cambio de un uid ya fusionado: la fila que quedó conserva sus datos y
+        solo toma los que le falten y la atención, como en la fusión.
+        """
+        anteriores = _valores_de(fila)
+        fusionados, choque = fusion.fusionar(anteriores, valores)
+        if choque:
+            self._conflicto(
+                'ATENCION', fila.uid, entrada,
+                f'Local: {fusion.describir(anteriores)}; recibido para {entrada.uid} (fusionado): '
+                f'{fusion.describir(valores)}',
+                f'Queda {fusion.describir(fusionados)}, el primero registrado',
+            )
+        _asignar(fila, fusionados)
+
+    def _fusionar(self, fila, otro, entrada):
+        """Deja una sola fila para dos pacientes con el mismo DNI y la devuelve."""
+        valores_fila, valores_otro = _valores_de(fila), _valores_de(otro)
+        detalle = f'DNI {fila.dni}: {fila.uid} y {otro.uid}'
+        if fusion.gana_entrante(valores_otro, otro.uid, valores_fila, fila.uid):
+            valores, choque = fusion.fusionar(valores_fila, valores_otro)
+            uid, uid_absorbido = fila.uid, otro.uid
+        else:
+            valores, choque = fusion.fusionar(valores_otro, valores_fila)
+            uid, uid_absorbido = otro.uid, fila.uid
+
+        # Físicamente se conserva la fila que ya está en la base (la de menor id si están las dos)
+        queda, sale = sorted((fila, otro), key=lambda paciente: (paciente.pk is None, paciente.pk or 0))
+        _asignar(queda, valores)
+        queda.uid = uid
+        self.absorbidos[id(sale)] = queda
+        if sale.pk is None:
+            self.nuevos.remove(sale)
+
+        self.alias.append(AliasPaciente(uid=uid_absorbido, paciente=queda))
+        self.por_uid[uid_absorbido] = queda
+        self.por_dni[queda.dni] = queda
+        resolucion = f'Fusionados en {uid}; {uid_absorbido} queda como alias'
+        if choque:
+            resolucion += f'; atendido en las dos bases, queda {fusion.describir(valores)}'
+        self._conflicto('DNI_DUPLICADO', uid, entrada, detalle, resolucion)
+        return queda
+
+    def _conflicto(self, tipo, uid, entrada, detalle, resolucion):
+        logger.warning(f"Sincronización: {tipo} en {uid}: {resolucion}")
+        self.conflictos.append(ConflictoSincronizacion(
+            tipo=tipo,
+            uid=uid,
+            nodo_origen=entrada.nodo_origen or self.nodo,
+            detalle=detalle,
+            resolucion=resolucion,
+        ))
+
+    def guardar(self):
+        """
+        Escribe el resultado del lote.
+
+        Returns:
+            tuple: (ids de pacientes afectados, incluidos los que se fusionaron; días afectados)
+        """
+        destino = self.destino
+        eliminados = [fila for fila in self.filas.values() if id(fila) in self.absorbidos]
+        for sale in eliminados:
+            queda = self._vigente(sale)
+            SignosVitales.objects.using(destino).filter(paciente_id=sale.pk).update(paciente_id=queda.pk)
+            AliasPaciente.objects.using(destino).filter(paciente_id=sale.pk).update(paciente_id=queda.pk)
+        # Sin signals: sus contadores, resúmenes y cola se ajustan con el resto del lote.
+        # Antes de escribir las que quedan, que pueden tomar el uid de una que sale.
+        Paciente.objects.using(destino).filter(pk__in=[sale.pk for sale in eliminados])._raw_delete(destino)
+
+        Paciente.objects.using(destino).bulk_create(self.nuevos)
+        modificados = [fila for fila in self.filas.values() if id(fila) not in self.absorbidos]
+        Paciente.objects.using(destino).bulk_update(
+            modificados, ['uid', *CAMPOS_PACIENTE, 'profesional_atencion_id'], batch_size=TAMANO_LOTE
+        )
+        for alias in self.alias:
+            alias.paciente = self._vigente(alias.paciente)
+        AliasPaciente.objects.using(destino).bulk_create(self.alias)
+        ConflictoSincronizacion.objects.using(destino).bulk_create(self.conflictos)
+
+        for fila in modificados + self.nuevos:
+            self.dias |= _dias(fila.fecha_ingreso, fila.fecha_atencion)
+        afectados = {fila.pk for fila in modificados + self.nuevos} | {sale.pk for sale in eliminados}
+        return afectados, self.dias
+
+    def ids(self):
+        """{uid entrante: id en el destino}, con los uid fusionados."""
+        return {uid: self._vigente(fila).pk for uid, fila in self.por_uid.items()}
+
+    def recibidos(self):
+        """
+        Entradas para el diario del destino con el estado que quedó: si hubo
+        fusión, viajan con el uid y los datos del paciente que sobrevivió.
+        """
+        filas = {uid: self._vigente(fila) for uid, fila in self.resultado.items()}
+        dnis = _dnis_profesionales(filas.values(), self.destino)
+        return [
+            CambioSincronizacion(
+                modelo=entrada.modelo,
+                uid=filas[entrada.uid].uid,
+                operacion=entrada.operacion,
+                datos=_datos_paciente(filas[entrada.uid], dnis),
+                fecha=entrada.fecha,
+                nodo_origen=entrada.nodo_origen,
+            )
+            for entrada, _ in self.entrantes
+        ]
+
+
+def _aplicar_signos(entradas, pacientes, profesionales, destino):
+    """
+    Upsert por uid; `pacientes` es {uid: id} de los pacientes del lote.
+
+    Las entradas cuyo paciente o profesional no está en el destino no se
+    aplican: vuelven con el motivo para ponerlas en espera.
+
+    Returns:
+        tuple: (ids de pacientes con triages aplicados, días afectados,
+        entradas aplicadas, [(entrada sin aplicar, motivo)])
+    """
+    if not entradas:
+        return set(), set(), [], []
+
+    pacientes = dict(pacientes)
+    faltan = {
+        Paciente._meta.get_field('uid').to_python(entrada.datos['paciente']) for entrada in entradas
+    } - pacientes.keys()
+    if faltan:
+        pacientes.update(Paciente.objects.using(destino).filter(uid__in=faltan).values_list('uid', 'id'))
+        pacientes.update(AliasPaciente.objects.using(destino).filter(
+            uid__in=faltan - pacientes.keys()
+        ).values_list('uid', 'paciente_id'))
+    existentes = dict(SignosVitales.objects.using(destino).filter(
+        uid__in=[entrada.uid for entrada in entradas]
+    ).values_list('uid', 'id'))
+
+    nuevos, modificados, dias, afectados = [], [], set(), set()
+    aplicadas, sin_referencia = [], []
+    for entrada in entradas:
+        paciente_uid = Paciente._meta.get_field('uid').to_python(entrada.datos['paciente'])
+        if paciente_uid not in pacientes:
+            sin_referencia.append((entrada, f'el paciente {paciente_uid} no está en el destino'))
+            continue
+        if entrada.datos['profesional'] not in profesionales:
+            sin_referencia.append((
+                entrada, f"el profesional DNI {entrada.datos['profesional']} no tiene cuenta en el destino"
+            ))
+            continue
+        aplicadas.append(entrada)
+
+        valores = _valores(SignosVitales, CAMPOS_SIGNOS, entrada.datos)
+        valores['paciente_id'] = pacientes[paciente_uid]
+        valores['profesional_id'] = profesionales[entrada.datos['profesional']]
+        afectados.add(valores['paciente_id'])
+        dias |= _dias(valores['fecha_hora'])
+        if entrada.uid in existentes:
+            modificados.append(SignosVitales(id=existentes[entrada.uid], uid=entrada.uid, **valores))
+        else:
+            nuevos.append(SignosVitales(uid=entrada.uid, **valores))
+
+    SignosVitales.objects.using(destino).bulk_create(nuevos)
+    SignosVitales.objects.using(destino).bulk_update(
+        modificados, list(CAMPOS_SIGNOS) + ['paciente_id', 'profesional_id'], batch_size=TAMANO_LOTE
+    )
+    return afectados, dias, aplicadas, sin_referencia
+
+
+def _aplicar_bajas(entradas, destino):
+    """
+    Borra las filas dadas de baja, por uid propio (no por alias) y sin signals.
+
+    Returns:
+        tuple: (ids de pacientes afectados, incluidos los borrados; días afectados)
+    """
+    if not entradas:
+        return set(), set()
+
+    uids_pacientes = [entrada.uid for entrada in entradas if entrada.modelo == 'paciente']
+    uids_signos = [entrada.uid for entrada in entradas if entrada.modelo == 'signos_vitales']
+    afectados, dias = set(), set()
+    for paciente_id, fecha_ingreso, fecha_atencion in Paciente.objects.using(destino).filter(
+        uid__in=uids_pacientes
+    ).values_list('id', 'fecha_ingreso', 'fecha_atencion'):
+        afectados.add(paciente_id)
+        dias |= _dias(fecha_ingreso, fecha_atencion)
+    borrados = set(afectados)
+
+    signos = SignosVitales.objects.using(destino).filter(Q(uid__in=uids_signos) | Q(paciente_id__in=borrados))
+    for paciente_id, fecha_hora in signos.values_list('paciente_id', 'fecha_hora'):
+        afectados.add(paciente_id)
+        dias |= _dias(fecha_hora)
+
+    # El puntero ultimo_triage de los que quedan se recalcula antes del commit
+    signos._raw_delete(destino)
+    AliasPaciente.objects.using(destino).filter(paciente_id__in=borrados)._raw_delete(destino)
+    Paciente.objects.using(destino).filter(id__in=borrados)._raw_delete(destino)
+    return afectados, dias
+
+
+def _recalcular_ultimo_triage(paciente_ids, destino):
+    """Puntero al último triage de cada paciente, como Paciente.recalcular_ultimo_triage()."""
+    if not paciente_ids:
+        return
+    ultimos = {}
+    for signos in SignosVitales.objects.using(destino).filter(
+        paciente_id__in=paciente_ids
+    ).order_by('paciente_id', '-fecha_hora', '-id').only(
+        'id', 'paciente_id', 'fecha_hora', 'nivel_urgencia', 'news_score'
+    ):
+        ultimos.setdefault(signos.paciente_id, signos)
+
+    pacientes = []
+    for paciente_id in paciente_ids:
+        # Sin triages (se borraron): los campos quedan vacíos
+        paciente = Paciente(id=paciente_id)
+        paciente.asignar_ultimo_triage(ultimos.get(paciente_id))
+        pacientes.append(paciente)
+    Paciente.objects.using(destino).bulk_update(
+        pacientes, list(Paciente._datos_ultimo_triage(None)), batch_size=TAMANO_LOTE
+    )
+
+
+def _actualizar_derivados(paciente_ids, dias):
+    """Contadores, resúmenes y cola de esta base, como lo harían los signals."""
+    from . import signals  # Import lazy: signals importa este módulo
+
+    ajustar_contadores(paciente_ids)
+    resumenes.recalcular_dias(dias)
+    signals.actualizar_cola(paciente_ids)
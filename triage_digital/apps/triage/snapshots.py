@@ -0,0 +1,58 @@
+"""
+📸 Datos de los fragmentos del dashboard como tuplas inmutables.
+
+Valores simples (no instancias del ORM): son chicos, se renderizan sin
+consultas extra y ningún request puede modificarlos.
+"""
+from collections import namedtuple
+
+from apps.patients.models import Paciente
+
+CasoCritico = namedtuple(
+    'CasoCritico',
+    'paciente_id nombre_completo nivel_urgencia news_score fecha_hora profesional',
+)
+
+PacienteReciente = namedtuple(
+    'PacienteReciente',
+    'id nombre_completo edad motivo_consulta nivel_urgencia fecha_ingreso',
+)
+
+
+def casos_criticos_sin_atender():
+    """Último triage de cada paciente crítico, sin historial (máximo 10)."""
+    pacientes = Paciente.objects.criticos_sin_atender().select_related(
+        'ultimo_triage__profesional__user'
+    ).order_by('-ultimo_triage_fecha')[:10]
+
+    casos = []
+    for paciente in pacientes:
+        profesional = paciente.ultimo_triage.profesional if paciente.ultimo_triage else None
+        casos.append(CasoCritico(
+            paciente_id=paciente.id,
+            nombre_completo=paciente.nombre_completo,
+            nivel_urgencia=paciente.ultimo_nivel_urgencia,
+            news_score=paciente.ultimo_news_score,
+            fecha_hora=paciente.ultimo_triage_fecha,
+            profesional=(profesional.user.get_full_name() or profesional.user.username) if profesional else '',
+        ))
+    return tuple(casos)
+
+
+def pacientes_recientes():
+    """Últimos 5 pacientes en espera."""
+    pacientes = Paciente.objects.filter(
+        activo=True, estado_atencion='ESPERANDO'
+    ).order_by('-fecha_ingreso')[:5]
+
+    return tuple(
+        PacienteReciente(
+            id=paciente.id,
+            nombre_completo=paciente.nombre_completo,
+            edad=paciente.edad,
+            motivo_consulta=paciente.motivo_consulta or '',
+            nivel_urgencia=paciente.ultimo_nivel_urgencia,
+            fecha_ingreso=paciente.fecha_ingreso,
+        )
+        for paciente in pacientes
+    )
@@ -0,0 +1,442 @@
+// 📡 Pacientes en espera por id: la lista se repinta desde acá
+const pacientesEnEspera = new Map();
+let fuenteEventos = null;
+const REINTENTO_EVENTOS_MS = 30000;
+
+// Resincronización completa cada 5 minutos (tiempos de espera y prioridades)
+function actualizarDashboard() {
+    cargarPacientes();
+    actualizarEstadisticasDashboard();
+}
+
+// Función para cargar lista de pacientes en sidebar
+function cargarPacientes() {
+    const panel = document.getElementById('panel-pacientes');
+    const panelMobile = document.getElementById('panel-pacientes-mobile');
+    if (!panel && !panelMobile) return;
+
+    // Mostrar loading en ambos paneles
+    const loadingHtml = `
+        <div class="text-center text-muted py-3">
+            <div class="spinner-border spinner-border-sm" role="status">
+                <span class="visually-hidden">Actualizando...</span>
+            </div>
+            <div class="mt-2 small">Actualizando...</div>
+        </div>
+    `;
+    if (panel) panel.innerHTML = loadingHtml;
+    if (panelMobile) panelMobile.innerHTML = loadingHtml;
+
+    // Fetch lista de pacientes
+    fetch('/triage/api/lista-pacientes/')
+        .then(response => response.json())
+        .then(data => {
+            pacientesEnEspera.clear();
+            data.forEach(paciente => pacientesEnEspera.set(paciente.id, paciente));
+            pintarPacientes();
+        })
+        .catch(error => {
+            console.error('Error cargando pacientes:', error);
+            const errorHtml = `
+                <div class="text-center text-danger py-3">
+                    <i class="bi bi-exclamation-triangle"></i>
+                    <div class="mt-2 small">Error al cargar pacientes</div>
+                </div>
+            `;
+            if (panel) panel.innerHTML = errorHtml;
+            if (panelMobile) panelMobile.innerHTML = errorHtml;
+        });
+}
+
+// Mismo orden que el servidor: ROJOS por prioridad crítica, luego el más reciente
+function compararPacientes(a, b) {
+    const rojoA = a.nivel_urgencia === 'ROJO' ? 1 : 0;
+    const rojoB = b.nivel_urgencia === 'ROJO' ? 1 : 0;
+    return (rojoB - rojoA) ||
+           (b.prioridad_critica - a.prioridad_critica) ||
+           (Date.parse(b.fecha_ingreso) - Date.parse(a.fecha_ingreso)) ||
+           (b.id - a.id);
+}
+
+// Pintar la lista de espera (sidebar y mobile) desde pacientesEnEspera
+function pintarPacientes() {
+    const panel = document.getElementById('panel-pacientes');
+    const panelMobile = document.getElementById('panel-pacientes-mobile');
+    const data = Array.from(pacientesEnEspera.values()).sort(compararPacientes);
+
+    // Actualizar contadores
+    const contador = document.getElementById('contador-pacientes');
+    const contadorMobile = document.getElementById('contador-pacientes-mobile');
+    if (contador) contador.textContent = data.length;
+    if (contadorMobile) contadorMobile.textContent = data.length;
+
+    if (data.length === 0) {
+        const emptyHtml = `
+            <div class="text-center text-muted py-4">
+                <i class="bi bi-check-circle-fill text-success fs-1"></i>
+                <div class="mt-2 small">¡No hay pacientes esperando!</div>
+            </div>
+        `;
+        if (panel) panel.innerHTML = emptyHtml;
+        if (panelMobile) panelMobile.innerHTML = emptyHtml;
+        return;
+    }
+
+    let html = '';
+    data.forEach(paciente => {
+        const tiempoColor = paciente.tiempo_espera_minutos > 30 ? 'text-danger' : 'text-warning';
+        const nivelColor = paciente.nivel_urgencia === 'ROJO' ? 'danger' : 
+                          paciente.nivel_urgencia === 'AMARILLO' ? 'warning' : 'success';
+
+        // 🚨 Indicador de prioridad crítica para códigos rojos
+        const prioridadIndicador = paciente.nivel_urgencia === 'ROJO' && paciente.prioridad_critica > 0 ? 
+            `<span class="badge bg-danger-dark small ms-1">⚡ P${Math.floor(paciente.prioridad_critica/100)}</span>` : '';
+
+        html += `
+            <div class="card card-sm mb-2 border-${nivelColor}" id="paciente-${paciente.id}">
+                <div class="card-body p-2">
+                    <div class="d-flex justify-content-between align-items-start">
+                        <div class="flex-grow-1">
+                            <h6 class="card-title mb-1 small">${paciente.nombre_completo}${prioridadIndicador}</h6>
+                            <div class="small text-muted mb-1">
+                                ${paciente.dni ? 'DNI: ' + paciente.dni : 'Sin DNI'}
+                                ${paciente.edad ? ' | ' + paciente.edad + ' años' : ''}
+                            </div>
+                            <div class="d-flex justify-content-between align-items-center">
+                                <span class="badge bg-${nivelColor} small">${paciente.nivel_urgencia}</span>
+                                <div class="d-flex align-items-center">
+                                    <small class="${tiempoColor} me-2">
+                                        <i class="bi bi-clock"></i> ${paciente.tiempo_espera}
+                                    </small>
+                                    <div class="btn-group" role="group" style="gap: 4px;">
+                                        <button class="btn btn-primary btn-sm px-3 py-2" 
+                                                onclick="marcarAtendido(${paciente.id}, '${paciente.nombre_completo}', 'PASE_A_SALA')"
+                                                title="Pase a Sala"
+                                                style="min-width: 45px;">
+                                            <i class="bi bi-hospital"></i>
+                                        </button>
+                                        <button class="btn btn-success btn-sm px-3 py-2" 
+                                                onclick="marcarAtendido(${paciente.id}, '${paciente.nombre_completo}', 'ALTA')"
+                                                title="Alta"
+                                                style="min-width: 45px;">
+                                            <i class="bi bi-check-circle"></i>
+                                        </button>
+                                        <button class="btn btn-warning btn-sm px-3 py-2" 
+                                                onclick="marcarAtendido(${paciente.id}, '${paciente.nombre_completo}', 'PASE_A_UTI')"
+                                                title="Pase a UTI"
+                                                style="min-width: 45px;">
+                                            <i class="bi bi-exclamation-triangle"></i>
+                                        </button>
+                                    </div>
+                                </div>
+                            </div>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        `;
+    });
+
+    // Actualizar ambos paneles
+    if (panel) panel.innerHTML = html;
+    if (panelMobile) panelMobile.innerHTML = html;
+}
+
+// 📡 Eventos en vivo: se aplican sobre la lista sin volver a pedirla
+function conectarEventos() {
+    fuenteEventos = new EventSource('{% url "triage:api_eventos" %}');
+
+    ['paciente_agregado', 'paciente_retriado', 'paciente_actualizado'].forEach(tipo => {
+        fuenteEventos.addEventListener(tipo, evento => {
+            const paciente = JSON.parse(evento.data);
+            pacientesEnEspera.set(paciente.id, paciente);
+            pintarPacientes();
+        });
+    });
+
+    fuenteEventos.addEventListener('paciente_atendido', evento => {
+        if (pacientesEnEspera.delete(JSON.parse(evento.data).id)) {
+            pintarPacientes();
+        }
+    });
+
+    // Contadores, críticos y recientes: se piden solo las partes que cambiaron
+    fuenteEventos.addEventListener('estadisticas', refrescarFragmentos);
+
+    // Eventos perdidos (reconexión tardía): recargar todo
+    fuenteEventos.addEventListener('resincronizar', actualizarDashboard);
+
+    // Sin cupo en el servidor (503) el navegador no reintenta solo: se recarga
+    // la lista y se vuelve a conectar más tarde
+    fuenteEventos.addEventListener('error', () => {
+        if (fuenteEventos.readyState === EventSource.CLOSED) {
+            fuenteEventos = null;
+            cargarPacientes();
+            setTimeout(conectarEventos, REINTENTO_EVENTOS_MS);
+        }
+    });
+}
+
+function eventosConectados() {
+    return fuenteEventos !== null && fuenteEventos.readyState === EventSource.OPEN;
+}
+
+// Cargar pacientes al iniciar y escuchar cambios (o consultar cada 30 segundos)
+if (document.getElementById('panel-pacientes') || document.getElementById('panel-pacientes-mobile')) {
+    cargarPacientes();
+    if ('EventSource' in window) {
+        conectarEventos();
+        setInterval(actualizarDashboard, 300000);
+    } else {
+        setInterval(cargarPacientes, 30000); // Actualizar cada 30 segundos
+    }
+}
+
+// Función para marcar paciente como atendido con destino específico
+function marcarAtendido(pacienteId, nombrePaciente, destino) {
+    const destinosTexto = {
+        'PASE_A_SALA': 'será trasladado a Sala',
+        'ALTA': 'será dado de alta',
+        'PASE_A_UTI': 'será trasladado a UTI'
+    };
+
+    const textoDestino = destinosTexto[destino] || 'será atendido';
+
+    if (!confirm(`¿Confirma que ${nombrePaciente} ${textoDestino}?`)) {
+        return;
+    }
+
+    // Deshabilitar todos los botones del grupo mientras se procesa
+    const contenedorBotones = document.querySelector(`#paciente-${pacienteId} .btn-group`);
+    if (contenedorBotones) {
+        const botones = contenedorBotones.querySelectorAll('button');
+        botones.forEach(btn => {
+            btn.disabled = true;
+            btn.innerHTML = '<i class="bi bi-hourglass-split"></i>';
+        });
+    }
+
+    // Llamada AJAX para marcar como atendido con destino específico
+    fetch(`/triage/paciente/${pacienteId}/atendido/`, {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]')?.value || 
+                           document.querySelector('meta[name=csrf-token]')?.content ||
+                           getCookie('csrftoken'),
+            'Content-Type': 'application/json'
+        },
+        // El uid confirma que el id sigue siendo este paciente (tras una conmutación de base puede no serlo)
+        body: JSON.stringify({
+            destino: destino,
+            uid: pacientesEnEspera.get(pacienteId)?.uid
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            const mensajesExito = {
+                'PASE_A_SALA': `🏥 ${nombrePaciente} trasladado a Sala`,
+                'ALTA': `✅ ${nombrePaciente} dado de alta`,
+                'PASE_A_UTI': `🚨 ${nombrePaciente} trasladado a UTI`
+            };
+
+            const mensajeExito = mensajesExito[destino] || `✅ ${nombrePaciente} atendido`;
+
+            // Mostrar mensaje de éxito
+            mostrarMensaje(mensajeExito, 'success');
+
+            // Remover de la vista inmediatamente
+            const tarjeta = document.getElementById(`paciente-${pacienteId}`);
+            if (tarjeta) {
+                tarjeta.style.transition = 'all 0.3s ease';
+                tarjeta.style.opacity = '0';
+                tarjeta.style.transform = 'translateX(100%)';
+                setTimeout(() => {
+                    pacientesEnEspera.delete(pacienteId);
+                    pintarPacientes();
+                }, 300);
+            }
+
+            // 📡 Con eventos en vivo, lista y contadores llegan solos
+            if (eventosConectados()) {
+                return;
+            }
+
+            // 🚀 ACTUALIZACIÓN INMEDIATA Y EFICIENTE
+
+            // 1. Recargar lista de pacientes inmediatamente
+            cargarPacientes();
+
+            // 2. Actualizar estadísticas del dashboard si estamos en él
+            if (window.location.pathname.includes('/triage/dashboard/') || 
+                window.location.pathname === '/triage/') {
+                actualizarEstadisticasDashboard();
+            }
+
+            // 3. Actualizar contador de pacientes
+            actualizarContadorPacientes();
+
+        } else if (data.resincronizar) {
+            // Los ids de la lista son de otra base: recargar antes de volver a intentar
+            mostrarMensaje(`⚠️ ${data.error}`, 'error');
+            actualizarDashboard();
+        } else {
+            mostrarMensaje(`❌ Error: ${data.error}`, 'error');
+            // Rehabilitar botones
+            if (contenedorBotones) {
+                const botones = contenedorBotones.querySelectorAll('button');
+                const iconos = {
+                    'PASE_A_SALA': '<i class="bi bi-hospital"></i>',
+                    'ALTA': '<i class="bi bi-check-circle"></i>',
+                    'PASE_A_UTI': '<i class="bi bi-exclamation-triangle"></i>'
+                };
+                botones.forEach((btn, index) => {
+                    btn.disabled = false;
+                    const destinosArray = ['PASE_A_SALA', 'ALTA', 'PASE_A_UTI'];
+                    btn.innerHTML = iconos[destinosArray[index]] || '<i class="bi bi-check"></i>';
+                });
+            }
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        mostrarMensaje('❌ Error de conexión', 'error');
+        // Rehabilitar botones
+        if (contenedorBotones) {
+            const botones = contenedorBotones.querySelectorAll('button');
+            const iconos = {
+                'PASE_A_SALA': '<i class="bi bi-hospital"></i>',
+                'ALTA': '<i class="bi bi-check-circle"></i>',
+                'PASE_A_UTI': '<i class="bi bi-exclamation-triangle"></i>'
+            };
+            botones.forEach((btn, index) => {
+                btn.disabled = false;
+                const destinosArray = ['PASE_A_SALA', 'ALTA', 'PASE_A_UTI'];
+                btn.innerHTML = iconos[destinosArray[index]] || '<i class="bi bi-check"></i>';
+            });
+        }
+    });
+}
+
+// Función para mostrar mensajes temporales
+function mostrarMensaje(mensaje, tipo) {
+    const alertClass = tipo === 'success' ? 'alert-success' : 'alert-danger';
+    const alertHtml = `
+        <div class="alert ${alertClass} alert-dismissible fade show position-fixed" 
+             style="top: 80px; right: 20px; z-index: 9999; min-width: 300px;">
+            ${mensaje}
+            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+        </div>
+    `;
+
+    // Agregar al body
+    document.body.insertAdjacentHTML('beforeend', alertHtml);
+
+    // Auto-remover después de 3 segundos
+    setTimeout(() => {
+        const alert = document.querySelector('.alert.position-fixed');
+        if (alert) alert.remove();
+    }, 3000);
+}
+
+// Función helper para obtener CSRF token
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+// 📱 Service Worker para PWA y funcionamiento offline
+if ('serviceWorker' in navigator) {
+    window.addEventListener('load', () => {
+        navigator.serviceWorker.register('{% url "triage:service_worker" %}')
+            .then(registration => {
+                console.log('🏥 SW registrado:', registration.scope);
+
+                // Mostrar banner de instalación solo una vez
+                if (!localStorage.getItem('pwa-banner-shown')) {
+                    mostrarBannerInstalacion();
+                }
+            })
+            .catch(error => console.log('SW error:', error));
+    });
+}
+
+// Banner de instalación PWA
+function mostrarBannerInstalacion() {
+    const banner = document.createElement('div');
+    banner.className = 'alert alert-info alert-dismissible fade show position-fixed top-0 start-50 translate-middle-x mt-2';
+    banner.style.zIndex = '9999';
+    banner.innerHTML = `
+        <i class="bi bi-download"></i> 
+        <strong>📱 Instalar Triage Digital</strong><br>
+        <small>Agregar a pantalla de inicio para acceso rápido</small>
+        <button type="button" class="btn-close" onclick="this.parentElement.remove(); localStorage.setItem('pwa-banner-shown', 'true')"></button>
+    `;
+    document.body.appendChild(banner);
+
+    // Auto-hide después de 10 segundos
+    setTimeout(() => {
+        if (banner.parentElement) {
+            banner.remove();
+            localStorage.setItem('pwa-banner-shown', 'true');
+        }
+    }, 10000);
+}
+
+// 🚀 FUNCIONES DE ACTUALIZACIÓN EFICIENTE POST-ATENCIÓN
+
+// Actualizar estadísticas del dashboard sin recargar página
+function actualizarEstadisticasDashboard() {
+    refrescarFragmentos();
+}
+
+// 🧩 Reemplazar las partes del dashboard (contadores, críticos, recientes) que cambiaron.
+// El navegador revalida con If-None-Match: si no cambió, el servidor responde 304 sin cuerpo.
+function refrescarFragmentos() {
+    document.querySelectorAll('[data-fragmento]').forEach(contenedor => {
+        fetch(contenedor.dataset.fragmento)
+            .then(response => {
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                const etag = response.headers.get('ETag');
+                if (etag && etag === contenedor.dataset.etag) return;
+                return response.text().then(html => {
+                    contenedor.innerHTML = html;
+                    if (etag) contenedor.dataset.etag = etag;
+                });
+            })
+            .catch(error => {
+                console.error('❌ Error actualizando fragmento:', error);
+            });
+    });
+}
+
+// Actualizar contador de pacientes en sidebar
+function actualizarContadorPacientes() {
+
+    // Contar pacientes actuales en el DOM
+    const pacientesEnSidebar = document.querySelectorAll('#panel-pacientes .card').length;
+    const pacientesEnMobile = document.querySelectorAll('#panel-pacientes-mobile .card').length;
+
+    const totalPacientes = Math.max(pacientesEnSidebar, pacientesEnMobile);
+
+    // Actualizar contadores
+    const contador = document.getElementById('contador-pacientes');
+    const contadorMobile = document.getElementById('contador-pacientes-mobile');
+
+    if (contador) {
+        contador.textContent = totalPacientes;
+    }
+    if (contadorMobile) {
+        contadorMobile.textContent = totalPacientes;
+    }
+}
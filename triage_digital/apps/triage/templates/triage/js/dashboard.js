@@ -0,0 +1,273 @@
+// Lista y contadores se actualizan en vivo por eventos (ver base.js): sin recargar la página
+
+// 🧮 CALCULADORA NEWS INTEGRADA EN DASHBOARD
+console.log('🧮 Inicializando calculadora NEWS en Dashboard...');
+
+// Tablas NEWS generadas por el servidor (CalculadoraNEWS): única fuente de puntajes
+const tablasNEWS = JSON.parse(document.getElementById('tablas-news').textContent);
+
+// Temperatura en décimas de grado (36.5 -> 365) con redondeo half-up sobre el
+// texto decimal, igual que indice_temperatura en el servidor (ROUND_HALF_UP).
+// Math.round(parseFloat('36.55') * 10) da 365 porque el float es 365.4999...
+function decimasTemperatura(valor) {
+    const partes = /^\s*(-?)(\d*)(?:\.(\d*))?\s*$/.exec(String(valor));
+    if (!partes || !(partes[2] || partes[3])) {
+        return NaN;
+    }
+    const [, signo, enteros, decimales = ''] = partes;
+    const digitos = (decimales + '00').slice(0, 2);
+    let decimas = parseInt(enteros || '0', 10) * 10 + parseInt(digitos[0], 10);
+    // Half-up: alcanza con mirar el primer dígito descartado
+    if (parseInt(digitos[1], 10) >= 5) {
+        decimas += 1;
+    }
+    return signo ? -decimas : decimas;
+}
+
+function puntajeDesdeTabla(signo, valor) {
+    if (signo === 'nivel_conciencia') {
+        return tablasNEWS.nivel_conciencia[valor] ?? 3;
+    }
+    const tabla = tablasNEWS.parametros[signo];
+    let indice = signo === 'temperatura' ? decimasTemperatura(valor) : parseInt(valor);
+    indice = Math.min(Math.max(indice - tabla.minimo, 0), tabla.puntajes.length - 1);
+    return tabla.puntajes[indice];
+}
+
+const calculadoraNEWSDashboard = {
+    puntajes: {
+        frecuencia_respiratoria: null,
+        saturacion_oxigeno: null,
+        tension_sistolica: null,
+        frecuencia_cardiaca: null,
+        nivel_conciencia: null,
+        temperatura: null
+    },
+    valores: {
+        frecuencia_respiratoria: null,
+        saturacion_oxigeno: null,
+        tension_sistolica: null,
+        frecuencia_cardiaca: null,
+        nivel_conciencia: null,
+        temperatura: null
+    },
+
+    init: function() {
+        const botones = document.querySelectorAll('.btn-valor');
+        console.log(`Encontrados ${botones.length} botones en dashboard`);
+        
+        botones.forEach(boton => {
+            boton.addEventListener('click', (e) => {
+                e.preventDefault();
+                this.seleccionarValor(e.target);
+            });
+        });
+    },
+
+    seleccionarValor: function(boton) {
+        const seccionSigno = boton.closest('[data-signo]');
+        if (!seccionSigno) {
+            console.error('No se encontró sección de signo');
+            return;
+        }
+        
+        const signo = seccionSigno.dataset.signo;
+        const valor = boton.dataset.valor;
+        const puntaje = puntajeDesdeTabla(signo, valor);
+        
+        console.log(`Dashboard - Seleccionando: ${signo} = ${valor} (${puntaje} puntos)`);
+        
+        // Quitar selección previa
+        seccionSigno.querySelectorAll('.btn-valor').forEach(btn => {
+            btn.classList.remove('seleccionado');
+        });
+        
+        // Marcar como seleccionado
+        boton.classList.add('seleccionado');
+        
+        // Actualizar valores
+        this.puntajes[signo] = puntaje;
+        this.valores[signo] = valor;
+        
+        // Actualizar campo oculto con sufijo _dash
+        const hiddenField = document.getElementById(signo + '_dash');
+        if (hiddenField) {
+            hiddenField.value = valor;
+            console.log(`Campo oculto ${signo}_dash = ${valor}`);
+        }
+        
+        // Actualizar display individual
+        const displayElement = document.getElementById(`puntaje-${signo}-display-dash`);
+        if (displayElement) {
+            displayElement.textContent = puntaje;
+            displayElement.className = `badge ms-1 ${puntaje === 0 ? 'bg-success' : puntaje === 1 || puntaje === 2 ? 'bg-warning' : 'bg-danger'}`;
+        }
+        
+        // Recalcular total
+        this.actualizarResultado();
+    },
+    
+    actualizarResultado: function() {
+        const puntajesArray = Object.values(this.puntajes);
+        const totalSeleccionados = puntajesArray.filter(p => p !== null).length;
+        
+        console.log(`Dashboard - Puntajes seleccionados: ${totalSeleccionados}/6`);
+        
+        // Si no hay valores, mostrar estado inicial
+        if (totalSeleccionados === 0) {
+            this.mostrarEstadoInicial();
+            return;
+        }
+        
+        // Calcular puntaje total
+        const puntajeTotal = puntajesArray.reduce((sum, p) => sum + (p || 0), 0);
+        console.log(`Dashboard - Puntaje total: ${puntajeTotal}`);
+        
+        // Determinar clasificación con la tabla del servidor
+        const clasificacion = tablasNEWS.clasificacion[Math.min(puntajeTotal, tablasNEWS.clasificacion.length - 1)];
+        const minutosMax = tablasNEWS.tiempos_atencion[clasificacion];
+        const tiempoMax = minutosMax === 0 ? 'INMEDIATO' : `${minutosMax} minutos`;
+        const colorClass = {
+            'ROJO': 'bg-danger',
+            'AMARILLO': 'bg-warning text-dark',
+            'VERDE': 'bg-success'
+        }[clasificacion];
+        
+        console.log(`Dashboard - Clasificación: ${clasificacion} (${tiempoMax})`);
+        
+        // Actualizar UI
+        const colorDiv = document.getElementById('colorResultadoMiniDash');
+        const puntajeDiv = document.getElementById('puntajeTotalMiniDash');
+        const textoColor = document.getElementById('textoColorMiniDash');
+        const tiempoDiv = document.getElementById('tiempoAtencionMiniDash');
+        const textoTiempo = document.getElementById('textoTiempoMiniDash');
+        
+        if (colorDiv && puntajeDiv && textoColor) {
+            colorDiv.className = `color-resultado-mini text-white rounded p-2 small ${colorClass}`;
+            textoColor.textContent = clasificacion;
+            
+            puntajeDiv.textContent = puntajeTotal;
+            puntajeDiv.className = `h4 ${puntajeTotal >= 7 ? 'text-danger' : puntajeTotal >= 5 ? 'text-warning' : 'text-success'}`;
+            
+            if (tiempoDiv && textoTiempo) {
+                tiempoDiv.classList.remove('d-none');
+                textoTiempo.textContent = tiempoMax;
+                textoTiempo.className = `fw-bold small ${puntajeTotal >= 7 ? 'text-danger' : puntajeTotal >= 5 ? 'text-warning' : 'text-success'}`;
+            }
+        }
+        
+        // Mostrar resultado rápido
+        const resultadoRapido = document.getElementById('resultado-rapido');
+        const puntajeRapido = document.getElementById('puntaje-rapido');
+        const colorRapido = document.getElementById('color-rapido');
+        
+        if (resultadoRapido && puntajeRapido && colorRapido) {
+            resultadoRapido.classList.remove('d-none');
+            puntajeRapido.textContent = puntajeTotal;
+            puntajeRapido.className = `badge ${puntajeTotal >= 7 ? 'bg-danger' : puntajeTotal >= 5 ? 'bg-warning text-dark' : 'bg-success'}`;
+            colorRapido.textContent = clasificacion;
+            colorRapido.className = `badge ms-1 ${puntajeTotal >= 7 ? 'bg-danger' : puntajeTotal >= 5 ? 'bg-warning text-dark' : 'bg-success'}`;
+        }
+    },
+    
+    mostrarEstadoInicial: function() {
+        const colorDiv = document.getElementById('colorResultadoMiniDash');
+        const puntajeDiv = document.getElementById('puntajeTotalMiniDash');
+        const textoColor = document.getElementById('textoColorMiniDash');
+        const tiempoDiv = document.getElementById('tiempoAtencionMiniDash');
+        const resultadoRapido = document.getElementById('resultado-rapido');
+        
+        if (colorDiv && puntajeDiv && textoColor) {
+            colorDiv.className = 'color-resultado-mini bg-secondary text-white rounded p-2 small';
+            textoColor.textContent = 'Selecciona valores';
+            puntajeDiv.textContent = '--';
+            puntajeDiv.className = 'h4 text-muted';
+        }
+        
+        if (tiempoDiv) {
+            tiempoDiv.classList.add('d-none');
+        }
+        
+        if (resultadoRapido) {
+            resultadoRapido.classList.add('d-none');
+        }
+        
+        // Limpiar puntajes individuales
+        Object.keys(this.puntajes).forEach(signo => {
+            const displayElement = document.getElementById(`puntaje-${signo}-display-dash`);
+            if (displayElement) {
+                displayElement.textContent = '-';
+                displayElement.className = 'badge bg-secondary ms-1';
+            }
+        });
+    }
+};
+
+// 🛡️ VALIDACIÓN DEL FORMULARIO DASHBOARD
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('🚀 Sistema Triage Dashboard iniciando...');
+    
+    // Inicializar calculadora
+    calculadoraNEWSDashboard.init();
+    
+    // Validación del formulario
+    const form = document.getElementById('triageCompletoFormDashboard');
+    if (form) {
+        form.addEventListener('submit', function(e) {
+            console.log('🔍 Validando formulario dashboard antes del envío...');
+            
+            // Verificar valores de NEWS
+            const newsFields = ['frecuencia_respiratoria', 'saturacion_oxigeno', 'tension_sistolica', 
+                              'frecuencia_cardiaca', 'nivel_conciencia', 'temperatura'];
+            
+            let allNewsComplete = true;
+            let incompleteFields = [];
+            
+            newsFields.forEach(field => {
+                const hiddenField = document.getElementById(field + '_dash');
+                if (!hiddenField || !hiddenField.value || hiddenField.value === '0') {
+                    allNewsComplete = false;
+                    incompleteFields.push(field);
+                }
+                console.log(`📊 ${field}: ${hiddenField ? hiddenField.value : 'NO ENCONTRADO'}`);
+            });
+            
+            if (!allNewsComplete) {
+                e.preventDefault();
+                alert(`⚠️ Por favor complete todos los signos vitales de NEWS:\n\n${incompleteFields.map(f => f.replace('_', ' ')).join('\n')}\n\nSeleccione los botones correspondientes en la calculadora.`);
+                console.warn('❌ Formulario dashboard bloqueado: Faltan valores NEWS', incompleteFields);
+                return false;
+            }
+            
+            console.log('✅ Validación dashboard completa - enviando formulario');
+            return true;
+        });
+    }
+});
+
+// CSS para selección de botones
+const styleSheet = document.createElement('style');
+styleSheet.textContent = `
+    .btn-valor.seleccionado {
+        background-color: var(--bs-primary) !important;
+        color: white !important;
+        border-color: var(--bs-primary) !important;
+        box-shadow: 0 0 0 0.2rem rgba(0, 123, 255, 0.25) !important;
+        transform: scale(1.05);
+        transition: all 0.2s ease;
+    }
+    
+    .btn-valor:hover {
+        transform: scale(1.02);
+        transition: all 0.2s ease;
+    }
+    
+    .color-resultado-mini {
+        min-height: 40px;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        font-weight: bold;
+    }
+`;
+document.head.appendChild(styleSheet);
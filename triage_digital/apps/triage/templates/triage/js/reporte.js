@@ -0,0 +1,36 @@
+// 📄 Página de espera: consulta el estado del reporte hasta que esté listo y lo descarga
+
+const INTERVALO_ESTADO_REPORTE = 1500;
+
+function mostrarEstadoReporte(estado) {
+    if (estado.estado === 'LISTO') {
+        document.getElementById('reporte-preparando').classList.add('d-none');
+        document.getElementById('reporte-listo').classList.remove('d-none');
+        document.getElementById('reporte-descarga').href = estado.url_descarga;
+        window.location.href = estado.url_descarga;
+        return true;
+    }
+    if (estado.estado === 'ERROR') {
+        document.getElementById('reporte-preparando').classList.add('d-none');
+        document.getElementById('reporte-error').classList.remove('d-none');
+        document.getElementById('reporte-error-detalle').textContent = estado.error || '';
+        return true;
+    }
+    return false;
+}
+
+function consultarEstadoReporte(urlEstado) {
+    fetch(urlEstado, {headers: {'Accept': 'application/json'}})
+        .then(response => response.ok ? response.json() : Promise.reject(response.status))
+        .then(estado => {
+            if (!mostrarEstadoReporte(estado)) {
+                setTimeout(() => consultarEstadoReporte(estado.url_estado), INTERVALO_ESTADO_REPORTE);
+            }
+        })
+        .catch(() => setTimeout(() => consultarEstadoReporte(urlEstado), INTERVALO_ESTADO_REPORTE * 2));
+}
+
+const estadoInicialReporte = JSON.parse(document.getElementById('estado-reporte').textContent);
+if (!mostrarEstadoReporte(estadoInicialReporte)) {
+    setTimeout(() => consultarEstadoReporte(estadoInicialReporte.url_estado), INTERVALO_ESTADO_REPORTE);
+}
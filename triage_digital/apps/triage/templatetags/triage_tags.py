@@ -0,0 +1,13 @@
+from django import template
+from django.urls import reverse
+
+from ..fragmentos import script
+
+register = template.Library()
+
+
+@register.simple_tag
+def url_script(nombre):
+    """URL versionada de un script de triage/js/ (cambia cuando cambia el contenido)."""
+    version, _ = script(nombre)
+    return reverse('triage:script', kwargs={'nombre': nombre, 'version': version})
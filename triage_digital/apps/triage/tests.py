@@ -0,0 +1,1011 @@
+"""
+🧪 Tests de triage.
+
+    python manage.py test --settings=config.settings_tests
+"""
+import itertools
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import DEFAULT_DB_ALIAS
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.patients.models import Paciente
+from config.database_utils import ALIAS_OFFLINE
+
+from . import cache_utils, cola, conmutacion, eventos, pdf, sincronizacion, trabajos
+from .cache_utils import PACIENTES
+from .models import (
+    AliasPaciente, CambioSincronizacion, ConflictoSincronizacion, DescargaReporte, Profesional, SignosVitales,
+    TrabajoReporte, TriageEnEspera,
+)
+from .utils import CalculadoraNEWS
+
+
+# Bandas NEWS escritas como en el protocolo (if/elif), independientes de las tablas
+def _referencia_frecuencia_respiratoria(valor):
+    if valor <= 8:
+        return 3
+    elif valor <= 11:
+        return 1
+    elif valor <= 20:
+        return 0
+    elif valor <= 24:
+        return 2
+    return 3
+
+
+def _referencia_saturacion_oxigeno(valor):
+    if valor <= 91:
+        return 3
+    elif valor <= 93:
+        return 2
+    elif valor <= 95:
+        return 1
+    return 0
+
+
+def _referencia_tension_sistolica(valor):
+    if valor <= 90:
+        return 3
+    elif valor <= 100:
+        return 2
+    elif valor <= 110:
+        return 1
+    elif valor <= 219:
+        return 0
+    return 3
+
+
+def _referencia_frecuencia_cardiaca(valor):
+    if valor <= 40:
+        return 3
+    elif valor <= 50:
+        return 1
+    elif valor <= 90:
+        return 0
+    elif valor <= 110:
+        return 1
+    elif valor <= 130:
+        return 2
+    return 3
+
+
+def _referencia_temperatura(valor):
+    """Se redondea a la décima con ROUND_HALF_UP y se aplican las bandas en °C."""
+    valor = Decimal(str(valor)).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP)
+    if valor <= Decimal('35.0'):
+        return 3
+    elif valor <= Decimal('36.0'):
+        return 1
+    elif valor <= Decimal('38.0'):
+        return 0
+    elif valor <= Decimal('39.0'):
+        return 2
+    return 3
+
+
+def _referencia_nivel_conciencia(valor):
+    return 0 if valor == 'A' else 3
+
+
+REFERENCIAS = {
+    'frecuencia_respiratoria': _referencia_frecuencia_respiratoria,
+    'saturacion_oxigeno': _referencia_saturacion_oxigeno,
+    'tension_sistolica': _referencia_tension_sistolica,
+    'frecuencia_cardiaca': _referencia_frecuencia_cardiaca,
+    'nivel_conciencia': _referencia_nivel_conciencia,
+    'temperatura': _referencia_temperatura,
+}
+
+# Nombre del puntaje individual de cada campo del formulario
+PUNTAJES = {
+    'frecuencia_respiratoria': 'frecuencia_respiratoria',
+    'saturacion_oxigeno': 'saturacion_oxigeno',
+    'tension_sistolica': 'presion_sistolica',
+    'frecuencia_cardiaca': 'frecuencia_cardiaca',
+    'nivel_conciencia': 'nivel_conciencia',
+    'temperatura': 'temperatura',
+}
+
+# Valores normales (puntaje 0) para los parámetros que no se recorren
+NORMALES = {
+    'frecuencia_respiratoria': 16,
+    'saturacion_oxigeno': 98,
+    'tension_sistolica': 120,
+    'frecuencia_cardiaca': 70,
+    'nivel_conciencia': 'A',
+    'temperatura': Decimal('36.5'),
+}
+
+# Dos triages ROJO con distinta prioridad crítica base
+ROJO_GRAVE = {'nivel_conciencia': 'U', 'saturacion_oxigeno': 80, 'frecuencia_respiratoria': 25}
+ROJO = {'nivel_conciencia': 'V', 'saturacion_oxigeno': 91, 'frecuencia_respiratoria': 25}
+
+
+def _rango(campo):
+    """(mínimo, máximo) de los validadores de SignosVitales."""
+    validadores = SignosVitales._meta.get_field(campo).validators
+    minimo = next(v.limit_value for v in validadores if isinstance(v, MinValueValidator))
+    maximo = next(v.limit_value for v in validadores if isinstance(v, MaxValueValidator))
+    return minimo, maximo
+
+
+def _dominio(campo):
+    """Todos los valores que acepta el campo (temperatura: cada décima y cada centésima .x5)."""
+    if campo == 'nivel_conciencia':
+        return [codigo for codigo, _ in SignosVitales.CONCIENCIA_CHOICES]
+    minimo, maximo = _rango(campo)
+    if campo != 'temperatura':
+        return list(range(int(minimo), int(maximo) + 1))
+    decimas = range(int(minimo * 10), int(maximo * 10) + 1)
+    valores = [Decimal(decima) / 10 for decima in decimas]
+    # Centésimas en el borde de redondeo: ROUND_HALF_UP las lleva a la décima siguiente
+    valores += [Decimal(decima * 10 + 5) / 100 for decima in decimas[:-1]]
+    valores += [Decimal(decima * 10 + 4) / 100 for decima in decimas[:-1]]
+    return valores
+
+
+def _lote(filas):
+    """calcular_puntaje_lote sobre filas con los nombres de campo del formulario."""
+    return CalculadoraNEWS.calcular_puntaje_lote(
+        [fila['frecuencia_respiratoria'] for fila in filas],
+        [fila['saturacion_oxigeno'] for fila in filas],
+        [fila['tension_sistolica'] for fila in filas],
+        [fila['frecuencia_cardiaca'] for fila in filas],
+        [fila['nivel_conciencia'] for fila in filas],
+        [fila['temperatura'] for fila in filas],
+    )
+
+
+class CalculadoraNEWSTablasTests(SimpleTestCase):
+    """Las tablas precalculadas (individual y por lote) contra las bandas del protocolo."""
+
+    def assertParidad(self, filas):
+        lote = _lote(filas)
+        for numero, fila in enumerate(filas):
+            individual = CalculadoraNEWS.calcular_puntaje_total(fila)
+            esperados = {PUNTAJES[campo]: REFERENCIAS[campo](valor) for campo, valor in fila.items()}
+            self.assertEqual(individual['puntajes_individuales'], esperados, fila)
+            self.assertEqual(
+                {parametro: puntajes[numero] for parametro, puntajes in lote['puntajes_individuales'].items()},
+                esperados, fila,
+            )
+            total = sum(esperados.values())
+            self.assertEqual(individual['puntaje_total'], total, fila)
+            self.assertEqual(lote['puntaje_total'][numero], total, fila)
+            self.assertEqual(lote['clasificacion'][numero], individual['clasificacion'], fila)
+            self.assertEqual(lote['tiempo_atencion_maximo'][numero], individual['tiempo_atencion_maximo'], fila)
+
+    def test_dominio_de_cada_signo(self):
+        for campo in REFERENCIAS:
+            with self.subTest(campo=campo):
+                self.assertParidad([dict(NORMALES, **{campo: valor}) for valor in _dominio(campo)])
+
+    def test_bordes_de_temperatura(self):
+        casos = {
+            '35.0': 3, '35.04': 3, '35.05': 1, '35.1': 1,
+            '36.0': 1, '36.04': 1, '36.05': 0,
+            '38.0': 0, '38.05': 2, '39.0': 2, '39.05': 3,
+        }
+        lote = _lote([dict(NORMALES, temperatura=Decimal(valor)) for valor in casos])
+        for numero, (valor, puntaje) in enumerate(casos.items()):
+            with self.subTest(temperatura=valor):
+                fila = dict(NORMALES, temperatura=Decimal(valor))
+                self.assertEqual(
+                    CalculadoraNEWS.calcular_puntaje_total(fila)['puntajes_individuales']['temperatura'], puntaje
+                )
+                self.assertEqual(lote['puntajes_individuales']['temperatura'][numero], puntaje)
+
+    def test_combinaciones_de_bordes(self):
+        # Límite superior de cada banda de cada parámetro, todos contra todos
+        bordes = {
+            'frecuencia_respiratoria': [8, 11, 20, 24, 60],
+            'saturacion_oxigeno': [91, 93, 95, 100],
+            'tension_sistolica': [90, 100, 110, 219, 300],
+            'frecuencia_cardiaca': [40, 50, 90, 110, 130, 200],
+            'nivel_conciencia': ['A', 'V'],
+            'temperatura': [Decimal(valor) for valor in ('35.0', '36.0', '38.0', '39.0', '45.0')],
+        }
+        filas = [dict(zip(bordes, valores)) for valores in itertools.product(*bordes.values())]
+        self.assertParidad(filas)
+
+    def test_clasificacion_por_total(self):
+        for total in range(0, 19):
+            with self.subTest(total=total):
+                esperada = next(
+                    nivel for nivel, minimo, maximo in CalculadoraNEWS.RANGOS_CLASIFICACION
+                    if minimo <= total <= maximo
+                )
+                self.assertEqual(CalculadoraNEWS.obtener_clasificacion(total), esperada)
+
+    def test_columnas_de_distinto_largo(self):
+        with self.assertRaises(ValueError):
+            CalculadoraNEWS.calcular_puntaje_lote([16], [98], [120], [70], ['A'], [])
+
+
+# ----------------------------------------------------------------------
+# Sincronización entre dos bases
+# ----------------------------------------------------------------------
+
+CENTRAL = DEFAULT_DB_ALIAS
+LOCAL = ALIAS_OFFLINE
+
+
+@contextmanager
+def _en_base(alias):
+    """Como si `alias` fuera la base activa de este thread (lo que hace el monitor al conmutar)."""
+    conmutacion._hilo.base = alias
+    try:
+        yield
+    finally:
+        del conmutacion._hilo.base
+
+
+def _estado(alias):
+    """Pacientes y triages de una base por uid, con lo que tiene que coincidir entre bases."""
+    pacientes = {
+        fila['uid']: fila
+        for fila in Paciente.objects.using(alias).values(
+            'uid', 'nombre', 'apellido', 'dni', 'edad', 'estado_atencion', 'fecha_atencion',
+            'ultimo_nivel_urgencia', 'ultimo_news_score', 'ultimo_triage__uid',
+        )
+    }
+    signos = dict(SignosVitales.objects.using(alias).values_list('uid', 'paciente__uid'))
+    return pacientes, signos
+
+
+class SincronizacionBase(TestCase):
+    """Dos bases con el mismo profesional (las cuentas no viajan por el diario)."""
+
+    databases = {CENTRAL, LOCAL}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesionales = {}
+        for alias in (CENTRAL, LOCAL):
+            usuario = User.objects.db_manager(alias).create_user('enfermera', password='x')
+            cls.profesionales[alias] = Profesional.objects.using(alias).create(
+                user=usuario, dni='30111222', tipo='enfermero'
+            )
+
+    def _ingresar(self, alias, nombre, dni=None, profesional=None, **signos):
+        """Paciente con un triage, escrito como lo haría la base `alias` atendiendo."""
+        with _en_base(alias):
+            paciente = Paciente.objects.create(nombre=nombre, apellido='Prueba', dni=dni, edad=50)
+            SignosVitales.objects.create(
+                paciente=paciente, profesional=profesional or self.profesionales[alias],
+                **dict(NORMALES, **signos)
+            )
+        return paciente
+
+    def _profesional(self, alias, usuario, dni):
+        cuenta = User.objects.db_manager(alias).create_user(usuario, password='x')
+        return Profesional.objects.using(alias).create(user=cuenta, dni=dni, tipo='medico')
+
+    def assertBasesIguales(self):
+        self.assertEqual(_estado(CENTRAL), _estado(LOCAL))
+
+
+class DiarioEnLaTransaccionTests(TestCase):
+    """El paciente y su entrada en el diario se guardan juntos o no se guardan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = User.objects.create_user('enfermera', password='x')
+        cls.profesional = Profesional.objects.create(user=usuario, dni='30111222', tipo='enfermero')
+
+    def setUp(self):
+        self.client.force_login(self.profesional.user)
+
+    def _ingresar(self):
+        return self.client.post(reverse('triage:dashboard'), dict(NORMALES, nombre='Nuevo', apellido='Prueba', edad=40))
+
+    def test_ingreso_completo(self):
+        self.assertEqual(self._ingresar().status_code, 302)
+        paciente = Paciente.objects.get()
+        self.assertEqual(paciente.ultimo_nivel_urgencia, 'VERDE')
+        self.assertEqual(
+            sorted(CambioSincronizacion.objects.values_list('modelo', 'operacion')),
+            [('paciente', 'ALTA'), ('signos_vitales', 'ALTA')],
+        )
+
+    def test_si_fallan_los_signos_no_queda_el_paciente(self):
+        with mock.patch('apps.triage.views._crear_signos_vitales', side_effect=ValueError('signos inválidos')):
+            self.assertEqual(self._ingresar().status_code, 302)
+        self.assertFalse(Paciente.objects.exists())
+        self.assertFalse(CambioSincronizacion.objects.exists())
+
+    def test_si_falla_el_diario_no_queda_el_paciente(self):
+        with mock.patch.object(sincronizacion, 'registrar_cambios', side_effect=RuntimeError('sin diario')):
+            with self.assertRaises(RuntimeError):
+                Paciente.objects.create(nombre='Suelto', apellido='Prueba', edad=40)
+        self.assertFalse(Paciente.objects.exists())
+
+
+class SincronizacionIncrementalTests(SincronizacionBase):
+    """Diario → envío incremental → punto confirmado, de punta a punta."""
+
+    def test_envia_solo_lo_nuevo_con_ediciones_y_bajas(self):
+        pacientes = [self._ingresar(LOCAL, f'Paciente{numero}', dni=f'2000000{numero}') for numero in range(4)]
+        diario = CambioSincronizacion.objects.using(LOCAL)
+        self.assertEqual(diario.count(), 8)
+
+        primero = sincronizacion.sincronizar(LOCAL, CENTRAL)
+        self.assertEqual((primero.entradas, primero.pacientes, primero.signos_vitales), (8, 4, 4))
+        self.assertEqual(sincronizacion.punto_confirmado(LOCAL, CENTRAL), diario.order_by('secuencia').last().secuencia)
+        self.assertBasesIguales()
+
+        # Segunda vuelta sin cambios: no se envía nada
+        segundo = sincronizacion.sincronizar(LOCAL, CENTRAL)
+        self.assertEqual((segundo.lotes, segundo.entradas), (0, 0))
+        self.assertEqual(sincronizacion.pendientes(LOCAL, CENTRAL), 0)
+
+        # Ediciones: datos del paciente, un re-triage y una atención
+        editado, retriado, atendido, borrado = pacientes
+        # Alta y baja entre dos envíos: el triage no debe quedar huérfano en el destino
+        efimero = self._ingresar(LOCAL, 'Efimero')
+        with _en_base(LOCAL):
+            efimero.delete()
+            editado.nombre = 'Editado'
+            editado.save()
+            SignosVitales.objects.create(
+                paciente=retriado, profesional=self.profesionales[LOCAL],
+                **dict(NORMALES, frecuencia_respiratoria=25, saturacion_oxigeno=91, frecuencia_cardiaca=95),
+            )
+            atendido.marcar_atendido('PASE_A_SALA', self.profesionales[LOCAL])
+            sincronizacion.registrar_cambios([Paciente.objects.get(pk=atendido.pk)])
+            # Bajas: un paciente (con su triage) y el primer triage del re-triado
+            borrado.delete()
+            SignosVitales.objects.filter(paciente=retriado).order_by('fecha_hora', 'id').first().delete()
+        nuevas = diario.filter(secuencia__gt=primero.ultima_secuencia).count()
+
+        tercero = sincronizacion.sincronizar(LOCAL, CENTRAL, tamano_lote=2)
+        self.assertEqual(tercero.entradas, nuevas)
+        self.assertBasesIguales()
+        central = Paciente.objects.using(CENTRAL)
+        self.assertEqual(central.get(uid=editado.uid).nombre, 'Editado')
+        self.assertEqual(central.get(uid=atendido.uid).estado_atencion, 'PASE_A_SALA')
+        self.assertFalse(central.filter(uid__in=[borrado.uid, efimero.uid]).exists())
+        self.assertEqual(central.get(uid=retriado.uid).ultimo_nivel_urgencia, 'ROJO')
+        self.assertEqual(SignosVitales.objects.using(CENTRAL).filter(paciente__uid=retriado.uid).count(), 1)
+
+        self.assertEqual(sincronizacion.sincronizar(LOCAL, CENTRAL).entradas, 0)
+        # Lo recibido no vuelve a la base que lo originó
+        self.assertEqual(sincronizacion.sincronizar(CENTRAL, LOCAL).entradas, 0)
+
+    def test_retoma_desde_el_ultimo_lote_confirmado(self):
+        for numero in range(3):
+            self._ingresar(LOCAL, f'Paciente{numero}')
+
+        # Un lote de 2 y se corta: queda confirmado hasta ahí
+        parcial = sincronizacion.sincronizar(LOCAL, CENTRAL, tamano_lote=2, max_lotes=1)
+        self.assertEqual(parcial.entradas, 2)
+        self.assertEqual(sincronizacion.pendientes(LOCAL, CENTRAL), 4)
+
+        resto = sincronizacion.sincronizar(LOCAL, CENTRAL, tamano_lote=2)
+        self.assertEqual((resto.lotes, resto.entradas), (2, 4))
+        self.assertBasesIguales()
+
+        # Aplicar de nuevo las mismas entradas no cambia nada (upsert por uid)
+        sincronizacion.PuntoSincronizacion.objects.using(CENTRAL).update(ultima_secuencia=0)
+        sincronizacion.sincronizar(LOCAL, CENTRAL)
+        self.assertEqual(Paciente.objects.using(CENTRAL).count(), 3)
+        self.assertBasesIguales()
+
+
+class SincronizacionSinReferenciaTests(SincronizacionBase):
+    """Un triage cuyo profesional no tiene cuenta en el destino no frena el lote."""
+
+    def test_triage_en_espera_hasta_que_llega_el_profesional(self):
+        solo_local = self._profesional(LOCAL, 'guardia', '27444555')
+        antes = self._ingresar(LOCAL, 'Antes')
+        huerfano = self._ingresar(LOCAL, 'Huerfano', profesional=solo_local, frecuencia_respiratoria=25)
+        despues = self._ingresar(LOCAL, 'Despues')
+
+        resultado = sincronizacion.sincronizar(LOCAL, CENTRAL)
+        self.assertEqual((resultado.entradas, resultado.pacientes, resultado.signos_vitales), (6, 3, 2))
+        self.assertEqual((resultado.conflictos, resultado.triages_en_espera), (1, 1))
+        # El resto del lote se aplicó y el punto quedó confirmado al final
+        central = Paciente.objects.using(CENTRAL)
+        self.assertEqual(central.count(), 3)
+        for paciente in (antes, despues):
+            self.assertEqual(central.get(uid=paciente.uid).ultimo_nivel_urgencia, 'VERDE')
+        self.assertIsNone(central.get(uid=huerfano.uid).ultimo_triage_id)
+        self.assertEqual(sincronizacion.pendientes(LOCAL, CENTRAL), 0)
+
+        conflicto = ConflictoSincronizacion.objects.using(CENTRAL).get()
+        self.assertEqual((conflicto.tipo, conflicto.uid), ('SIN_REFERENCIA', huerfano.uid))
+        self.assertIn('27444555', conflicto.detalle)
+        triage_uid = SignosVitales.objects.using(LOCAL).get(paciente=huerfano).uid
+        self.assertEqual(TriageEnEspera.objects.using(CENTRAL).get().uid, triage_uid)
+        # Lo que está en espera no se reenvía desde la central como si estuviera aplicado
+        self.assertFalse(CambioSincronizacion.objects.using(CENTRAL).filter(uid=triage_uid).exists())
+
+        # Sin la cuenta sigue esperando, sin anotar otro conflicto
+        resultado = sincronizacion.sincronizar(LOCAL, CENTRAL)
+        self.assertEqual((resultado.entradas, resultado.conflictos, resultado.triages_en_espera), (0, 0, 1))
+        self.assertEqual(ConflictoSincronizacion.objects.using(CENTRAL).count(), 1)
+
+        # Se crea la cuenta en la central: la próxima sincronización lo aplica
+        self._profesional(CENTRAL, 'guardia', '27444555')
+        resultado = sincronizacion.sincronizar(LOCAL, CENTRAL)
+        self.assertEqual((resultado.entradas, resultado.signos_vitales, resultado.triages_en_espera), (0, 1, 0))
+        self.assertFalse(TriageEnEspera.objects.using(CENTRAL).exists())
+        self.assertEqual(central.get(uid=huerfano.uid).ultimo_nivel_urgencia, 'VERDE')
+        self.assertEqual(
+            SignosVitales.objects.using(CENTRAL).get(uid=triage_uid).profesional.dni, '27444555'
+        )
+        self.assertBasesIguales()
+        self.assertEqual(sincronizacion.sincronizar(CENTRAL, LOCAL).entradas, 0)
+
+    def test_una_version_posterior_reemplaza_la_que_espera(self):
+        solo_local = self._profesional(LOCAL, 'guardia', '27444555')
+        paciente = self._ingresar(LOCAL, 'Huerfano', profesional=solo_local)
+        sincronizacion.sincronizar(LOCAL, CENTRAL)
+
+        # Se corrige el profesional del triage en la local: la nueva versión se aplica
+        with _en_base(LOCAL):
+            triage = SignosVitales.objects.get(paciente=paciente)
+            triage.profesional = self.profesionales[LOCAL]
+            triage.save()
+        resultado = sincronizacion.sincronizar(LOCAL, CENTRAL)
+        self.assertEqual((resultado.signos_vitales, resultado.triages_en_espera), (1, 0))
+        self.assertFalse(TriageEnEspera.objects.using(CENTRAL).exists())
+        self.assertBasesIguales()
+
+        # Y una baja del paciente saca de la espera a sus triages
+        otro = self._ingresar(LOCAL, 'Otro', profesional=solo_local)
+        sincronizacion.sincronizar(LOCAL, CENTRAL)
+        self.assertTrue(TriageEnEspera.objects.using(CENTRAL).exists())
+        with _en_base(LOCAL):
+            otro.delete()
+        self.assertEqual(sincronizacion.sincronizar(LOCAL, CENTRAL).triages_en_espera, 0)
+        self.assertBasesIguales()
+
+
+class FusionTests(SincronizacionBase):
+    """Cambios del mismo paciente en las dos bases desconectadas convergen en cualquier orden."""
+
+    ORDENES = ((LOCAL, CENTRAL), (CENTRAL, LOCAL))
+
+    def _atender(self, alias, paciente, destino):
+        """Destino final registrado en `alias`, con su entrada en el diario (como la vista)."""
+        with _en_base(alias):
+            paciente.marcar_atendido(destino, self.profesionales[alias])
+            sincronizacion.registrar_cambios([Paciente.objects.get(pk=paciente.pk)])
+
+    def _converger(self, primero, segundo):
+        """Sincroniza en los dos sentidos hasta que no queda nada por enviar."""
+        for _ in range(3):
+            sincronizacion.sincronizar(primero, segundo)
+            sincronizacion.sincronizar(segundo, primero)
+            if not sincronizacion.pendientes(primero, segundo) and not sincronizacion.pendientes(segundo, primero):
+                break
+        self.assertBasesIguales()
+
+    def test_mismo_dni_en_las_dos_bases(self):
+        for primero, segundo in self.ORDENES:
+            with self.subTest(primero=primero):
+                dni = '40123456' if primero == LOCAL else '40654321'
+                # La central lo registra antes: su uid sobrevive en los dos sentidos
+                en_central = self._ingresar(CENTRAL, 'Ana', dni=dni)
+                en_local = self._ingresar(LOCAL, 'Ana', dni=dni, frecuencia_respiratoria=25)
+                self._converger(primero, segundo)
+
+                for alias in (CENTRAL, LOCAL):
+                    paciente = Paciente.objects.using(alias).get(dni=dni)
+                    self.assertEqual(paciente.uid, en_central.uid)
+                    self.assertEqual(paciente.signos_vitales.count(), 2)
+                    self.assertEqual(
+                        AliasPaciente.objects.using(alias).get(paciente=paciente).uid, en_local.uid
+                    )
+                    # Cada base anota una vez la fusión que hizo (los conflictos no viajan)
+                    conflictos = ConflictoSincronizacion.objects.using(alias).filter(uid=en_central.uid)
+                    self.assertEqual(list(conflictos.values_list('tipo', flat=True)), ['DNI_DUPLICADO'])
+                    self.assertIn(str(en_local.uid), conflictos.get().resolucion)
+
+    def test_dos_destinos_finales(self):
+        for primero, segundo in self.ORDENES:
+            with self.subTest(primero=primero):
+                atendido = self._ingresar(LOCAL, 'Atendido')
+                editado = self._ingresar(LOCAL, 'Editado')
+                self._converger(LOCAL, CENTRAL)
+
+                # Desconectadas: la local le da el alta antes de que la central lo pase a UTI
+                self._atender(LOCAL, atendido, 'ALTA')
+                self._atender(CENTRAL, Paciente.objects.using(CENTRAL).get(uid=atendido.uid), 'PASE_A_UTI')
+                # Una edición posterior de datos, con el estado en espera, no deshace la atención
+                self._atender(LOCAL, editado, 'PASE_A_SALA')
+                with _en_base(CENTRAL):
+                    copia = Paciente.objects.get(uid=editado.uid)
+                    copia.nombre = 'Corregido'
+                    copia.save()
+                self._converger(primero, segundo)
+
+                for alias in (CENTRAL, LOCAL):
+                    base = Paciente.objects.using(alias)
+                    # Vale el primer destino registrado
+                    self.assertEqual(base.get(uid=atendido.uid).estado_atencion, 'ALTA')
+                    self.assertEqual(
+                        (base.get(uid=editado.uid).nombre, base.get(uid=editado.uid).estado_atencion),
+                        ('Corregido', 'PASE_A_SALA'),
+                    )
+                    conflictos = ConflictoSincronizacion.objects.using(alias)
+                    self.assertEqual(
+                        list(conflictos.filter(uid=atendido.uid).values_list('tipo', flat=True)), ['ATENCION']
+                    )
+                    self.assertFalse(conflictos.filter(uid=editado.uid).exists())
+
+    def test_triage_con_el_uid_fusionado(self):
+        en_central = self._ingresar(CENTRAL, 'Ana', dni='40123456')
+        en_local = self._ingresar(LOCAL, 'Ana', dni='40123456')
+        sincronizacion.sincronizar(LOCAL, CENTRAL)
+
+        # La local todavía no recibió la fusión: re-triage con su uid (solo, sin el paciente en el lote)
+        with _en_base(LOCAL):
+            SignosVitales.objects.create(
+                paciente=en_local, profesional=self.profesionales[LOCAL],
+                **dict(NORMALES, frecuencia_respiratoria=25, saturacion_oxigeno=91, frecuencia_cardiaca=95),
+            )
+        resultado = sincronizacion.sincronizar(LOCAL, CENTRAL)
+        self.assertEqual((resultado.pacientes, resultado.signos_vitales, resultado.triages_en_espera), (0, 1, 0))
+
+        paciente = Paciente.objects.using(CENTRAL).get(dni='40123456')
+        self.assertEqual(paciente.uid, en_central.uid)
+        self.assertFalse(Paciente.objects.using(CENTRAL).filter(uid=en_local.uid).exists())
+        self.assertEqual(paciente.signos_vitales.count(), 3)
+        self.assertEqual(paciente.ultimo_nivel_urgencia, 'ROJO')
+
+        # Y la atención con el uid fusionado completa al que quedó
+        self._atender(LOCAL, en_local, 'PASE_A_SALA')
+        sincronizacion.sincronizar(LOCAL, CENTRAL)
+        paciente.refresh_from_db()
+        self.assertEqual((paciente.uid, paciente.estado_atencion), (en_central.uid, 'PASE_A_SALA'))
+        self._converger(LOCAL, CENTRAL)
+
+
+class ConmutacionTests(SincronizacionBase):
+    """Corte y vuelta de la central con una prueba de salud simulada (monitor sin thread)."""
+
+    def setUp(self):
+        self.central_sana = True
+        self.monitor = conmutacion.MonitorSalud(verificar=lambda: self.central_sana)
+        conmutacion._monitor = self.monitor
+        self.addCleanup(setattr, conmutacion, '_monitor', None)
+        self.client.force_login(User.objects.using(CENTRAL).get(username='enfermera'))
+
+    def _atender(self, paciente_id, uid, destino='ALTA'):
+        return self.client.post(
+            reverse('triage:marcar_atendido', args=[paciente_id]),
+            {'destino': destino, 'uid': str(uid)}, content_type='application/json',
+        )
+
+    def test_sin_uid_se_atiende_por_id(self):
+        paciente = self._ingresar(CENTRAL, 'SinUid')
+        for datos in ({'destino': 'PASE_A_UTI'}, {'destino': 'ALTA', 'uid': ''}):
+            with self.subTest(datos=datos):
+                respuesta = self.client.post(reverse('triage:marcar_atendido', args=[paciente.id]), datos)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertEqual(Paciente.objects.get(id=paciente.id).estado_atencion, datos['destino'])
+
+    def test_corte_y_vuelta_de_la_central(self):
+        atendido_en_corte = self._ingresar(CENTRAL, 'Antes')
+        self.assertEqual(self.monitor.revisar(), CENTRAL)
+        self.assertTrue(Paciente.objects.using(LOCAL).filter(uid=atendido_en_corte.uid).exists())
+        # Escrito en la central justo antes del corte: la local no lo llegó a recibir
+        solo_central = self._ingresar(CENTRAL, 'SoloCentral')
+
+        # Corte: una prueba fallida no conmuta, dos sí, y los dashboards resincronizan
+        self.central_sana = False
+        with mock.patch.object(eventos, 'publicar', wraps=eventos.publicar) as publicar:
+            self.assertEqual(self.monitor.revisar(), CENTRAL)
+            publicar.assert_not_called()
+            self.assertEqual(self.monitor.revisar(), LOCAL)
+        publicar.assert_called_once_with('resincronizar', {})
+        self.assertEqual(conmutacion.base_activa(), LOCAL)
+
+        # Las escrituras van a la local; el mismo id es otro paciente en cada base
+        en_corte = Paciente.objects.create(nombre='EnCorte', apellido='Prueba', edad=30)
+        SignosVitales.objects.create(
+            paciente=en_corte, profesional=self.profesionales[LOCAL],
+            **dict(NORMALES, frecuencia_respiratoria=25, saturacion_oxigeno=91, frecuencia_cardiaca=95),
+        )
+        self.assertEqual(en_corte._state.db, LOCAL)
+        self.assertEqual(en_corte.id, solo_central.id)
+        self.assertFalse(Paciente.objects.using(CENTRAL).filter(uid=en_corte.uid).exists())
+
+        # La cuenta de la local tiene otro hash de contraseña: se vuelve a iniciar sesión
+        self.client.force_login(User.objects.using(LOCAL).get(username='enfermera'))
+        # Un cliente con la lista de antes del corte no atiende a otro paciente por el id
+        respuesta = self._atender(solo_central.id, solo_central.uid)
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertTrue(respuesta.json()['resincronizar'])
+        self.assertEqual(Paciente.objects.using(LOCAL).get(uid=en_corte.uid).estado_atencion, 'ESPERANDO')
+        # Con la lista recargada, sí
+        local = Paciente.objects.using(LOCAL).get(uid=atendido_en_corte.uid)
+        self.assertEqual(self._atender(local.id, local.uid, 'PASE_A_SALA').status_code, 200)
+
+        # Sigue caída: se queda en la local
+        self.assertEqual(self.monitor.revisar(), LOCAL)
+
+        # Vuelta: primero se envía lo del corte, después se conmuta
+        self.central_sana = True
+        with mock.patch.object(eventos, 'publicar', wraps=eventos.publicar) as publicar:
+            self.assertEqual(self.monitor.revisar(), CENTRAL)
+        publicar.assert_called_once_with('resincronizar', {})
+        self.assertEqual(sincronizacion.pendientes(LOCAL, CENTRAL), 0)
+
+        central = Paciente.objects.using(CENTRAL)
+        self.assertEqual(central.get(uid=atendido_en_corte.uid).estado_atencion, 'PASE_A_SALA')
+        recibido = central.get(uid=en_corte.uid)
+        self.assertNotEqual(recibido.id, solo_central.id)
+        self.assertEqual(recibido.ultimo_nivel_urgencia, 'ROJO')
+        self.assertEqual(recibido.ultimo_triage.paciente_id, recibido.id)
+        self.assertEqual(central.get(id=solo_central.id).uid, solo_central.uid)
+        # La misma ronda deja a la local al día con la central
+        self.assertBasesIguales()
+
+        # De vuelta en la central los ids son los de la central
+        self.client.force_login(User.objects.using(CENTRAL).get(username='enfermera'))
+        respuesta = self._atender(recibido.id, recibido.uid)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(central.get(uid=en_corte.uid).estado_atencion, 'ALTA')
+        self.assertEqual(central.get(uid=solo_central.uid).estado_atencion, 'ESPERANDO')
+
+
+# ----------------------------------------------------------------------
+# Reportes en segundo plano
+# ----------------------------------------------------------------------
+
+class ReportesCompartidosTests(TestCase):
+    """El archivo de un reporte se comparte entre quienes piden los mismos datos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.medicos = [
+            Profesional.objects.create(
+                user=User.objects.create_user(usuario, password='x', first_name=nombre),
+                dni=dni, tipo='medico',
+            )
+            for usuario, nombre, dni in (('primera', 'Primera', '20111111'), ('segunda', 'Segunda', '20222222'))
+        ]
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        configuracion = override_settings(REPORTES_DIR=directorio.name)
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+        # El worker corre acá mismo, dentro de la transacción del test
+        conexiones = mock.patch.object(trabajos, 'close_old_connections')
+        conexiones.start()
+        self.addCleanup(conexiones.stop)
+
+    def _generar(self, solicitante):
+        with self.captureOnCommitCallbacks():
+            trabajo = trabajos.solicitar('DIARIO_PDF', timezone.localdate(), solicitante=solicitante)
+        trabajos._ejecutar(trabajo.id)
+        return trabajo
+
+    def test_el_archivo_no_nombra_a_quien_lo_pidio(self):
+        texto_original = pdf.Hoja.texto
+        with mock.patch.object(pdf.Hoja, 'texto', autospec=True, side_effect=texto_original) as texto:
+            self._generar(self.medicos[0])
+        escrito = ' '.join(llamada.args[2] for llamada in texto.call_args_list)
+        self.assertIn('REPORTE DIARIO', escrito)
+        self.assertNotIn('Generado por', escrito)
+        self.assertNotIn('Primera', escrito)
+
+    def test_cada_descarga_queda_registrada(self):
+        primera, segunda = self.medicos
+        trabajo = self._generar(primera)
+
+        self.client.force_login(segunda.user)
+        respuesta = self.client.get(reverse('triage:reporte_diario'))
+        self.assertEqual(respuesta.status_code, 200)
+        respuesta.close()
+        self.assertEqual(TrabajoReporte.objects.count(), 1)
+
+        self.client.force_login(primera.user)
+        self.client.get(reverse('triage:descargar_reporte', args=[trabajo.id])).close()
+        self.assertEqual(
+            list(DescargaReporte.objects.filter(trabajo=trabajo).order_by('id').values_list('profesional', flat=True)),
+            [segunda.id, primera.id],
+        )
+
+        # Reencolar un trabajo compartido no cambia quién lo pidió primero
+        TrabajoReporte.objects.filter(id=trabajo.id).update(estado='ERROR')
+        with self.captureOnCommitCallbacks():
+            trabajos.solicitar('DIARIO_PDF', trabajo.desde, solicitante=segunda)
+        trabajo.refresh_from_db()
+        self.assertEqual((trabajo.estado, trabajo.solicitado_por), ('PENDIENTE', primera))
+
+
+# ----------------------------------------------------------------------
+# API de la lista de espera
+# ----------------------------------------------------------------------
+
+class ListaPacientesBase(TestCase):
+    """Índice de cola propio, reloj fijo (el ETag cambia con el minuto) y sesión iniciada."""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = User.objects.create_user('enfermera', password='x')
+        cls.profesional = Profesional.objects.create(user=usuario, dni='30111222', tipo='enfermero')
+
+    def setUp(self):
+        cache.clear()
+        self.cola = cola.ColaPrioridad()
+        for modulo in ('apps.triage.views', 'apps.triage.signals'):
+            parche = mock.patch(f'{modulo}.cola_espera', self.cola)
+            parche.start()
+            self.addCleanup(parche.stop)
+        self.ahora = timezone.now().replace(second=30, microsecond=0)
+        self._reloj(self.ahora)
+        self.client.force_login(self.profesional.user)
+
+    def _reloj(self, momento):
+        parche = mock.patch('django.utils.timezone.now', return_value=momento)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def _ingresar(self, nombre, espera=timedelta(minutes=5), **signos):
+        """Paciente con triage; los signals actualizan la cola al confirmar, como en producción."""
+        with self.captureOnCommitCallbacks(execute=True):
+            paciente = Paciente.objects.create(
+                nombre=nombre, apellido='Prueba', edad=40, fecha_ingreso=self.ahora - espera
+            )
+            SignosVitales.objects.create(paciente=paciente, profesional=self.profesional, **dict(NORMALES, **signos))
+        return paciente
+
+    def _retriar(self, paciente, **signos):
+        with self.captureOnCommitCallbacks(execute=True):
+            SignosVitales.objects.create(paciente=paciente, profesional=self.profesional, **dict(NORMALES, **signos))
+
+    def _atender(self, paciente):
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(
+                reverse('triage:marcar_atendido', args=[paciente.id]), {'destino': 'ALTA', 'uid': str(paciente.uid)},
+                content_type='application/json',
+            )
+        self.assertEqual(respuesta.status_code, 200)
+
+    def _lista(self, **parametros):
+        encabezados = {}
+        if 'etag' in parametros:
+            encabezados['HTTP_IF_NONE_MATCH'] = parametros.pop('etag')
+        return self.client.get(reverse('triage:api_lista_pacientes'), parametros, **encabezados)
+
+
+class ListaPacientesApiTests(ListaPacientesBase):
+    """GET condicional (ETag/304) y sincronización por delta (?since=)."""
+
+    def test_revalidacion_con_etag(self):
+        primero = self._ingresar('Primero')
+        respuesta = self._lista()
+        self.assertEqual(respuesta.status_code, 200)
+        etag, version = respuesta['ETag'], respuesta['X-Cola-Version']
+        self.assertEqual([fila['id'] for fila in respuesta.json()], [primero.id])
+        espera = respuesta.json()[0]['tiempo_espera_minutos']
+        self.assertEqual(respuesta['Cache-Control'], 'private, no-cache')
+
+        # El cliente revalida con el ETag que recibió: 304 sin cuerpo, mismos validadores
+        respuesta = self._lista(etag=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta.content, b'')
+        self.assertEqual((respuesta['ETag'], respuesta['X-Cola-Version']), (etag, version))
+
+        # Un cambio en la cola: cuerpo nuevo con otro ETag
+        segundo = self._ingresar('Segundo')
+        respuesta = self._lista(etag=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+        self.assertEqual({fila['id'] for fila in respuesta.json()}, {primero.id, segundo.id})
+        etag = respuesta['ETag']
+        self.assertEqual(self._lista(etag=etag).status_code, 304)
+
+        # Otro minuto: los tiempos de espera cambiaron aunque la cola no
+        self._reloj(self.ahora + timedelta(minutes=1))
+        respuesta = self._lista(etag=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()[0]['tiempo_espera_minutos'], espera + 1)
+
+    def test_delta_desde_una_version(self):
+        retriado = self._ingresar('Retriado')
+        atendido = self._ingresar('Atendido')
+        sin_cambios = self._ingresar('SinCambios')
+        desde = int(self._lista()['X-Cola-Version'])
+
+        agregado = self._ingresar('Agregado')
+        self._retriar(retriado, frecuencia_respiratoria=25, saturacion_oxigeno=91, frecuencia_cardiaca=95)
+        self._atender(atendido)
+        # Entra y sale dentro del intervalo: el cliente nunca lo vio, no va en el delta
+        fugaz = self._ingresar('Fugaz')
+        self._atender(fugaz)
+
+        respuesta = self._lista(since=desde)
+        delta = respuesta.json()
+        self.assertEqual(delta['completo'], False)
+        self.assertEqual(delta['version'], int(respuesta['X-Cola-Version']))
+        self.assertEqual(
+            (delta['agregados'], delta['actualizados'], delta['quitados']),
+            ([agregado.id], [retriado.id], [atendido.id]),
+        )
+        filas = {fila['id']: fila for fila in delta['pacientes']}
+        self.assertEqual(set(filas), {agregado.id, retriado.id})
+        self.assertEqual(filas[retriado.id]['nivel_urgencia'], 'ROJO')
+        self.assertNotIn(sin_cambios.id, filas)
+
+        # Al día: delta vacío
+        delta = self._lista(since=delta['version']).json()
+        self.assertEqual((delta['agregados'], delta['actualizados'], delta['quitados']), ([], [], []))
+
+    def test_lista_completa_si_vencio_el_registro_de_cambios(self):
+        anterior = self._ingresar('Anterior')
+        desde = int(self._lista()['X-Cola-Version'])
+        nuevo = self._ingresar('Nuevo')
+        # El registro de la generación siguiente venció (TIMEOUT_CAMBIOS)
+        cache.delete(cola._clave_cambios(desde + 1))
+
+        for since in (desde, desde + 1000):
+            with self.subTest(since=since):
+                respuesta = self._lista(since=since)
+                datos = respuesta.json()
+                self.assertEqual(datos['completo'], True)
+                self.assertEqual(datos['version'], int(respuesta['X-Cola-Version']))
+                self.assertEqual({fila['id'] for fila in datos['pacientes']}, {anterior.id, nuevo.id})
+
+
+class PaginaCursorTests(ListaPacientesBase):
+    """?cursor=: recorrer la cola por páginas mientras entran y salen pacientes."""
+
+    def _pagina(self, cursor='', limite=3):
+        respuesta = self._lista(cursor=cursor, limite=limite)
+        self.assertEqual(respuesta.status_code, 200)
+        return [fila['id'] for fila in respuesta.json()], respuesta.get('X-Cursor-Siguiente')
+
+    def test_recorrido_sin_repetidos_ni_salteados(self):
+        # Rojos graves recientes adelante de rojos leves que están por cumplir 30 minutos
+        for i in range(4):
+            self._ingresar(f'Grave{i}', espera=timedelta(minutes=2 + i), **ROJO_GRAVE)
+            self._ingresar(f'Leve{i}', espera=timedelta(minutes=26 + i), **ROJO)
+            self._ingresar(f'Verde{i}', espera=timedelta(minutes=10 * i + 1))
+        orden_inicial, siguiente = self._pagina(limite=100)
+        self.assertIsNone(siguiente)
+
+        vistos, atendidos, cursor = [], set(), ''
+        for vuelta in itertools.count():
+            ids, cursor = self._pagina(cursor)
+            vistos += ids
+            if cursor is None:
+                break
+            # Entre página y página: entra uno, sale uno ya visto y otro todavía no
+            self._ingresar(f'Nuevo{vuelta}', espera=timedelta(minutes=vuelta), **(ROJO_GRAVE if vuelta % 2 else {}))
+            pendientes = [i for i in orden_inicial if i not in vistos and i not in atendidos]
+            for paciente_id in (vistos[0], pendientes[-1] if pendientes else None):
+                if paciente_id is not None and paciente_id not in atendidos:
+                    self._atender(Paciente.objects.get(pk=paciente_id))
+                    atendidos.add(paciente_id)
+            # A mitad del recorrido los leves pasan los 30 minutos y suben adelante de los graves
+            if vuelta == 0:
+                self._reloj(self.ahora + timedelta(minutes=40))
+
+        self.assertEqual(len(vistos), len(set(vistos)))
+        # Los que estuvieron en la cola todo el recorrido salen una vez, en el orden del inicio
+        presentes = [i for i in orden_inicial if i not in atendidos]
+        self.assertEqual([i for i in vistos if i in presentes], presentes)
+
+    def test_cursor_alterado(self):
+        for i in range(4):
+            self._ingresar(f'Paciente{i}')
+        _, cursor = self._pagina()
+        self.assertIsNotNone(cursor)
+        alterado = cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B')
+        for texto in (alterado, 'no-es-un-cursor', cursor.split(':')[0]):
+            with self.subTest(cursor=texto):
+                respuesta = self._lista(cursor=texto)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertEqual(respuesta.json(), {'error': 'Cursor inválido.'})
+
+
+class EventosTests(TestCase):
+    """Flujo SSE: cupo por proceso y reenvío al reconectar (distribuidor sin thread)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = User.objects.create_user('enfermera', password='x')
+        Profesional.objects.create(user=usuario, dni='30111222', tipo='enfermero')
+        cls.usuario = usuario
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+        self.cupo = eventos.Cupo(1)
+        for nombre, valor in (('cupo_sse', self.cupo), ('distribuidor', self._distribuidor())):
+            parche = mock.patch.object(eventos, nombre, valor)
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def _distribuidor(self):
+        """Distribuidor que lee el journal solo cuando el test llama a _leer_nuevos()."""
+        distribuidor = eventos.Distribuidor()
+        distribuidor._ultimo = cache_utils.generacion(eventos.EVENTOS)
+        distribuidor._thread = mock.Mock()
+        return distribuidor
+
+    def _publicar(self, cantidad):
+        numeros = [eventos.publicar('paciente_agregado', {'id': numero}) for numero in range(cantidad)]
+        eventos.distribuidor._leer_nuevos()
+        return numeros
+
+    def _conectar(self, ultimo=None, **extra):
+        # El RequestFactory simula un servidor sin threads; acá sí los hay, salvo que se pida
+        extra.setdefault('wsgi.multithread', True)
+        if ultimo is not None:
+            extra['HTTP_LAST_EVENT_ID'] = str(ultimo)
+        return self.client.get(reverse('triage:api_eventos'), **extra)
+
+    def _leer(self, respuesta, cantidad):
+        """Los primeros `cantidad` mensajes del flujo (sin llegar a esperar otro evento)."""
+        contenido = iter(respuesta.streaming_content)
+        return [next(contenido).decode() for _ in range(cantidad)]
+
+    def test_el_cierre_libera_el_cupo(self):
+        respuesta = self._conectar()
+        self.assertEqual(respuesta.status_code, 200)
+
+        # Sin lugar: 503 con el reintento para EventSource y para proxies
+        sin_cupo = self._conectar()
+        self.assertEqual(sin_cupo.status_code, 503)
+        self.assertEqual(sin_cupo['Retry-After'], '30')
+        self.assertEqual(sin_cupo.content, b'retry: 30000\n\n')
+
+        # El servidor cierra la respuesta sin haber empezado el flujo: el lugar vuelve
+        respuesta.close()
+        respuesta.close()
+        self.assertEqual(self._conectar().status_code, 200)
+
+    def test_servidor_sin_threads(self):
+        self.assertEqual(self._conectar(**{'wsgi.multithread': False}).status_code, 503)
+        # No se tomó lugar en el cupo
+        self.assertTrue(self.cupo.tomar())
+
+    def test_reenvio_desde_last_event_id(self):
+        numeros = self._publicar(5)
+        respuesta = self._conectar(ultimo=numeros[1])
+        self.addCleanup(respuesta.close)
+        mensajes = self._leer(respuesta, 4)
+        self.assertEqual(mensajes[0], 'retry: 3000\n\n')
+        self.assertEqual(
+            mensajes[1:],
+            [
+                f'id: {numero}\nevent: paciente_agregado\ndata: {{"id": {indice}}}\n\n'
+                for indice, numero in enumerate(numeros) if indice > 1
+            ],
+        )
+
+    def test_hueco_pide_resincronizar(self):
+        # El proceso ya no tiene en memoria los eventos que siguen al del cliente
+        with mock.patch.object(eventos, 'MAX_EVENTOS_MEMORIA', 3):
+            eventos.distribuidor = self._distribuidor()
+        numeros = self._publicar(6)
+
+        respuesta = self._conectar(ultimo=numeros[0])
+        self.addCleanup(respuesta.close)
+        self.assertEqual(self._leer(respuesta, 2)[1], f'id: {numeros[-1]}\nevent: resincronizar\ndata: {{}}\n\n')
+
+        # Tras recargar, reconecta desde el último y sigue con lo nuevo
+        nuevo, = self._publicar(1)
+        respuesta.close()
+        respuesta = self._conectar(ultimo=numeros[-1])
+        self.addCleanup(respuesta.close)
+        self.assertIn(f'id: {nuevo}\nevent: paciente_agregado', self._leer(respuesta, 2)[1])
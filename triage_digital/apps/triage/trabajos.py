@@ -0,0 +1,204 @@
+"""
+⚙️ Generación de reportes en segundo plano.
+
+El request solo registra un TrabajoReporte (tipo, período y huella de los
+datos) y vuelve enseguida; un pool de threads por proceso renderiza el
+archivo y lo guarda en REPORTES_DIR. Mientras la huella no cambie, las
+descargas siguientes sirven ese archivo sin volver a renderizar. Por eso el
+archivo no nombra a quien lo pidió: cada descarga queda en DescargaReporte.
+
+Los trabajos viven en la base: cualquier proceso puede informar el estado,
+y un trabajo que quedó colgado (proceso reiniciado) se vuelve a encolar en
+el próximo pedido.
+"""
+import logging
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import csv_reportes, pdf, reportes
+from .models import DescargaReporte, TrabajoReporte
+
+logger = logging.getLogger(__name__)
+
+
+# render(destino, desde, hasta) escribe el archivo; huella(desde, hasta)
+# identifica los datos que muestra (igual huella, mismo archivo)
+TipoReporte = namedtuple('TipoReporte', 'render huella extension content_type')
+
+
+def _reporte_diario_pdf(destino, desde, hasta):
+    pdf.reporte_diario(destino, desde)
+
+
+TIPOS = {
+    'DIARIO_PDF': TipoReporte(_reporte_diario_pdf, reportes.huella, 'pdf', 'application/pdf'),
+    # Períodos: solo resúmenes, sin detalle de pacientes
+    'PERIODO_PDF': TipoReporte(pdf.reporte_periodo, reportes.huella_series, 'pdf', 'application/pdf'),
+    'PERIODO_CSV': TipoReporte(csv_reportes.reporte_periodo, reportes.huella_series, 'csv', 'text/csv; charset=utf-8'),
+}
+
+# Un trabajo EN_PROCESO más viejo que esto se da por perdido y se reencola
+TIMEOUT_TRABAJO = timedelta(minutes=10)
+
+# Archivos y trabajos de más de una semana se borran en el mantenimiento
+RETENCION = timedelta(days=7)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def directorio():
+    """Directorio de los reportes generados (se crea si no existe)."""
+    ruta = Path(settings.REPORTES_DIR)
+    ruta.mkdir(parents=True, exist_ok=True)
+    return ruta
+
+
+def ruta_archivo(trabajo):
+    return directorio() / trabajo.archivo
+
+
+def content_type(trabajo):
+    return TIPOS[trabajo.tipo].content_type
+
+
+def nombre_descarga(trabajo):
+    """Nombre sugerido al navegador para el archivo."""
+    extension = TIPOS[trabajo.tipo].extension
+    if trabajo.desde == trabajo.hasta:
+        return f'reporte_triage_{trabajo.desde}.{extension}'
+    return f'reporte_triage_{trabajo.desde}_{trabajo.hasta}.{extension}'
+
+
+def disponible(trabajo):
+    """True si el trabajo terminó y su archivo sigue en disco."""
+    return trabajo.estado == 'LISTO' and bool(trabajo.archivo) and ruta_archivo(trabajo).exists()
+
+
+def _pool_de_trabajos():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=settings.REPORTES_WORKERS, thread_name_prefix='reportes'
+            )
+        return _pool
+
+
+def solicitar(tipo, desde, hasta=None, solicitante=None):
+    """
+    Trabajo para el reporte `tipo` de [desde, hasta] con los datos actuales.
+
+    Si ya hay uno listo (mismos datos) se devuelve tal cual; si falta, falló
+    o quedó colgado, se (re)encola. Nunca renderiza en el thread que llama.
+    `solicitante` queda como quien lo pidió primero.
+    """
+    hasta = hasta or desde
+    trabajo, creado = TrabajoReporte.objects.get_or_create(
+        tipo=tipo, desde=desde, hasta=hasta, huella=TIPOS[tipo].huella(desde, hasta),
+        defaults={'solicitado_por': solicitante},
+    )
+    if creado or _hay_que_reencolar(trabajo):
+        if not creado:
+            _reencolar(trabajo)
+        transaction.on_commit(
+            lambda: _pool_de_trabajos().submit(_ejecutar, trabajo.id),
+            using=router.db_for_write(TrabajoReporte),
+        )
+    return trabajo
+
+
+def _hay_que_reencolar(trabajo):
+    if trabajo.estado == 'ERROR':
+        return True
+    if trabajo.estado == 'LISTO':
+        return not ruta_archivo(trabajo).exists()
+    if trabajo.estado == 'EN_PROCESO':
+        return trabajo.fecha_inicio < timezone.now() - TIMEOUT_TRABAJO
+    # PENDIENTE: encolado en algún proceso; si ese proceso murió, también vence
+    return trabajo.fecha_solicitud < timezone.now() - TIMEOUT_TRABAJO
+
+
+def _reencolar(trabajo):
+    TrabajoReporte.objects.filter(id=trabajo.id).update(
+        estado='PENDIENTE', error='', fecha_inicio=None, fecha_fin=None,
+        fecha_solicitud=timezone.now(),
+    )
+    trabajo.refresh_from_db()
+
+
+def _tomar(trabajo_id):
+    """Marca el trabajo EN_PROCESO si nadie lo tomó (un solo worker por trabajo)."""
+    vencido = timezone.now() - TIMEOUT_TRABAJO
+    return TrabajoReporte.objects.filter(
+        Q(estado='PENDIENTE') | Q(estado='EN_PROCESO', fecha_inicio__lt=vencido),
+        id=trabajo_id,
+    ).update(estado='EN_PROCESO', fecha_inicio=timezone.now()) == 1
+
+
+def _ejecutar(trabajo_id):
+    """Renderiza el trabajo en un archivo temporal y lo publica con un rename atómico."""
+    close_old_connections()
+    try:
+        if not _tomar(trabajo_id):
+            return
+        trabajo = TrabajoReporte.objects.get(id=trabajo_id)
+        render, _, extension, _ = TIPOS[trabajo.tipo]
+        archivo = f'{trabajo.tipo.lower()}_{trabajo.desde}_{trabajo.hasta}_{trabajo.huella[:16]}.{extension}'
+        ruta = directorio() / archivo
+        temporal = ruta.with_name(f'.{archivo}.{os.getpid()}.tmp')
+
+        try:
+            with open(temporal, 'wb') as destino:
+                render(destino, trabajo.desde, trabajo.hasta)
+            os.replace(temporal, ruta)
+        except Exception as e:
+            temporal.unlink(missing_ok=True)
+            logger.error(f"Error generando reporte {trabajo_id}: {e}")
+            TrabajoReporte.objects.filter(id=trabajo_id).update(
+                estado='ERROR', error=str(e), fecha_fin=timezone.now()
+            )
+            return
+
+        TrabajoReporte.objects.filter(id=trabajo_id).update(
+            estado='LISTO', archivo=archivo, fecha_fin=timezone.now()
+        )
+        _borrar_versiones_anteriores(trabajo)
+    finally:
+        close_old_connections()
+
+
+def registrar_descarga(trabajo, profesional):
+    """Anota quién descargó el archivo del trabajo (puede ser otro que quien lo pidió)."""
+    return DescargaReporte.objects.create(trabajo=trabajo, profesional=profesional)
+
+
+def _borrar_versiones_anteriores(trabajo):
+    """Los reportes del mismo período con datos viejos ya no se van a servir."""
+    anteriores = TrabajoReporte.objects.filter(
+        tipo=trabajo.tipo, desde=trabajo.desde, hasta=trabajo.hasta,
+        fecha_solicitud__lt=trabajo.fecha_solicitud,
+    ).exclude(id=trabajo.id).exclude(estado__in=['PENDIENTE', 'EN_PROCESO'])
+    _borrar(anteriores)
+
+
+def _borrar(trabajos):
+    for trabajo in trabajos:
+        if trabajo.archivo:
+            ruta_archivo(trabajo).unlink(missing_ok=True)
+        trabajo.delete()
+
+
+def limpiar_trabajos():
+    """Borra trabajos y archivos de más de RETENCION (mantenimiento periódico)."""
+    viejos = TrabajoReporte.objects.filter(fecha_solicitud__lt=timezone.now() - RETENCION)
+    _borrar(viejos)
@@ -14,6 +14,10 @@ urlpatterns = [
     
     # 📊 Reporte PDF ultra-simple
     path('reporte-diario/', views.reporte_diario_pdf, name='reporte_diario'),
+    path('reporte-periodo/', views.reporte_periodo, name='reporte_periodo'),
+    path('exportar/', views.exportar_historial, name='exportar_historial'),
+    path('reportes/<int:trabajo_id>/', views.api_estado_reporte, name='estado_reporte'),
+    path('reportes/<int:trabajo_id>/descargar/', views.descargar_reporte, name='descargar_reporte'),
     
     # Gestión de pacientes - Solo lo esencial
     path('paciente/<int:paciente_id>/atendido/', views.marcar_atendido, name='marcar_atendido'),
@@ -21,6 +25,12 @@ urlpatterns = [
     # API simple
     path('api/lista-pacientes/', views.api_lista_pacientes, name='api_lista_pacientes'),
     path('api/estadisticas-dashboard/', views.api_estadisticas_dashboard, name='api_estadisticas_dashboard'),
+    path('api/ingreso-masivo/', views.api_ingreso_masivo, name='api_ingreso_masivo'),
+    path('api/eventos/', views.api_eventos, name='api_eventos'),
+    
+    # 🧩 Partes del dashboard y scripts versionados (cache de larga duración)
+    path('fragmentos/<slug:nombre>/', views.fragmento_dashboard, name='fragmento'),
+    path('js/<slug:version>/<slug:nombre>.js', views.script_estatico, name='script'),
     
     # 📱 PWA - Progressive Web App
     path('manifest.json', views.manifest, name='manifest'),
@@ -1,7 +1,92 @@
 """Calculadora NEWS Score - Lógica central de triage médico."""
 
-from typing import Dict, Tuple
-from decimal import Decimal
+from typing import Dict, List, Sequence, Tuple
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+
+
+# 📋 BANDAS NEWS - ÚNICA FUENTE DE VERDAD DEL PUNTAJE
+# Cada parámetro: (mínimo, máximo) del validador de SignosVitales y bandas
+# (límite superior inclusivo, puntaje). La última banda cubre hasta el máximo.
+# La temperatura se expresa en décimas de grado (36.5 °C -> 365).
+BANDAS_NEWS = {
+    'frecuencia_respiratoria': ((1, 60), ((8, 3), (11, 1), (20, 0), (24, 2), (60, 3))),
+    'saturacion_oxigeno': ((50, 100), ((91, 3), (93, 2), (95, 1), (100, 0))),
+    'presion_sistolica': ((50, 300), ((90, 3), (100, 2), (110, 1), (219, 0), (300, 3))),
+    'frecuencia_cardiaca': ((20, 200), ((40, 3), (50, 1), (90, 0), (110, 1), (130, 2), (200, 3))),
+    'temperatura': ((300, 450), ((350, 3), (360, 1), (380, 0), (390, 2), (450, 3))),
+}
+
+# Escala AVPU: solo 'A' (alerta) puntúa 0
+PUNTAJES_CONCIENCIA = {'A': 0, 'V': 3, 'P': 3, 'U': 3}
+
+# Puntaje total máximo: 6 parámetros x 3 puntos
+PUNTAJE_MAXIMO = 18
+
+
+class _TablaNEWS(tuple):
+    """
+    Tupla de puntajes indexada por (valor - mínimo).
+
+    Guarda además un diccionario valor -> puntaje para resolver columnas
+    enteras con map() sin aritmética de índices por cada elemento.
+    """
+
+    def __new__(cls, rango: Tuple[int, int], bandas: Tuple[Tuple[int, int], ...]):
+        minimo, maximo = rango
+        puntajes = []
+        for valor in range(minimo, maximo + 1):
+            puntajes.append(next(p for limite, p in bandas if valor <= limite))
+        tabla = super().__new__(cls, puntajes)
+        tabla.minimo = minimo
+        tabla.maximo = maximo
+        tabla.por_valor = dict(zip(range(minimo, maximo + 1), tabla))
+        return tabla
+
+    def puntaje(self, valor: int) -> int:
+        """Puntaje de un valor, recortado al dominio (las bandas extremas son abiertas)."""
+        return self[min(max(int(valor), self.minimo), self.maximo) - self.minimo]
+
+
+@lru_cache(maxsize=1024)
+def indice_temperatura(temperatura) -> int:
+    """Convierte una temperatura en décimas de grado (36.5 -> 365) redondeando a la décima."""
+    decimas = (Decimal(str(temperatura)) * 10).to_integral_value(rounding=ROUND_HALF_UP)
+    return int(decimas)
+
+
+def _buscar_en_tabla(tabla: _TablaNEWS, valores: Sequence[int]) -> List[int]:
+    """Resuelve una columna completa de valores con una tabla precalculada."""
+    puntajes = list(map(tabla.por_valor.get, valores))
+    if None in puntajes:
+        # Valores fuera de rango o no enteros: camino lento solo para esos
+        puntajes = [
+            tabla.puntaje(valor) if puntaje is None else puntaje
+            for valor, puntaje in zip(valores, puntajes)
+        ]
+    return puntajes
+
+
+def _clasificar(puntaje: int) -> str:
+    """Clasificación por umbrales NEWS (ROJO >= 7, AMARILLO >= 5)."""
+    if puntaje >= 7:
+        return 'ROJO'
+    elif puntaje >= 5:
+        return 'AMARILLO'
+    return 'VERDE'
+
+
+# 🚀 TABLAS PRECALCULADAS - Se construyen una sola vez al importar
+TABLAS_NEWS = {parametro: _TablaNEWS(*definicion) for parametro, definicion in BANDAS_NEWS.items()}
+TABLA_FRECUENCIA_RESPIRATORIA = TABLAS_NEWS['frecuencia_respiratoria']
+TABLA_SATURACION_OXIGENO = TABLAS_NEWS['saturacion_oxigeno']
+TABLA_PRESION_SISTOLICA = TABLAS_NEWS['presion_sistolica']
+TABLA_FRECUENCIA_CARDIACA = TABLAS_NEWS['frecuencia_cardiaca']
+TABLA_TEMPERATURA = TABLAS_NEWS['temperatura']
+TABLA_NIVEL_CONCIENCIA = PUNTAJES_CONCIENCIA
+
+# Clasificación indexada por puntaje total
+TABLA_CLASIFICACION = tuple(_clasificar(total) for total in range(PUNTAJE_MAXIMO + 1))
 
 
 class CalculadoraNEWS:
@@ -32,16 +117,7 @@ class CalculadoraNEWS:
         Returns:
             Puntaje NEWS (0-3)
         """
-        if frecuencia <= 8:
-            return 3
-        elif 9 <= frecuencia <= 11:
-            return 1
-        elif 12 <= frecuencia <= 20:
-            return 0
-        elif 21 <= frecuencia <= 24:
-            return 2
-        else:  # >= 25
-            return 3
+        return TABLA_FRECUENCIA_RESPIRATORIA.puntaje(frecuencia)
     
     @staticmethod
     def calcular_puntaje_saturacion_oxigeno(saturacion: int) -> int:
@@ -54,14 +130,7 @@ class CalculadoraNEWS:
         Returns:
             Puntaje NEWS (0-3)
         """
-        if saturacion <= 91:
-            return 3
-        elif 92 <= saturacion <= 93:
-            return 2
-        elif 94 <= saturacion <= 95:
-            return 1
-        else:  # >= 96
-            return 0
+        return TABLA_SATURACION_OXIGENO.puntaje(saturacion)
     
     @staticmethod
     def calcular_puntaje_presion_sistolica(presion: int) -> int:
@@ -74,16 +143,7 @@ class CalculadoraNEWS:
         Returns:
             Puntaje NEWS (0-3)
         """
-        if presion <= 90:
-            return 3
-        elif 91 <= presion <= 100:
-            return 2
-        elif 101 <= presion <= 110:
-            return 1
-        elif 111 <= presion <= 219:
-            return 0
-        else:  # >= 220
-            return 3
+        return TABLA_PRESION_SISTOLICA.puntaje(presion)
     
     @staticmethod
     def calcular_puntaje_frecuencia_cardiaca(frecuencia: int) -> int:
@@ -96,18 +156,7 @@ class CalculadoraNEWS:
         Returns:
             Puntaje NEWS (0-3)
         """
-        if frecuencia <= 40:
-            return 3
-        elif 41 <= frecuencia <= 50:
-            return 1
-        elif 51 <= frecuencia <= 90:
-            return 0
-        elif 91 <= frecuencia <= 110:
-            return 1
-        elif 111 <= frecuencia <= 130:
-            return 2
-        else:  # >= 131
-            return 3
+        return TABLA_FRECUENCIA_CARDIACA.puntaje(frecuencia)
     
     @staticmethod
     def calcular_puntaje_nivel_conciencia(nivel: str) -> int:
@@ -120,34 +169,24 @@ class CalculadoraNEWS:
         Returns:
             Puntaje NEWS (0-3)
         """
-        if nivel == 'A':  # Alerta
-            return 0
-        else:  # V, P, U
-            return 3
+        # Cualquier valor distinto de 'A' se considera alterado
+        return TABLA_NIVEL_CONCIENCIA.get(nivel, 3)
     
     @staticmethod
     def calcular_puntaje_temperatura(temperatura: Decimal) -> int:
         """
         Calcula el puntaje para temperatura corporal.
         
+        Redondea a la décima (35.05 -> 35.1) antes de buscar en la tabla,
+        así ningún valor queda entre dos bandas.
+        
         Args:
             temperatura: Temperatura en grados Celsius
             
         Returns:
             Puntaje NEWS (0-3)
         """
-        temp = float(temperatura)
-        
-        if temp <= 35.0:
-            return 3
-        elif 35.1 <= temp <= 36.0:
-            return 1
-        elif 36.1 <= temp <= 38.0:
-            return 0
-        elif 38.1 <= temp <= 39.0:
-            return 2
-        else:  # >= 39.1
-            return 3
+        return TABLA_TEMPERATURA.puntaje(indice_temperatura(temperatura))
     
     @classmethod
     def calcular_puntaje_total(cls, signos_vitales: Dict) -> Dict:
@@ -160,25 +199,25 @@ class CalculadoraNEWS:
         Returns:
             Diccionario con el resultado completo del cálculo
         """
-        # Calcular puntajes individuales
+        # Calcular puntajes individuales (seis búsquedas en tabla)
         puntajes = {
-            'frecuencia_respiratoria': cls.calcular_puntaje_frecuencia_respiratoria(
+            'frecuencia_respiratoria': TABLA_FRECUENCIA_RESPIRATORIA.puntaje(
                 signos_vitales['frecuencia_respiratoria']
             ),
-            'saturacion_oxigeno': cls.calcular_puntaje_saturacion_oxigeno(
+            'saturacion_oxigeno': TABLA_SATURACION_OXIGENO.puntaje(
                 signos_vitales['saturacion_oxigeno']
             ),
-            'presion_sistolica': cls.calcular_puntaje_presion_sistolica(
+            'presion_sistolica': TABLA_PRESION_SISTOLICA.puntaje(
                 signos_vitales['tension_sistolica']
             ),
-            'frecuencia_cardiaca': cls.calcular_puntaje_frecuencia_cardiaca(
+            'frecuencia_cardiaca': TABLA_FRECUENCIA_CARDIACA.puntaje(
                 signos_vitales['frecuencia_cardiaca']
             ),
-            'nivel_conciencia': cls.calcular_puntaje_nivel_conciencia(
-                signos_vitales['nivel_conciencia']
+            'nivel_conciencia': TABLA_NIVEL_CONCIENCIA.get(
+                signos_vitales['nivel_conciencia'], 3
             ),
-            'temperatura': cls.calcular_puntaje_temperatura(
-                signos_vitales['temperatura']
+            'temperatura': TABLA_TEMPERATURA.puntaje(
+                indice_temperatura(signos_vitales['temperatura'])
             ),
         }
         
@@ -186,7 +225,7 @@ class CalculadoraNEWS:
         puntaje_total = sum(puntajes.values())
         
         # Determinar clasificación
-        clasificacion = cls.obtener_clasificacion(puntaje_total)
+        clasificacion = TABLA_CLASIFICACION[puntaje_total]
         
         return {
             'puntajes_individuales': puntajes,
@@ -209,13 +248,9 @@ class CalculadoraNEWS:
         Returns:
             Nivel de urgencia ('VERDE', 'AMARILLO', 'ROJO')
         """
-        # Optimización: Evaluar casos críticos primero (salvar vidas)
-        if puntaje >= 7:    # ROJO: Emergencia crítica
-            return 'ROJO'
-        elif puntaje >= 5:  # AMARILLO: Urgencia moderada  
-            return 'AMARILLO'
-        else:               # VERDE: Rutinario (0-4)
-            return 'VERDE'
+        if 0 <= puntaje <= PUNTAJE_MAXIMO:
+            return TABLA_CLASIFICACION[puntaje]
+        return _clasificar(puntaje)
     
     @staticmethod
     def obtener_codigo_color(clasificacion: str) -> str:
@@ -233,4 +268,89 @@ class CalculadoraNEWS:
             'AMARILLO': '#ffc107',
             'ROJO': '#dc3545'
         }
-        return colores.get(clasificacion, '#6c757d')
\ No newline at end of file
+        return colores.get(clasificacion, '#6c757d')
+
+    @classmethod
+    def calcular_puntaje_lote(
+        cls,
+        frecuencias_respiratorias: Sequence[int],
+        saturaciones_oxigeno: Sequence[int],
+        tensiones_sistolicas: Sequence[int],
+        frecuencias_cardiacas: Sequence[int],
+        niveles_conciencia: Sequence[str],
+        temperaturas: Sequence,
+    ) -> Dict:
+        """
+        Calcula el NEWS de miles de registros en una sola pasada (re-score, importaciones).
+
+        Recibe los signos vitales en columnas (seis secuencias del mismo largo)
+        y resuelve cada parámetro con las mismas tablas que el cálculo individual.
+
+        Args:
+            frecuencias_respiratorias: Respiraciones por minuto
+            saturaciones_oxigeno: Porcentajes de saturación de O2
+            tensiones_sistolicas: Tensiones sistólicas en mmHg
+            frecuencias_cardiacas: Latidos por minuto
+            niveles_conciencia: Niveles AVPU ('A', 'V', 'P', 'U')
+            temperaturas: Temperaturas en grados Celsius
+
+        Returns:
+            Diccionario de listas paralelas: puntajes individuales por parámetro,
+            puntaje total, clasificación y tiempo máximo de atención
+        """
+        columnas = (
+            frecuencias_respiratorias, saturaciones_oxigeno, tensiones_sistolicas,
+            frecuencias_cardiacas, niveles_conciencia, temperaturas,
+        )
+        cantidad = len(frecuencias_respiratorias)
+        if any(len(columna) != cantidad for columna in columnas):
+            raise ValueError("Todas las columnas de signos vitales deben tener el mismo largo")
+
+        puntajes = {
+            'frecuencia_respiratoria': _buscar_en_tabla(
+                TABLA_FRECUENCIA_RESPIRATORIA, frecuencias_respiratorias
+            ),
+            'saturacion_oxigeno': _buscar_en_tabla(TABLA_SATURACION_OXIGENO, saturaciones_oxigeno),
+            'presion_sistolica': _buscar_en_tabla(TABLA_PRESION_SISTOLICA, tensiones_sistolicas),
+            'frecuencia_cardiaca': _buscar_en_tabla(TABLA_FRECUENCIA_CARDIACA, frecuencias_cardiacas),
+            'nivel_conciencia': [TABLA_NIVEL_CONCIENCIA.get(nivel, 3) for nivel in niveles_conciencia],
+            'temperatura': _buscar_en_tabla(
+                TABLA_TEMPERATURA, list(map(indice_temperatura, temperaturas))
+            ),
+        }
+
+        totales = list(map(sum, zip(*puntajes.values())))
+        clasificaciones = [TABLA_CLASIFICACION[total] for total in totales]
+
+        return {
+            'puntajes_individuales': puntajes,
+            'puntaje_total': totales,
+            'clasificacion': clasificaciones,
+            'tiempo_atencion_maximo': [cls.TIEMPOS_ATENCION[c] for c in clasificaciones],
+        }
+
+    @classmethod
+    def tablas_para_cliente(cls) -> Dict:
+        """
+        Exporta las tablas para la calculadora JavaScript del dashboard.
+
+        La temperatura se indexa en décimas con ROUND_HALF_UP (indice_temperatura);
+        el cliente redondea igual sobre el texto (decimasTemperatura en dashboard.js).
+
+        Returns:
+            Diccionario serializable a JSON con mínimo, puntajes por parámetro,
+            puntajes AVPU, clasificación por total y tiempos de atención
+        """
+        return {
+            'parametros': {
+                # La calculadora JS usa los nombres de campo del formulario
+                ('tension_sistolica' if parametro == 'presion_sistolica' else parametro): {
+                    'minimo': tabla.minimo,
+                    'puntajes': list(tabla),
+                }
+                for parametro, tabla in TABLAS_NEWS.items()
+            },
+            'nivel_conciencia': TABLA_NIVEL_CONCIENCIA,
+            'clasificacion': list(TABLA_CLASIFICACION),
+            'tiempos_atencion': cls.TIEMPOS_ATENCION,
+        }
@@ -1,22 +1,45 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, FileResponse, Http404
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
-from django.db.models import Count, Q
-from django.db import models
+from django.db.models import Count
+from django.db import models, router, transaction
+from django.core.exceptions import ValidationError
 from django.utils import timezone
-from django.core.cache import cache
-from datetime import timedelta
+from django.utils.cache import get_conditional_response
+from django.urls import reverse
+import time
+from datetime import date, timedelta
 
 from apps.patients.models import Paciente
-from .models import SignosVitales, Profesional
+from .models import SignosVitales, Profesional, TrabajoReporte
+from .utils import CalculadoraNEWS
+from . import contadores, eventos, exportacion, fragmentos, resumenes, signals, sincronizacion, trabajos
+from .cola import cola_espera, cursor, leer_cursor
 
+# Máximo de pacientes por llamada al ingreso masivo (incidente con múltiples víctimas)
+MAX_INGRESO_MASIVO = 500
 
-def _lazy_import_pdf():
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter
-    return canvas, letter
+# Reportes de períodos: hasta un año por pedido
+MAX_DIAS_PERIODO = 366
+
+CAMPOS_PACIENTE = ('nombre', 'apellido', 'dni', 'edad', 'motivo_consulta')
+CAMPOS_ULTIMO_TRIAGE = (
+    'ultimo_triage', 'ultimo_nivel_urgencia', 'ultimo_news_score', 'ultimo_triage_fecha',
+)
+CAMPOS_SIGNOS = (
+    'frecuencia_respiratoria', 'saturacion_oxigeno', 'tension_sistolica',
+    'frecuencia_cardiaca', 'nivel_conciencia', 'temperatura',
+)
+
+# 📡 Flujo SSE: se cierra cada 5 minutos (el navegador reconecta solo) y manda
+# un comentario cada 15 s para que proxies y navegador no corten la conexión
+DURACION_MAXIMA_SSE = 300
+LATIDO_SSE = 15
+
+# Sin cupo para otro flujo: el navegador vuelve a intentar en 30 s
+REINTENTO_SSE_SIN_CUPO = 30
 
 
 def _crear_signos_vitales(request, paciente, profesional):
@@ -87,16 +110,19 @@ def dashboard_principal(request):
             dni = request.POST.get('dni', '').strip() or None
             edad = request.POST.get('edad')
             
-            paciente = Paciente.objects.create(
-                nombre=nombre,
-                apellido=apellido,
-                dni=dni,
-                edad=int(edad) if edad else None,
-                motivo_consulta=request.POST.get('motivo_consulta', '').strip()
-            )
-            
-            # 2. Crear signos vitales usando helper
-            signos = _crear_signos_vitales(request, paciente, profesional)
+            # Paciente y triage en una transacción: si los signos fallan, no
+            # queda (ni se sincroniza) un paciente sin triage
+            with transaction.atomic(using=router.db_for_write(Paciente)):
+                paciente = Paciente.objects.create(
+                    nombre=nombre,
+                    apellido=apellido,
+                    dni=dni,
+                    edad=int(edad) if edad else None,
+                    motivo_consulta=request.POST.get('motivo_consulta', '').strip()
+                )
+                
+                # 2. Crear signos vitales usando helper
+                signos = _crear_signos_vitales(request, paciente, profesional)
             
             # 3. Mensaje de éxito
             messages.success(
@@ -106,10 +132,6 @@ def dashboard_principal(request):
                 f'Tiempo máximo: {signos.tiempo_atencion_max} minutos'
             )
             
-            # 4. Limpiar cache para actualización inmediata
-            cache.delete('dashboard_stats')
-            cache.delete('patients_waiting')
-            
             return redirect('triage:dashboard')
             
         except Exception as e:
@@ -117,80 +139,59 @@ def dashboard_principal(request):
             return redirect('triage:dashboard')
     
     # 🔍 LÓGICA GET ORIGINAL (mostrar dashboard)
-    # Intentar obtener del cache primero
-    cache_key = 'dashboard_stats'
-    cached_data = cache.get(cache_key)
-    
-    if cached_data is None:
-        # Cache miss - calcular datos
-        hace_24h = timezone.now() - timedelta(hours=24)
-        
-        # 🔥 CONSULTAS OPTIMIZADAS - Usando select_related y prefetch_related
-        estadisticas = SignosVitales.objects.filter(
-            fecha_hora__gte=hace_24h,
-            nivel_urgencia__isnull=False,
-            paciente__activo=True,
-            paciente__estado_atencion__in=['ESPERANDO', 'EN_ATENCION']
-        ).aggregate(
-            total=Count('id'),
-            rojos=Count('id', filter=Q(nivel_urgencia='ROJO')),
-            amarillos=Count('id', filter=Q(nivel_urgencia='AMARILLO')),
-            verdes=Count('id', filter=Q(nivel_urgencia='VERDE'))
-        )
-        
-        # Casos críticos - OPTIMIZADO con select_related
-        casos_criticos = list(SignosVitales.objects.filter(
-            nivel_urgencia__in=['ROJO', 'AMARILLO'],
-            paciente__activo=True,
-            paciente__estado_atencion__in=['ESPERANDO', 'EN_ATENCION']
-        ).select_related(
-            'paciente',
-            'profesional__user'
-        ).order_by('-fecha_hora')[:10])
-        
-        # Pacientes pendientes (OPTIMIZADO con manager personalizado)
-        pacientes_recientes = list(Paciente.objects.activos_en_espera()[:5])
-        
-        cached_data = {
-            'estadisticas': estadisticas,
-            'casos_criticos': casos_criticos,
-            'pacientes_recientes': pacientes_recientes,
-        }
-        
-        # Cache por 2 minutos (balance entre velocidad y actualización)
-        cache.set(cache_key, cached_data, timeout=120)
-    
-    # 🔒 Agregar información del profesional (no cacheada)
-    profesional = _obtener_profesional(request)
-    cached_data['profesional'] = profesional
-    
-    return render(request, 'triage/dashboard.html', cached_data)
+    # Partes dinámicas ya renderizadas, cacheadas por generación (se invalidan al cambiar la cola)
+    contexto = {
+        'fragmentos': fragmentos.fragmentos_dashboard(),
+        # 🔒 Información del profesional (por usuario, no cacheada)
+        'profesional': _obtener_profesional(request),
+        # 🧮 Tablas NEWS para la calculadora JS (misma fuente que el cálculo en servidor)
+        'tablas_news': CalculadoraNEWS.tablas_para_cliente(),
+    }
+    
+    return render(request, 'triage/dashboard.html', contexto)
 
 
 @login_required
 @require_http_methods(["POST"])
 def marcar_atendido(request, paciente_id):
-    """Marca un paciente con destino específico (AJAX) y actualiza caches."""
+    """
+    Marca un paciente con destino específico (AJAX) y actualiza caches.
+    
+    El dashboard manda también el uid del paciente que tiene en pantalla: los
+    ids se repiten entre la base central y la local, y después de una
+    conmutación el mismo id puede ser otro paciente (409: recargar la lista).
+    Sin uid (formularios, scripts) se atiende por id, como antes.
+    """
     try:
         paciente = get_object_or_404(Paciente, id=paciente_id, activo=True)
         
         # Obtener profesional actual
         profesional = _obtener_profesional(request)
         
-        # Obtener destino del JSON data o POST data
+        # Obtener destino y uid del JSON data o POST data
         import json
         destino = 'ALTA'  # Default
+        uid = None
         
         if request.content_type == 'application/json':
             # Datos enviados como JSON
             try:
                 data = json.loads(request.body)
                 destino = data.get('destino', 'ALTA')
+                uid = data.get('uid')
             except (json.JSONDecodeError, KeyError):
                 destino = 'ALTA'
         else:
             # Datos enviados como formulario
             destino = request.POST.get('destino', 'ALTA')
+            uid = request.POST.get('uid')
+        
+        if uid and str(uid) != str(paciente.uid):
+            return JsonResponse({
+                'success': False,
+                'error': 'La lista de pacientes cambió: se vuelve a cargar',
+                'resincronizar': True,
+            }, status=409)
             
         destinos_validos = {
             'PASE_A_SALA': '🏥 Pase a Sala',
@@ -201,12 +202,20 @@ def marcar_atendido(request, paciente_id):
         if destino not in destinos_validos:
             destino = 'ALTA'  # Default seguro
         
-        # Marcar como atendido con el profesional que lo atiende
-        paciente.marcar_atendido(destino, profesional)
+        # Si ya tenía destino, su atención anterior se recalcula en los resúmenes
+        atencion_anterior = paciente.fecha_atencion if paciente.estado_atencion in resumenes.DESTINOS else None
         
-        # 🚀 LIMPIAR CACHES para actualización inmediata
-        cache.delete('dashboard_stats')
-        cache.delete('patients_waiting')
+        # Marcar como atendido con el profesional que lo atiende (y descontarlo
+        # de los contadores, sumarlo a los resúmenes y anotarlo en el diario de
+        # sincronización en la misma transacción)
+        with transaction.atomic(using=router.db_for_write(Paciente)):
+            paciente.marcar_atendido(destino, profesional)
+            contadores.ajustar_contadores([paciente.id])
+            resumenes.registrar_atencion(paciente, atencion_anterior)
+            sincronizacion.registrar_cambios([paciente])
+        
+        # 🚀 Sacar de la cola (nueva generación) y avisar a los dashboards conectados
+        eventos.publicar_cambios(cola_espera.quitar(paciente.id))
         
         return JsonResponse({
             'success': True,
@@ -218,75 +227,334 @@ def marcar_atendido(request, paciente_id):
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
+def _validar_ingreso_masivo(filas):
+    """
+    Valida todas las filas del ingreso masivo sin tocar la base (salvo un SELECT de DNIs).
+    
+    Returns:
+        tuple: (lista de (Paciente, SignosVitales) sin guardar, lista de errores por fila)
+    """
+    pares = []
+    errores = []
+    dnis_vistos = {}
+    
+    for indice, fila in enumerate(filas):
+        if not isinstance(fila, dict):
+            fila = {}
+        datos_paciente = fila.get('paciente') or {}
+        datos_signos = fila.get('signos_vitales') or {}
+        
+        paciente = Paciente(**{
+            campo: datos_paciente.get(campo) for campo in CAMPOS_PACIENTE
+        })
+        paciente.dni = (str(paciente.dni).strip() or None) if paciente.dni is not None else None
+        paciente.motivo_consulta = (paciente.motivo_consulta or '').strip()
+        signos = SignosVitales(**{campo: datos_signos.get(campo) for campo in CAMPOS_SIGNOS})
+        
+        errores_fila = {}
+        try:
+            # Unicidad de DNI se verifica aparte con una sola consulta
+            paciente.full_clean(validate_unique=False)
+        except ValidationError as e:
+            errores_fila.update(e.message_dict)
+        try:
+            signos.full_clean(exclude=['paciente', 'profesional'], validate_unique=False)
+        except ValidationError as e:
+            errores_fila.update(e.message_dict)
+        
+        if paciente.dni:
+            if paciente.dni in dnis_vistos:
+                errores_fila.setdefault('dni', []).append(
+                    f'DNI repetido en el lote (fila {dnis_vistos[paciente.dni]}).'
+                )
+            else:
+                dnis_vistos[paciente.dni] = indice
+        
+        if errores_fila:
+            errores.append({'indice': indice, 'errores': errores_fila})
+        pares.append((paciente, signos))
+    
+    # DNIs ya registrados: una sola consulta para todo el lote
+    if dnis_vistos:
+        existentes = Paciente.objects.filter(dni__in=list(dnis_vistos)).values_list('dni', flat=True)
+        for dni in existentes:
+            errores.append({
+                'indice': dnis_vistos[dni],
+                'errores': {'dni': ['Ya existe un paciente con este DNI.']},
+            })
+    
+    return pares, sorted(errores, key=lambda error: error['indice'])
+
+
+def _crear_triages_masivos(pares, profesional):
+    """
+    Calcula el NEWS de todo el lote de una vez e inserta con bulk_create en una transacción.
+    
+    Returns:
+        list: SignosVitales creados (con su paciente asignado), en el orden del lote
+    """
+    resultado = CalculadoraNEWS.calcular_puntaje_lote(*(
+        [getattr(signos, campo) for _, signos in pares] for campo in CAMPOS_SIGNOS
+    ))
+    
+    with transaction.atomic(using=router.db_for_write(Paciente)):
+        pacientes = Paciente.objects.bulk_create([paciente for paciente, _ in pares])
+        
+        registros = []
+        for indice, (paciente, signos) in enumerate(pares):
+            signos.paciente = paciente
+            signos.profesional = profesional
+            # bulk_create no llama a save(): asignar el triage ya calculado
+            signos.news_score = resultado['puntaje_total'][indice]
+            signos.nivel_urgencia = resultado['clasificacion'][indice]
+            signos.tiempo_atencion_max = resultado['tiempo_atencion_maximo'][indice]
+            registros.append(signos)
+        registros = SignosVitales.objects.bulk_create(registros)
+        
+        # Puntero al último triage: pacientes nuevos, su único triage es el del lote
+        for signos in registros:
+            signos.paciente.asignar_ultimo_triage(signos)
+        Paciente.objects.bulk_update(pacientes, CAMPOS_ULTIMO_TRIAGE)
+        
+        # Una sola invalidación de cache, un solo ajuste de contadores y
+        # resúmenes y un solo incremento de operaciones
+        signals.after_bulk_triage(pacientes, registros)
+    
+    return registros
+
+
+@login_required
+@require_http_methods(["POST"])
+def api_ingreso_masivo(request):
+    """
+    🚑 INGRESO MASIVO - Incidente con múltiples víctimas.
+    
+    Recibe JSON {"pacientes": [{"paciente": {...}, "signos_vitales": {...}}, ...]}
+    y registra todos los pacientes con su triage en una única transacción.
+    Si alguna fila es inválida no se guarda nada y se devuelven los errores por fila.
+    """
+    import json
+    
+    profesional = _obtener_profesional(request)
+    if not profesional or not profesional.puede_realizar_triage():
+        return JsonResponse({'success': False, 'error': 'Usuario sin permisos de triage'}, status=403)
+    
+    try:
+        data = json.loads(request.body)
+        filas = data['pacientes']
+        if not isinstance(filas, list):
+            raise TypeError
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return JsonResponse(
+            {'success': False, 'error': 'Se esperaba JSON con una lista "pacientes"'}, status=400
+        )
+    
+    if not filas:
+        return JsonResponse({'success': True, 'creados': 0, 'resultados': []})
+    if len(filas) > MAX_INGRESO_MASIVO:
+        return JsonResponse(
+            {'success': False, 'error': f'Máximo {MAX_INGRESO_MASIVO} pacientes por lote'}, status=400
+        )
+    
+    pares, errores = _validar_ingreso_masivo(filas)
+    if errores:
+        return JsonResponse({'success': False, 'errores': errores}, status=400)
+    
+    try:
+        registros = _crear_triages_masivos(pares, profesional)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'creados': len(registros),
+        'resultados': [
+            {
+                'indice': indice,
+                'paciente_id': signos.paciente.id,
+                'signos_id': signos.id,
+                'nombre_completo': signos.paciente.nombre_completo,
+                'news_score': signos.news_score,
+                'nivel_urgencia': signos.nivel_urgencia,
+                'tiempo_atencion_max': signos.tiempo_atencion_max,
+                'codigo_color': signos.color_hex,
+            }
+            for indice, signos in enumerate(registros)
+        ],
+    }, status=201)
+
+
 @login_required
 @require_http_methods(["GET"])
 def api_lista_pacientes(request):
     """
     API optimizada para obtener lista de pacientes en espera.
-    AUTO-CACHE que se invalida automáticamente con signals.
+    El orden (ROJOS por prioridad crítica, luego el resto) sale del índice en
+    memoria de la cola, que se actualiza con signals al triar o atender.
+    
+    📄 Paginación por cursor: ?cursor=&limite=N devuelve la primera página y
+    el header X-Cursor-Siguiente (también Link rel="next") con el cursor de la
+    siguiente; sin header no hay más. Sigue aceptando ?limite=N&desplazamiento=M.
+    
+    🔁 GET condicional: ETag según la versión de la cola y el minuto actual
+    (304 si no cambió). Con ?since=<version> (ver header X-Cola-Version)
+    devuelve solo los pacientes agregados, modificados y quitados.
     """
-    # Cache inteligente para API
-    cache_key = 'patients_waiting'
-    cached_patients = cache.get(cache_key)
+    limite = _parametro_entero(request.GET.get('limite'))
+    desplazamiento = _parametro_entero(request.GET.get('desplazamiento')) or 0
+    since = _parametro_entero(request.GET.get('since'))
+    
+    # Tiempos de espera al inicio del minuto: misma versión y minuto = misma respuesta
+    ahora = timezone.now().replace(second=0, microsecond=0)
+    
+    if 'cursor' in request.GET:
+        return _pagina_cola(request, limite, ahora)
     
-    if cached_patients is None:
+    try:
+        version = cola_espera.version()
+        if version is not None:
+            no_modificado = get_conditional_response(request, etag=_etag_cola(version, ahora))
+            if no_modificado is not None:
+                return _con_version(no_modificado, version, ahora)
+        
+        data = cola_espera.cambios_desde(since, ahora) if since is not None else None
+        if data is not None:
+            data['completo'] = False
+            version = data['version']
+        else:
+            version, filas = cola_espera.lista_versionada(desplazamiento, limite, ahora)
+            data = filas if since is None else {'version': version, 'completo': True, 'pacientes': filas}
+    except Exception as e:
+        return JsonResponse({'error': 'Error interno del servidor'}, status=500)
+    
+    return _con_version(JsonResponse(data, safe=False), version, ahora)
+
+
+# Tamaño de página por defecto y máximo de la paginación por cursor
+TAMANO_PAGINA_COLA = 50
+MAX_PAGINA_COLA = 500
+
+
+def _pagina_cola(request, limite, ahora):
+    """Una página de la cola por keyset (misma forma de filas que la lista completa)."""
+    limite = min(limite or TAMANO_PAGINA_COLA, MAX_PAGINA_COLA)
+    
+    despues_de = None
+    orden = ahora
+    if request.GET['cursor']:
         try:
-            # Obtener pacientes en espera - USANDO MANAGER OPTIMIZADO
-            pacientes = Paciente.objects.activos_en_espera()
-            
-            data = []
-            pacientes_rojos_con_prioridad = []  # 🚨 Para ordenar códigos rojos por prioridad
-            
-            for paciente in pacientes:
-                try:
-                    # Obtener último triage si existe - usando prefetch_related
-                    nivel_urgencia = 'SIN TRIAGE'
-                    prioridad_critica = 0
-                    
-                    # Usar los signos vitales pre-cargados
-                    signos_vitales = list(paciente.signos_vitales.all())
-                    if signos_vitales:
-                        ultimo_signo = signos_vitales[0]  # Ya ordenados por fecha_hora desc
-                        if ultimo_signo.nivel_urgencia:
-                            nivel_urgencia = ultimo_signo.nivel_urgencia
-                            # 🚨 Calcular prioridad crítica para códigos rojos
-                            if nivel_urgencia == 'ROJO':
-                                prioridad_critica = ultimo_signo.calcular_prioridad_critica()
-                    
-                    paciente_data = {
-                        'id': paciente.id,
-                        'nombre_completo': paciente.nombre_completo,
-                        'dni': paciente.dni or 'Sin DNI',
-                        'edad': paciente.edad,
-                        'tiempo_espera': paciente.tiempo_espera,
-                        'tiempo_espera_minutos': paciente.tiempo_espera_minutos,
-                        'nivel_urgencia': nivel_urgencia,
-                        'motivo_consulta': paciente.motivo_consulta or '',
-                        'prioridad_critica': prioridad_critica  # 🚨 Nueva prioridad
-                    }
-                    
-                    if nivel_urgencia == 'ROJO':
-                        pacientes_rojos_con_prioridad.append(paciente_data)
-                    else:
-                        data.append(paciente_data)
-                        
-                except Exception:
-                    continue  # Saltar este paciente pero seguir con los demás
-            
-            # 🚨 ORDENAR CÓDIGOS ROJOS POR PRIORIDAD CRÍTICA (mayor prioridad primero)
-            pacientes_rojos_con_prioridad.sort(key=lambda x: x['prioridad_critica'], reverse=True)
-            
-            # 🚨 ORDEN FINAL: Rojos priorizados + resto
-            data = pacientes_rojos_con_prioridad + data
-            
-            # Cache por 1 minuto (se invalida automáticamente con signals)
-            cache.set(cache_key, data, timeout=60)
-            cached_patients = data
-            
-        except Exception as e:
-            return JsonResponse({'error': 'Error interno del servidor'}, status=500)
+            orden, despues_de = leer_cursor(request.GET['cursor'])
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
     
-    return JsonResponse(cached_patients, safe=False)
+    try:
+        version = cola_espera.version()
+        if version is not None:
+            no_modificado = get_conditional_response(request, etag=_etag_cola(version, ahora))
+            if no_modificado is not None:
+                return _con_version(no_modificado, version, ahora)
+        
+        version, filas, siguiente = cola_espera.pagina(despues_de, limite, ahora, orden)
+    except Exception as e:
+        return JsonResponse({'error': 'Error interno del servidor'}, status=500)
+    
+    respuesta = _con_version(JsonResponse(filas, safe=False), version, ahora)
+    if siguiente is not None:
+        cursor_siguiente = cursor(orden, siguiente)
+        parametros = request.GET.copy()
+        parametros['cursor'] = cursor_siguiente
+        parametros['limite'] = limite
+        respuesta['X-Cursor-Siguiente'] = cursor_siguiente
+        respuesta['Link'] = f'<{request.path}?{parametros.urlencode()}>; rel="next"'
+    return respuesta
+
+
+def _etag_cola(version, ahora):
+    """Validador fuerte: versión de la cola + minuto de los tiempos de espera."""
+    return f'"cola-{version}-{int(ahora.timestamp()) // 60}"'
+
+
+def _con_version(respuesta, version, ahora):
+    """Agrega ETag y versión de la cola; el cliente siempre revalida."""
+    if version is not None:
+        respuesta['ETag'] = _etag_cola(version, ahora)
+        respuesta['X-Cola-Version'] = str(version)
+    respuesta['Cache-Control'] = 'private, no-cache'
+    return respuesta
+
+
+@login_required
+@require_http_methods(["GET"])
+def api_eventos(request):
+    """
+    📡 Eventos en vivo (Server-Sent Events) de la cola y los contadores.
+    
+    Tipos: paciente_agregado, paciente_retriado, paciente_actualizado,
+    paciente_atendido, estadisticas y resincronizar. Al reconectar, el
+    navegador manda Last-Event-ID y se reenvían los eventos perdidos.
+    
+    Cada flujo ocupa un thread del servidor: requiere un servidor con
+    threads y hay un tope por proceso (settings.SSE_MAX_CONEXIONES). Sin
+    threads o sin cupo responde 503 con retry: y Retry-After.
+    """
+    if not request.META.get('wsgi.multithread', True) or not eventos.cupo_sse.tomar():
+        respuesta = HttpResponse(
+            f"retry: {REINTENTO_SSE_SIN_CUPO * 1000}\n\n", status=503, content_type='text/event-stream'
+        )
+        respuesta['Retry-After'] = str(REINTENTO_SSE_SIN_CUPO)
+        return respuesta
+    
+    desde = _parametro_entero(request.headers.get('Last-Event-ID'))
+    
+    respuesta = StreamingHttpResponse(_FlujoEventos(desde), content_type='text/event-stream')
+    respuesta['Cache-Control'] = 'no-cache'
+    respuesta['X-Accel-Buffering'] = 'no'  # Sin buffer en nginx
+    return respuesta
+
+
+class _FlujoEventos:
+    """Flujo SSE que devuelve su lugar en el cupo cuando se cierra la respuesta."""
+    
+    def __init__(self, desde):
+        self._flujo = _flujo_eventos(desde)
+        self._abierto = True
+    
+    def __iter__(self):
+        return self._flujo
+    
+    def close(self):
+        # El servidor cierra la respuesta al terminar o al cortarse el cliente,
+        # aunque el flujo nunca haya empezado
+        if self._abierto:
+            self._abierto = False
+            self._flujo.close()
+            eventos.cupo_sse.liberar()
+
+
+def _flujo_eventos(desde):
+    """Generador del flujo SSE: eventos a medida que ocurren, latidos si no hay."""
+    if desde is None:
+        desde = eventos.distribuidor.ultimo_id()
+    
+    yield "retry: 3000\n\n"
+    limite = time.monotonic() + DURACION_MAXIMA_SSE
+    while time.monotonic() < limite:
+        nuevos = eventos.distribuidor.esperar(desde, timeout=LATIDO_SSE)
+        if not nuevos:
+            yield ": latido\n\n"
+            continue
+        for evento in nuevos:
+            yield eventos.formatear_sse(evento)
+            desde = evento['id']
+
+
+def _parametro_entero(valor):
+    """Entero no negativo de un parámetro GET, o None si falta o es inválido."""
+    try:
+        numero = int(valor)
+    except (TypeError, ValueError):
+        return None
+    return numero if numero >= 0 else None
 
 
 @login_required
@@ -308,203 +576,165 @@ def reporte_diario_pdf(request):
         messages.error(request, f'❌ Sin permisos para descargar reportes. Tu rol: {profesional.get_tipo_display()}')
         return redirect('triage:dashboard')
     
-    # Import lazy para ahorrar memoria
-    canvas, letter = _lazy_import_pdf()
-    
-    # Datos del día actual
-    hoy = timezone.now().date()
-    
-    # 📊 CONSULTA OPTIMIZADA: SignosVitales del día
-    signos_del_dia = SignosVitales.objects.filter(
-        fecha_hora__date=hoy
-    ).select_related(
-        'paciente', 'profesional__user'
-    ).order_by('-fecha_hora')
-    
-    # 🏥 CONSULTA OPTIMIZADA: Pacientes atendidos del día con destinos y profesional
-    from apps.patients.models import Paciente
-    pacientes_atendidos = Paciente.objects.filter(
-        fecha_atencion__date=hoy,
-        estado_atencion__in=['PASE_A_SALA', 'ALTA', 'PASE_A_UTI']
-    ).select_related('profesional_atencion__user').order_by('-fecha_atencion')
-    
-    # 📈 Estadísticas generales
-    total_evaluaciones = signos_del_dia.count()
-    rojos = signos_del_dia.filter(nivel_urgencia='ROJO').count()
-    amarillos = signos_del_dia.filter(nivel_urgencia='AMARILLO').count()
-    verdes = signos_del_dia.filter(nivel_urgencia='VERDE').count()
-    
-    # 🏥 Estadísticas por destino
-    total_atendidos = pacientes_atendidos.count()
-    sala = pacientes_atendidos.filter(estado_atencion='PASE_A_SALA').count()
-    altas = pacientes_atendidos.filter(estado_atencion='ALTA').count()
-    uti = pacientes_atendidos.filter(estado_atencion='PASE_A_UTI').count()
-    
-    # 👩‍⚕️ Estadísticas por profesional
-    from django.db.models import Count, Avg
-    stats_profesionales = signos_del_dia.values(
-        'profesional__user__first_name',
-        'profesional__user__last_name',
-        'profesional__tipo'
-    ).annotate(
-        total_evaluaciones=Count('id'),
-        casos_rojos=Count('id', filter=models.Q(nivel_urgencia='ROJO')),
-        casos_amarillos=Count('id', filter=models.Q(nivel_urgencia='AMARILLO')),
-        casos_verdes=Count('id', filter=models.Q(nivel_urgencia='VERDE'))
-    ).order_by('-total_evaluaciones')
-    
-    # Crear PDF completo
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="reporte_triage_{hoy}.pdf"'
-    
-    p = canvas.Canvas(response, pagesize=letter)
-    width, height = letter
-    
-    # 🏥 HEADER INSTITUCIONAL
-    p.setFont("Helvetica-Bold", 24)
-    p.drawString(50, height - 50, f"🏥 REPORTE DIARIO DE TRIAGE")
-    
-    p.setFont("Helvetica", 16)
-    p.drawString(50, height - 80, f"📅 Fecha: {hoy.strftime('%d/%m/%Y')}")
-    p.drawString(50, height - 100, f"👤 Generado por: {profesional.user.get_full_name()} ({profesional.get_tipo_display()})")
-    p.drawString(50, height - 120, f"⏰ Hora: {timezone.now().strftime('%H:%M')}")
-    
-    # 📊 RESUMEN ESTADÍSTICO - EVALUACIONES
-    y_pos = height - 160
-    p.setFont("Helvetica-Bold", 18)
-    p.drawString(50, y_pos, "📊 EVALUACIONES DEL DÍA")
-    
-    y_pos -= 30
-    p.setFont("Helvetica", 14)
-    p.drawString(70, y_pos, f"🔴 Casos Críticos (ROJO): {rojos}")
-    y_pos -= 20
-    p.drawString(70, y_pos, f"🟡 Casos Urgentes (AMARILLO): {amarillos}")
-    y_pos -= 20
-    p.drawString(70, y_pos, f"🟢 Casos Leves (VERDE): {verdes}")
-    y_pos -= 20
-    p.setFont("Helvetica-Bold", 14)
-    p.drawString(70, y_pos, f"📈 TOTAL EVALUACIONES: {total_evaluaciones}")
-    
-    # 🏥 RESUMEN ESTADÍSTICO - DESTINOS
-    y_pos -= 50
-    p.setFont("Helvetica-Bold", 18)
-    p.drawString(50, y_pos, "🏥 DESTINOS DE PACIENTES")
-    
-    y_pos -= 30
-    p.setFont("Helvetica", 14)
-    p.drawString(70, y_pos, f"🏥 Pase a Sala: {sala}")
-    y_pos -= 20
-    p.drawString(70, y_pos, f"✅ Altas: {altas}")
-    y_pos -= 20
-    p.drawString(70, y_pos, f"🚨 Pase a UTI: {uti}")
-    y_pos -= 20
-    p.setFont("Helvetica-Bold", 14)
-    p.drawString(70, y_pos, f"📈 TOTAL ATENDIDOS: {total_atendidos}")
-    
-    # 👩‍⚕️ RENDIMIENTO POR PROFESIONAL
-    y_pos -= 50
-    p.setFont("Helvetica-Bold", 18)
-    p.drawString(50, y_pos, "👩‍⚕️ EVALUACIONES POR PROFESIONAL")
-    
-    y_pos -= 25
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(70, y_pos, "PROFESIONAL")
-    p.drawString(250, y_pos, "TOTAL")
-    p.drawString(300, y_pos, "ROJOS")
-    p.drawString(350, y_pos, "AMARILLOS")
-    p.drawString(420, y_pos, "VERDES")
-    
-    y_pos -= 15
-    p.setFont("Helvetica", 10)
-    for stat in stats_profesionales:
-        nombre = f"{stat['profesional__user__first_name']} {stat['profesional__user__last_name']}"
-        tipo_icon = "🔧" if stat['profesional__tipo'] == 'administrador' else \
-                   "👨‍⚕️" if stat['profesional__tipo'] == 'medico' else "👩‍⚕️"
-        
-        p.drawString(70, y_pos, f"{tipo_icon} {nombre}")
-        p.drawString(260, y_pos, str(stat['total_evaluaciones']))
-        p.drawString(310, y_pos, str(stat['casos_rojos']))
-        p.drawString(370, y_pos, str(stat['casos_amarillos']))
-        p.drawString(440, y_pos, str(stat['casos_verdes']))
-        y_pos -= 15
-        
-        if y_pos < 200:  # Si no hay espacio, crear nueva página
-            break
-    
-    # 📋 DETALLE DE PACIENTES ATENDIDOS (Nueva sección)
-    if y_pos < 300:  # Si queda poco espacio, nueva página
-        p.showPage()
-        y_pos = height - 50
-    else:
-        y_pos -= 30
-    
-    p.setFont("Helvetica-Bold", 18)
-    p.drawString(50, y_pos, "📋 PACIENTES ATENDIDOS HOY")
-    
-    y_pos -= 25
-    p.setFont("Helvetica-Bold", 10)
-    p.drawString(50, y_pos, "HORA ATEN.")
-    p.drawString(130, y_pos, "PACIENTE")
-    p.drawString(250, y_pos, "DESTINO")
-    p.drawString(330, y_pos, "T.ESPERA")
-    p.drawString(400, y_pos, "PROFESIONAL")
-    
-    y_pos -= 15
-    p.setFont("Helvetica", 9)
-    
-    for paciente in pacientes_atendidos[:20]:  # Máximo 20 pacientes        
-        if y_pos < 50:  # Si no hay espacio, nueva página
-            p.showPage()
-            y_pos = height - 50
-            
-            # Repetir headers en nueva página
-            p.setFont("Helvetica-Bold", 10)
-            p.drawString(50, y_pos, "HORA ATEN.")
-            p.drawString(130, y_pos, "PACIENTE")
-            p.drawString(250, y_pos, "DESTINO")
-            p.drawString(330, y_pos, "T.ESPERA")
-            p.drawString(400, y_pos, "PROFESIONAL")
-            y_pos -= 15
-            p.setFont("Helvetica", 9)
-        
-        # Calcular tiempo de espera
-        tiempo_espera = (paciente.fecha_atencion - paciente.fecha_ingreso).total_seconds() / 60
-        tiempo_str = f"{int(tiempo_espera)}m" if tiempo_espera < 60 else f"{int(tiempo_espera/60)}h{int(tiempo_espera%60)}m"
-        
-        # Obtener destino con emoji
-        destino_emojis = {
-            'PASE_A_SALA': '🏥 Sala',
-            'ALTA': '✅ Alta',
-            'PASE_A_UTI': '🚨 UTI'
-        }
-        destino_texto = destino_emojis.get(paciente.estado_atencion, paciente.estado_atencion)
-        
-        # Datos del paciente
-        hora_atencion = paciente.fecha_atencion.strftime('%H:%M')
-        nombre_paciente = paciente.nombre_completo[:15]
-        
-        # Obtener profesional que atendió (usando el nuevo campo)
-        profesional_str = "N/A"
-        if paciente.profesional_atencion and paciente.profesional_atencion.user:
-            profesional_str = f"{paciente.profesional_atencion.user.first_name} {paciente.profesional_atencion.user.last_name}"[:12]
-        
-        p.drawString(50, y_pos, hora_atencion)
-        p.drawString(130, y_pos, nombre_paciente)
-        p.drawString(250, y_pos, destino_texto)
-        p.drawString(330, y_pos, tiempo_str)
-        p.drawString(400, y_pos, profesional_str)
-        y_pos -= 12
+    # 📄 Se genera en segundo plano; si los datos del día no cambiaron, ya está en disco
+    trabajo = trabajos.solicitar('DIARIO_PDF', timezone.localdate(), solicitante=profesional)
+    return _responder_trabajo(request, trabajo)
+
+
+@login_required
+@require_http_methods(["GET"])
+def reporte_periodo(request):
+    """
+    📆 Reporte de un período en PDF o CSV, desde los resúmenes diarios.
+    🔒 Mismos permisos que el reporte diario.
+    
+    Parámetros: periodo=semana|mes (últimos 7 días / mes en curso) o
+    desde=AAAA-MM-DD&hasta=AAAA-MM-DD; formato=pdf|csv.
+    """
+    profesional = _obtener_profesional(request)
+    if not profesional or not profesional.puede_descargar_reportes():
+        tipo = profesional.get_tipo_display() if profesional else 'sin perfil'
+        messages.error(request, f'❌ Sin permisos para descargar reportes. Tu rol: {tipo}')
+        return redirect('triage:dashboard')
+    
+    try:
+        desde, hasta = _periodo_pedido(request.GET)
+    except ValueError as e:
+        if 'application/json' in request.headers.get('Accept', ''):
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        messages.error(request, f'❌ {e}')
+        return redirect('triage:dashboard')
+    
+    tipo = 'PERIODO_CSV' if request.GET.get('formato') == 'csv' else 'PERIODO_PDF'
+    trabajo = trabajos.solicitar(tipo, desde, hasta, solicitante=profesional)
+    return _responder_trabajo(request, trabajo)
+
+
+def _periodo_pedido(parametros):
+    """(desde, hasta) del pedido; ValueError con el mensaje para el usuario si no es válido."""
+    hoy = timezone.localdate()
+    periodo = parametros.get('periodo')
+    if periodo == 'semana':
+        return hoy - timedelta(days=6), hoy
+    if periodo == 'mes':
+        return hoy.replace(day=1), hoy
+    
+    try:
+        desde = date.fromisoformat(parametros.get('desde', ''))
+        hasta = date.fromisoformat(parametros.get('hasta') or hoy.isoformat())
+    except ValueError:
+        raise ValueError('Fechas inválidas: usar AAAA-MM-DD.')
+    if desde > hasta:
+        raise ValueError('La fecha "desde" es posterior a "hasta".')
+    if hasta > hoy:
+        raise ValueError('El período no puede terminar después de hoy.')
+    if (hasta - desde).days + 1 > MAX_DIAS_PERIODO:
+        raise ValueError(f'El período no puede superar {MAX_DIAS_PERIODO} días.')
+    return desde, hasta
+
+
+def _responder_trabajo(request, trabajo):
+    """Archivo si ya está generado; si no, 202 (JSON) o la página de espera."""
+    if trabajos.disponible(trabajo):
+        return _archivo_reporte(request, trabajo)
+    
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse(_estado_reporte(trabajo), status=202)
+    return render(request, 'triage/reporte_en_preparacion.html', {
+        'trabajo': trabajo,
+        'estado': _estado_reporte(trabajo),
+        'reintentar': request.get_full_path(),
+    })
+
+
+def _estado_reporte(trabajo):
+    estado = {
+        'id': trabajo.id,
+        'estado': trabajo.estado,
+        'url_estado': reverse('triage:estado_reporte', args=[trabajo.id]),
+    }
+    if trabajo.estado == 'LISTO':
+        estado['url_descarga'] = reverse('triage:descargar_reporte', args=[trabajo.id])
+    elif trabajo.estado == 'ERROR':
+        estado['error'] = trabajo.error
+    return estado
+
+
+def _archivo_reporte(request, trabajo):
+    trabajos.registrar_descarga(trabajo, _obtener_profesional(request))
+    respuesta = FileResponse(
+        open(trabajos.ruta_archivo(trabajo), 'rb'),
+        as_attachment=True,
+        filename=trabajos.nombre_descarga(trabajo),
+        content_type=trabajos.content_type(trabajo),
+    )
+    respuesta['Cache-Control'] = 'private, no-cache'
+    return respuesta
+
+
+def _trabajo_permitido(request, trabajo_id):
+    """Trabajo `trabajo_id` si el usuario puede descargar reportes (404 si no)."""
+    profesional = _obtener_profesional(request)
+    if not profesional or not profesional.puede_descargar_reportes():
+        raise Http404("Reporte inexistente")
+    return get_object_or_404(TrabajoReporte, id=trabajo_id)
+
+
+@login_required
+@require_http_methods(["GET"])
+def api_estado_reporte(request, trabajo_id):
+    """📄 Estado de un reporte en preparación (la página de espera consulta esto)."""
+    trabajo = _trabajo_permitido(request, trabajo_id)
+    if trabajo.estado == 'LISTO' and not trabajos.disponible(trabajo):
+        # Archivo borrado por la limpieza: volver a pedir con los datos actuales
+        trabajo = trabajos.solicitar(
+            trabajo.tipo, trabajo.desde, trabajo.hasta, solicitante=_obtener_profesional(request)
+        )
+    return JsonResponse(_estado_reporte(trabajo))
+
+
+@login_required
+@require_http_methods(["GET"])
+def descargar_reporte(request, trabajo_id):
+    """📄 Archivo de un reporte ya generado."""
+    trabajo = _trabajo_permitido(request, trabajo_id)
+    if not trabajos.disponible(trabajo):
+        raise Http404("El reporte todavía no está listo")
+    return _archivo_reporte(request, trabajo)
+
+
+@login_required
+@require_http_methods(["GET"])
+def exportar_historial(request):
+    """
+    📤 Historial de triages en CSV o JSON Lines, comprimido con gzip al vuelo.
+    🔒 Solo administradores.
+    
+    Parámetros: formato=csv|jsonl, desde/hasta=AAAA-MM-DD, nivel (repetible),
+    profesional=<id>, gzip=0 para descargar sin comprimir.
+    """
+    profesional = _obtener_profesional(request)
+    if not profesional or not profesional.puede_exportar_datos():
+        return JsonResponse({'success': False, 'error': 'Sin permisos para exportar datos'}, status=403)
     
-    # 📝 FOOTER
-    p.setFont("Helvetica", 8)
-    p.drawString(50, 30, f"📄 Reporte generado por Sistema Triage Digital - {timezone.now().strftime('%d/%m/%Y %H:%M')}")
-    p.drawString(50, 20, f"🔒 Acceso autorizado para: {profesional.get_tipo_display()}")
+    try:
+        filtros = exportacion.filtros_de_parametros(request.GET)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     
-    # Finalizar PDF
-    p.showPage()
-    p.save()
+    formato = request.GET.get('formato', 'csv')
+    if formato not in exportacion.FORMATOS:
+        return JsonResponse({'success': False, 'error': 'Formato inválido: usar csv o jsonl'}, status=400)
+    comprimir = request.GET.get('gzip', '1') != '0'
     
-    return response
+    respuesta = StreamingHttpResponse(
+        exportacion.exportar(filtros, formato, comprimir),
+        content_type='application/gzip' if comprimir else exportacion.FORMATOS[formato][0],
+    )
+    nombre = exportacion.nombre_archivo(filtros, formato, comprimir)
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    respuesta['Cache-Control'] = 'private, no-store'
+    return respuesta
 
 
 @login_required
@@ -513,34 +743,51 @@ def api_estadisticas_dashboard(request):
     API para obtener estadísticas del dashboard en tiempo real.
     🚀 OPTIMIZADA para actualizaciones inmediatas post-atención.
     """
-    hace_24h = timezone.now() - timedelta(hours=24)
-    
-    # Calcular estadísticas actualizadas
-    estadisticas = SignosVitales.objects.filter(
-        fecha_hora__gte=hace_24h,
-        nivel_urgencia__isnull=False,
-        paciente__activo=True,
-        paciente__estado_atencion__in=['ESPERANDO', 'EN_ATENCION']
-    ).aggregate(
-        total=Count('id'),
-        rojos=Count('id', filter=Q(nivel_urgencia='ROJO')),
-        amarillos=Count('id', filter=Q(nivel_urgencia='AMARILLO')),
-        verdes=Count('id', filter=Q(nivel_urgencia='VERDE'))
-    )
-    
-    # Limpiar cache del dashboard para que se actualice
-    cache.delete('dashboard_stats')
+    # Contadores en vivo: 3 filas, sin recorrer pacientes ni triages
+    estadisticas = contadores.estadisticas_en_espera()
     
     return JsonResponse({
         'success': True,
-        'rojos': estadisticas['rojos'],
-        'amarillos': estadisticas['amarillos'],
-        'verdes': estadisticas['verdes'],
-        'total': estadisticas['total'],
+        **estadisticas._asdict(),
         'timestamp': timezone.now().isoformat()
     })
 
 
+@login_required
+@require_http_methods(["GET"])
+def fragmento_dashboard(request, nombre):
+    """
+    🧩 Una parte del dashboard (estadisticas, casos-criticos o pacientes-recientes)
+    como HTML para reemplazar en la página. GET condicional: 304 si no cambió.
+    """
+    if nombre not in fragmentos.FRAGMENTOS:
+        raise Http404("Fragmento inexistente")
+    
+    etag, html = fragmentos.fragmento(nombre)
+    respuesta = get_conditional_response(request, etag=etag) or HttpResponse(html)
+    respuesta['ETag'] = etag
+    respuesta['Cache-Control'] = 'private, no-cache'
+    return respuesta
+
+
+def script_estatico(request, nombre, version):
+    """
+    📦 Scripts de las páginas (triage/js/). La URL lleva el hash del contenido,
+    así que se cachean un año: una versión nueva cambia la URL.
+    """
+    if nombre not in fragmentos.SCRIPTS:
+        raise Http404("Script inexistente")
+    
+    actual, contenido = fragmentos.script(nombre)
+    if version != actual:
+        # Página vieja pidiendo una versión anterior: mandar a la vigente
+        return redirect('triage:script', nombre=nombre, version=actual)
+    
+    respuesta = HttpResponse(contenido, content_type='application/javascript; charset=utf-8')
+    respuesta['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return respuesta
+
+
 def manifest(request):
     """
     📱 PWA Manifest - Configuración para app instalable.
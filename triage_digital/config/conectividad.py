@@ -0,0 +1,108 @@
+"""
+🌐 Estado de la conexión con la base central, sin bloquear el arranque.
+
+settings.py elige la base al importarse, en cada proceso (runserver, cada
+worker, cada comando de manage.py). Probar la conexión ahí cuesta hasta el
+timeout del connect cuando no hay red, así que el resultado se guarda en un
+archivo de estado local (db/conectividad.json) y se reutiliza:
+
+- TRIAGE_CONEXION=online|offline fuerza el modo sin probar nada.
+- Estado vigente (más nuevo que TTL segundos): se usa tal cual.
+- Estado vencido: se usa el último conocido y se vuelve a probar en un
+  hilo de fondo; el resultado vale para los procesos que arranquen después.
+- Sin estado (primer arranque): una prueba corta, bloqueante, una sola vez.
+
+La prueba usa su propio timeout (socket.create_connection), sin tocar el
+timeout global de los sockets del proceso.
+"""
+import json
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+
+HOST_CENTRAL = "dpg-d454q9jipnbc73at7rn0-a.oregon-postgres.render.com"
+PUERTO_CENTRAL = 5432
+
+# Modo forzado: 'online', 'offline' o 'auto' (por defecto)
+VARIABLE_MODO = 'TRIAGE_CONEXION'
+
+# Segundos que vale un resultado antes de volver a probar
+TTL = int(os.environ.get('TRIAGE_CONEXION_TTL', '300'))
+
+# Timeout de la prueba: corta al arrancar sin estado, más holgada en segundo plano
+TIMEOUT_ARRANQUE = 1.0
+TIMEOUT_FONDO = 5.0
+
+ARCHIVO_ESTADO = Path(__file__).resolve().parent.parent / 'db' / 'conectividad.json'
+
+_lock = threading.Lock()
+_probando = False
+
+
+def probar(timeout=TIMEOUT_FONDO):
+    """Intenta abrir una conexión TCP con la base central. True si responde."""
+    try:
+        with socket.create_connection((HOST_CENTRAL, PUERTO_CENTRAL), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def leer_estado(archivo=ARCHIVO_ESTADO):
+    """Último resultado guardado como {'online': bool, 'fecha': epoch}, o None."""
+    try:
+        estado = json.loads(Path(archivo).read_text())
+        return {'online': bool(estado['online']), 'fecha': float(estado['fecha'])}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def guardar_estado(online, archivo=ARCHIVO_ESTADO):
+    """Escribe el resultado de forma atómica (los otros procesos nunca leen un archivo a medias)."""
+    archivo = Path(archivo)
+    archivo.parent.mkdir(exist_ok=True)
+    temporal = archivo.with_name(f'{archivo.name}.{os.getpid()}.tmp')
+    temporal.write_text(json.dumps({'online': online, 'fecha': time.time()}))
+    os.replace(temporal, archivo)
+
+
+def hay_conexion(archivo=ARCHIVO_ESTADO, ttl=TTL):
+    """
+    True si hay que usar la base central. No bloquea salvo en el primer
+    arranque (sin archivo de estado), y ahí como mucho TIMEOUT_ARRANQUE.
+    """
+    modo = os.environ.get(VARIABLE_MODO, 'auto').strip().lower()
+    if modo in ('online', 'offline'):
+        return modo == 'online'
+
+    estado = leer_estado(archivo)
+    if estado is None:
+        online = probar(TIMEOUT_ARRANQUE)
+        guardar_estado(online, archivo)
+        return online
+
+    if time.time() - estado['fecha'] > ttl:
+        reprobar_en_fondo(archivo)
+    return estado['online']
+
+
+def reprobar_en_fondo(archivo=ARCHIVO_ESTADO):
+    """Lanza una prueba en un hilo daemon (una a la vez por proceso)."""
+    global _probando
+    with _lock:
+        if _probando:
+            return False
+        _probando = True
+
+    def _reprobar():
+        global _probando
+        try:
+            guardar_estado(probar(TIMEOUT_FONDO), archivo)
+        finally:
+            with _lock:
+                _probando = False
+
+    threading.Thread(target=_reprobar, name='triage-conectividad', daemon=True).start()
+    return True
@@ -6,32 +6,49 @@ Utilidades para manejo híbrido de bases de datos (Online/Offline)
 """
 
 import os
-import socket
 import time
 from pathlib import Path
 
+from . import conectividad
+
+# Alias de la SQLite local cuando la base principal es la central (modo online)
+ALIAS_OFFLINE = 'offline'
+
+# Espera máxima por un bloqueo de escritura de otro proceso (segundos)
+ESPERA_BLOQUEO = 20
+
+# Perfil aplicado a cada conexión nueva a la SQLite local:
+# pragma -> (valor que se aplica, valor que devuelve PRAGMA <nombre> si tomó)
+PERFIL_SQLITE = {
+    # Necesario para PRAGMA incremental_vacuum (mantenimiento). Va primero: en
+    # una base nueva solo toma antes de escribir la cabecera (el cambio a WAL
+    # la escribe); en una existente, después de un VACUUM (ver perfil_sqlite)
+    'auto_vacuum': ('INCREMENTAL', 2),
+    # Lectores y escritor no se bloquean entre sí (persistente en el archivo)
+    'journal_mode': ('WAL', 'wal'),
+    # En WAL, NORMAL no corrompe: ante un corte de luz se pierden a lo sumo
+    # las últimas transacciones, sin fsync en cada commit
+    'synchronous': ('NORMAL', 1),
+    'foreign_keys': ('ON', 1),
+    'temp_store': ('MEMORY', 2),
+    # Páginas en cache por conexión: valor negativo = KiB (32 MiB)
+    'cache_size': (-32768, -32768),
+    # Lecturas por memoria mapeada en lugar de read() (256 MiB)
+    'mmap_size': (268435456, 268435456),
+    'busy_timeout': (ESPERA_BLOQUEO * 1000, ESPERA_BLOQUEO * 1000),
+}
+
 def check_internet_connection(timeout=5):
     """
     Verifica si hay conexión a internet intentando conectar a Render.
     
+    Prueba en el momento (bloquea hasta `timeout`); para elegir la base al
+    arrancar usar conectividad.hay_conexion(), que guarda el resultado.
+    
     Returns:
         bool: True si hay conexión, False si no hay conexión
     """
-    try:
-        # Intentar conectar al host de PostgreSQL en Render
-        host = "dpg-d454q9jipnbc73at7rn0-a.oregon-postgres.render.com"
-        port = 5432
-        
-        socket.setdefaulttimeout(timeout)
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        result = sock.connect_ex((host, port))
-        sock.close()
-        
-        return result == 0
-        
-    except Exception as e:
-        print(f"⚠️  Sin conexión a internet: {e}")
-        return False
+    return conectividad.probar(timeout)
 
 def get_database_config():
     """
@@ -40,8 +57,8 @@ def get_database_config():
     Returns:
         dict: Configuración de base de datos para Django
     """
-    # Verificar conexión
-    has_internet = check_internet_connection()
+    # Último estado conocido (archivo local con TTL); no espera a la red
+    has_internet = conectividad.hay_conexion()
     
     if has_internet:
         print("🌐 Modo ONLINE - Usando PostgreSQL en Render")
@@ -55,30 +72,51 @@ def get_database_config():
                 'PORT': '5432',
                 'OPTIONS': {
                     'sslmode': 'require',
+                    # Acota la detección de caídas (apps.triage.conmutacion)
+                    'connect_timeout': 3,
                 },
                 'CONN_MAX_AGE': 600,
                 'CONN_HEALTH_CHECKS': True,
-            }
+            },
+            # SQLite local disponible para sincronizar (sync_to/from_offline)
+            ALIAS_OFFLINE: get_offline_database_config(),
         }
     else:
         print("💾 Modo OFFLINE - Usando SQLite local")
         
-        # Crear directorio para BD local si no existe
-        db_dir = Path(__file__).parent.parent / 'db'
-        db_dir.mkdir(exist_ok=True)
-        
-        db_path = db_dir / 'triage_offline.sqlite3'
-        
         return {
-            'default': {
-                'ENGINE': 'django.db.backends.sqlite3',
-                'NAME': str(db_path),
-                'OPTIONS': {
-                    'timeout': 20,
-                },
-            }
+            'default': get_offline_database_config(),
         }
 
+def get_offline_database_config():
+    """
+    Configuración de la base SQLite local (modo offline).
+    
+    Returns:
+        dict: Configuración de una conexión de Django
+    """
+    # Crear directorio para BD local si no existe
+    db_dir = Path(__file__).parent.parent / 'db'
+    db_dir.mkdir(exist_ok=True)
+    
+    db_path = db_dir / 'triage_offline.sqlite3'
+    
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(db_path),
+        'OPTIONS': {
+            'timeout': ESPERA_BLOQUEO,
+            # Django lo ejecuta en cada conexión nueva
+            'init_command': ';'.join(
+                f'PRAGMA {pragma}={valor}' for pragma, (valor, _) in PERFIL_SQLITE.items()
+            ),
+            # Las transacciones toman el lock de escritura al empezar: dos
+            # escritores esperan su turno (busy_timeout) en lugar de fallar
+            # con "database is locked" al querer pasar de lectura a escritura
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+
 def check_offline_database():
     """
     Verifica y configura la base de datos offline si es necesaria.
@@ -107,16 +145,32 @@ def sync_to_offline():
     """
     Sincroniza datos desde PostgreSQL (online) hacia SQLite (offline).
     Esta función se debe ejecutar cuando hay conexión para preparar datos offline.
+    
+    Returns:
+        Resultado de apps.triage.sincronizacion.sincronizar, o None sin conexión
     """
-    print("🔄 Función de sincronización offline - Para implementar en futuras versiones")
-    # TODO: Implementar sincronización de datos
-    pass
+    return _sincronizar('default', ALIAS_OFFLINE)
 
 def sync_from_offline():
     """
     Sincroniza datos desde SQLite (offline) hacia PostgreSQL (online).
     Esta función se ejecuta cuando se recupera la conexión.
+    
+    Returns:
+        Resultado de apps.triage.sincronizacion.sincronizar, o None sin conexión
     """
-    print("🔄 Función de sincronización online - Para implementar en futuras versiones") 
-    # TODO: Implementar sincronización de datos
-    pass
\ No newline at end of file
+    return _sincronizar(ALIAS_OFFLINE, 'default')
+
+def _sincronizar(origen, destino):
+    """Envía los cambios pendientes del diario de `origen` a `destino`."""
+    from django.db import connections
+    from apps.triage.sincronizacion import sincronizar
+    
+    if ALIAS_OFFLINE not in connections.databases:
+        print("⚠️  Sin base central configurada (modo offline): la sincronización queda pendiente")
+        return None
+    
+    resultado = sincronizar(origen, destino)
+    print(f"🔄 Sincronización {origen} → {destino}: {resultado.entradas} cambios "
+          f"({resultado.pacientes} pacientes, {resultado.signos_vitales} triages)")
+    return resultado
@@ -0,0 +1,66 @@
+"""
+📄 Paginador para los listados grandes del admin.
+
+El Paginator de Django hace un COUNT(*) exacto del listado en cada página y
+trae la página con OFFSET sobre las filas completas (con sus joins). Con
+millones de signos vitales las dos cosas crecen con la tabla:
+
+- El total se cuenta hasta LIMITE_CONTEO filas; pasado ese punto se estima
+  con las estadísticas de la tabla (reltuples en PostgreSQL, MAX(id) en
+  SQLite), que no recorren filas. Con filtros la estimación es una cota
+  superior: las últimas páginas pueden venir vacías.
+- La página se busca en dos pasos: primero solo las claves primarias (el
+  OFFSET recorre el índice del orden, sin leer filas ni joins) y después
+  las filas completas de esas claves.
+
+Uso: `paginator = PaginadorEstimado` y `show_full_result_count = False` en
+el ModelAdmin (el segundo evita el COUNT(*) sin filtros del "N en total").
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+# Hasta esta cantidad de filas el total es exacto
+LIMITE_CONTEO = 10000
+
+
+class PaginadorEstimado(Paginator):
+    """Paginator con total acotado/estimado y páginas resueltas por clave primaria."""
+
+    @cached_property
+    def count(self):
+        consulta = self.object_list.order_by()
+        contadas = consulta.values('pk')[:LIMITE_CONTEO + 1].count()
+        if contadas <= LIMITE_CONTEO:
+            return contadas
+        return max(_filas_estimadas(consulta), contadas)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        inicio = (number - 1) * self.per_page
+        fin = inicio + self.per_page
+        if fin + self.orphans >= self.count:
+            fin = self.count
+
+        claves = list(self.object_list.values_list('pk', flat=True)[inicio:fin])
+        por_clave = self.object_list.in_bulk(claves)
+        return self._get_page([por_clave[clave] for clave in claves if clave in por_clave], number, self)
+
+
+def _filas_estimadas(consulta):
+    """Filas de la tabla según las estadísticas de la base (sin recorrerla)."""
+    modelo = consulta.model
+    conexion = connections[consulta.db]
+    if conexion.vendor == 'postgresql':
+        with conexion.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [modelo._meta.db_table],
+            )
+            fila = cursor.fetchone()
+        # -1 / 0: tabla todavía sin ANALYZE
+        if fila and fila[0] > 0:
+            return int(fila[0])
+    # Claves autoincrementales: el máximo sale del índice y acota las filas
+    return modelo._default_manager.using(consulta.db).aggregate(maximo=Max('pk'))['maximo'] or 0
@@ -28,6 +28,7 @@ INSTALLED_APPS = [
 # Middleware AUTO-OPTIMIZADO - Optimización transparente automática
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'apps.triage.conmutacion.ConmutacionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -67,7 +68,8 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database - Configuración Híbrida Online/Offline
-# Detecta automáticamente si hay conexión a internet y usa:
+# Elige según el último estado de conexión conocido (config/conectividad.py,
+# sin esperar a la red; TRIAGE_CONEXION=online|offline lo fuerza) y usa:
 # - PostgreSQL en Render (modo colaborativo online) 
 # - SQLite local (modo presentación offline)
 
@@ -92,6 +94,10 @@ except ImportError:
         }
     }
 
+# En modo online, lecturas y escrituras a la base activa: la central mientras
+# responde, la SQLite local durante un corte (apps/triage/conmutacion.py)
+DATABASE_ROUTERS = ['apps.triage.conmutacion.RouterConmutado']
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = 'es-ar'
@@ -102,10 +108,14 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 # Cache optimizado para consultas críticas de triage
+# Cache compartido entre workers: archivo SQLite local (modo WAL), sin servicios
+# externos. Invalidaciones, contadores y sesiones valen para todos los procesos.
+CACHE_DIR = BASE_DIR / 'db'
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'triage-emergency-cache',
+        'BACKEND': 'config.sqlite_cache.SQLiteCache',
+        'LOCATION': str(CACHE_DIR / 'cache_default.sqlite3'),
         'TIMEOUT': 300,  # 5 minutos - balance entre velocidad y actualización
         'OPTIONS': {
             'MAX_ENTRIES': 5000,  # Más entradas para hospital activo
@@ -114,8 +124,8 @@ CACHES = {
     },
     # Cache específico para estadísticas que pueden ser menos críticas
     'stats': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'triage-stats-cache',
+        'BACKEND': 'config.sqlite_cache.SQLiteCache',
+        'LOCATION': str(CACHE_DIR / 'cache_stats.sqlite3'),
         'TIMEOUT': 900,  # 15 minutos para estadísticas
         'OPTIONS': {
             'MAX_ENTRIES': 1000,
@@ -124,6 +134,18 @@ CACHES = {
     }
 }
 
+# 📄 Reportes generados en segundo plano: archivos en disco y threads por proceso
+REPORTES_DIR = CACHE_DIR / 'reportes'
+REPORTES_WORKERS = int(os.environ.get('REPORTES_WORKERS', '2'))
+
+# 📡 Eventos en vivo (SSE): cada puesto conectado ocupa un thread del servidor
+# durante todo el flujo (hasta 5 minutos). Requiere un servidor WSGI con threads
+# (runserver, gunicorn --threads, waitress); con workers sin threads se rechaza.
+# Bajo ASGI el flujo síncrono se bufferizaría entero: no sirve para eventos.
+# Tope de flujos abiertos a la vez por proceso (el resto reintenta más tarde);
+# dejarlo por debajo de los threads del proceso para que queden libres para requests
+SSE_MAX_CONEXIONES = int(os.environ.get('SSE_MAX_CONEXIONES', '20'))
+
 # Optimizaciones de performance
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -0,0 +1,41 @@
+"""
+🧪 Settings para correr los tests sin red ni archivos locales.
+
+    python manage.py test --settings=config.settings_tests
+
+Dos SQLite (la principal y ALIAS_OFFLINE, como en modo online) para probar
+sincronización y conmutación entre bases; el test runner las crea en memoria.
+Cache en memoria del proceso y logs solo por consola.
+"""
+import os
+
+# Sin prueba de conexión al importar settings
+os.environ.setdefault('TRIAGE_CONEXION', 'offline')
+
+from .settings import *  # noqa: E402,F401,F403
+from .database_utils import ALIAS_OFFLINE, get_offline_database_config  # noqa: E402
+
+DATABASES = {
+    'default': get_offline_database_config(),
+    ALIAS_OFFLINE: get_offline_database_config(),
+}
+
+# El monitor de conmutación lo crean los tests que lo usan (sin thread)
+MIDDLEWARE = [
+    clase for clase in MIDDLEWARE  # noqa: F405
+    if clase != 'apps.triage.conmutacion.ConmutacionMiddleware'
+]
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+    'stats': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-stats'},
+}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'console': {'class': 'logging.StreamHandler', 'level': 'ERROR'}},
+    'root': {'handlers': ['console'], 'level': 'ERROR'},
+}
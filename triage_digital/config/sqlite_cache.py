@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+🗄️ TRIAGE DIGITAL - CACHE COMPARTIDO EN SQLITE
+==============================================
+Backend de cache para Django guardado en un archivo SQLite local (modo WAL).
+
+Todos los procesos del mismo equipo ven el mismo cache, sin servicios
+externos: un cache.delete() en un worker invalida en todos, y cache.incr()
+es atómico entre procesos (una sola sentencia UPDATE).
+
+Uso en settings.CACHES:
+    'BACKEND': 'config.sqlite_cache.SQLiteCache',
+    'LOCATION': '/ruta/al/cache.sqlite3',
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Cada cuántas escrituras por conexión se revisa si hay que purgar
+ESCRITURAS_ENTRE_PURGAS = 50
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache compartido entre procesos sobre un archivo SQLite en modo WAL.
+
+    Los enteros se guardan como INTEGER (para incr atómico en SQL); el resto
+    de los valores se guardan serializados con pickle.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._ruta = Path(location)
+        self._local = threading.local()
+        self._ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._crear_tabla()
+
+    # ------------------------------------------------------------------
+    # Conexión
+    # ------------------------------------------------------------------
+
+    def _conexion(self):
+        """Una conexión por thread y por proceso (no se comparte tras un fork)."""
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = sqlite3.connect(
+                str(self._ruta), timeout=10, isolation_level=None
+            )
+            conexion.execute('PRAGMA journal_mode=WAL;')
+            conexion.execute('PRAGMA synchronous=NORMAL;')
+            self._local.conexion = conexion
+            self._local.pid = os.getpid()
+            self._local.escrituras = 0
+        return conexion
+
+    def _crear_tabla(self):
+        self._conexion().execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            ' clave TEXT PRIMARY KEY,'
+            ' valor BLOB,'
+            ' expira REAL'
+            ') WITHOUT ROWID'
+        )
+
+    # ------------------------------------------------------------------
+    # Codificación
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _codificar(valor):
+        if type(valor) is int and -2**63 <= valor < 2**63:
+            return valor
+        return pickle.dumps(valor, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decodificar(valor):
+        if isinstance(valor, int):
+            return valor
+        return pickle.loads(valor)
+
+    def _expiracion(self, timeout):
+        """Momento absoluto de expiración (None = nunca)."""
+        return self.get_backend_timeout(timeout)
+
+    # ------------------------------------------------------------------
+    # API de BaseCache
+    # ------------------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        fila = self._conexion().execute(
+            'SELECT valor FROM cache WHERE clave = ? AND (expira IS NULL OR expira > ?)',
+            (key, time.time()),
+        ).fetchone()
+        if fila is None:
+            return default
+        return self._decodificar(fila[0])
+
+    def get_many(self, keys, version=None):
+        claves = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not claves:
+            return {}
+        marcadores = ', '.join('?' * len(claves))
+        filas = self._conexion().execute(
+            f'SELECT clave, valor FROM cache WHERE clave IN ({marcadores})'
+            f' AND (expira IS NULL OR expira > ?)',
+            (*claves, time.time()),
+        ).fetchall()
+        return {claves[clave]: self._decodificar(valor) for clave, valor in filas}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._conexion().execute(
+            'INSERT OR REPLACE INTO cache (clave, valor, expira) VALUES (?, ?, ?)',
+            (key, self._codificar(value), self._expiracion(timeout)),
+        )
+        self._despues_de_escribir()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expira = self._expiracion(timeout)
+        filas = [
+            (self.make_and_validate_key(key, version=version), self._codificar(value), expira)
+            for key, value in data.items()
+        ]
+        conexion = self._conexion()
+        with conexion:
+            conexion.execute('BEGIN IMMEDIATE')
+            conexion.executemany(
+                'INSERT OR REPLACE INTO cache (clave, valor, expira) VALUES (?, ?, ?)', filas
+            )
+        self._despues_de_escribir()
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # Solo pisa la fila si ya expiró; atómico en una sentencia
+        cursor = self._conexion().execute(
+            'INSERT INTO cache (clave, valor, expira) VALUES (?, ?, ?)'
+            ' ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor, expira = excluded.expira'
+            ' WHERE cache.expira IS NOT NULL AND cache.expira <= ?',
+            (key, self._codificar(value), self._expiracion(timeout), time.time()),
+        )
+        self._despues_de_escribir()
+        return cursor.rowcount > 0
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._conexion().execute(
+            'UPDATE cache SET expira = ? WHERE clave = ? AND (expira IS NULL OR expira > ?)',
+            (self._expiracion(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conexion = self._conexion()
+        # Atómico entre procesos: lectura y escritura en una sola sentencia
+        fila = conexion.execute(
+            "UPDATE cache SET valor = valor + ? WHERE clave = ?"
+            " AND typeof(valor) = 'integer' AND (expira IS NULL OR expira > ?)"
+            " RETURNING valor",
+            (delta, key, time.time()),
+        ).fetchone()
+        if fila is not None:
+            return fila[0]
+
+        # No es un entero guardado como INTEGER: como BaseCache.incr, valor + delta
+        # (TypeError si no es un número), con la fila bloqueada hasta escribir
+        with conexion:
+            conexion.execute('BEGIN IMMEDIATE')
+            fila = conexion.execute(
+                'SELECT valor FROM cache WHERE clave = ? AND (expira IS NULL OR expira > ?)',
+                (key, time.time()),
+            ).fetchone()
+            if fila is None:
+                raise ValueError("Key '%s' not found" % key)
+            nuevo = self._decodificar(fila[0]) + delta
+            conexion.execute('UPDATE cache SET valor = ? WHERE clave = ?', (self._codificar(nuevo), key))
+        return nuevo
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._conexion().execute('DELETE FROM cache WHERE clave = ?', (key,))
+        return cursor.rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        claves = [self.make_and_validate_key(key, version=version) for key in keys]
+        if claves:
+            marcadores = ', '.join('?' * len(claves))
+            self._conexion().execute(f'DELETE FROM cache WHERE clave IN ({marcadores})', claves)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        fila = self._conexion().execute(
+            'SELECT 1 FROM cache WHERE clave = ? AND (expira IS NULL OR expira > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return fila is not None
+
+    def clear(self):
+        self._conexion().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # La conexión se reutiliza entre requests del mismo thread
+        pass
+
+    # ------------------------------------------------------------------
+    # Purga
+    # ------------------------------------------------------------------
+
+    def _despues_de_escribir(self):
+        self._local.escrituras += 1
+        if self._local.escrituras >= ESCRITURAS_ENTRE_PURGAS:
+            self._local.escrituras = 0
+            self._purgar()
+
+    def _purgar(self):
+        """
+        Borra lo expirado y, si se supera MAX_ENTRIES, lo que vence antes.
+
+        Lo guardado sin vencimiento (timeout=None: los contadores de
+        generación de cache_utils) no se purga: perderlo reiniciaría la
+        generación y volverían a valer claves viejas.
+        """
+        conexion = self._conexion()
+        conexion.execute('DELETE FROM cache WHERE expira IS NOT NULL AND expira <= ?', (time.time(),))
+        total = conexion.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if total > self._max_entries:
+            cantidad = total // self._cull_frequency if self._cull_frequency else total
+            conexion.execute(
+                'DELETE FROM cache WHERE clave IN ('
+                ' SELECT clave FROM cache WHERE expira IS NOT NULL ORDER BY expira LIMIT ?'
+                ')',
+                (cantidad,),
+            )
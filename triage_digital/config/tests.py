@@ -0,0 +1,117 @@
+"""
+🧪 Tests de la configuración compartida (cache en SQLite).
+
+    python manage.py test --settings=config.settings_tests
+"""
+import tempfile
+import threading
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from .sqlite_cache import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    """El backend sobre un archivo temporal, como lo usan los workers."""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = Path(directorio.name) / 'cache.sqlite3'
+        self.cache = self._cache()
+
+    def _cache(self, **opciones):
+        """Otra instancia sobre el mismo archivo (como otro proceso)."""
+        return SQLiteCache(str(self.ruta), {'TIMEOUT': 300, 'OPTIONS': opciones})
+
+    def test_add_sobre_fila_vencida(self):
+        # timeout=0: la fila queda escrita pero ya vencida
+        self.cache.set('turno', 'viejo', timeout=0)
+        self.assertIsNone(self.cache.get('turno'))
+        self.assertTrue(self.cache.add('turno', 'nuevo'))
+        self.assertEqual(self.cache.get('turno'), 'nuevo')
+
+        # Sobre una fila vigente (con o sin vencimiento) no pisa nada
+        self.assertFalse(self.cache.add('turno', 'otro'))
+        self.cache.set('generacion', 7, timeout=None)
+        self.assertFalse(self.cache.add('generacion', 1, timeout=None))
+        self.assertEqual(self._cache().get_many(['turno', 'generacion']), {'turno': 'nuevo', 'generacion': 7})
+
+    def test_incr(self):
+        with self.assertRaisesMessage(ValueError, 'not found'):
+            self.cache.incr('no_existe')
+        self.cache.set('vencida', 1, timeout=0)
+        with self.assertRaisesMessage(ValueError, 'not found'):
+            self.cache.incr('vencida')
+
+        self.cache.set('contador', 10)
+        self.assertEqual(self.cache.incr('contador', 5), 15)
+        self.assertEqual(self.cache.decr('contador'), 14)
+
+        # Existe pero no es un entero: como BaseCache (valor + delta), no "not found"
+        self.cache.set('promedio', 1.5)
+        self.assertEqual(self.cache.incr('promedio'), 2.5)
+        self.assertEqual(self.cache.get('promedio'), 2.5)
+        self.cache.set('texto', 'abc')
+        with self.assertRaises(TypeError):
+            self.cache.incr('texto')
+        self.assertEqual(self.cache.get('texto'), 'abc')
+
+    def test_incr_atomico_entre_threads(self):
+        self.cache.set('generacion', 1, timeout=None)
+        hilos, vueltas = 8, 50
+
+        def incrementar():
+            # Instancia propia: conexión y escrituras independientes, mismo archivo
+            cache = self._cache()
+            for _ in range(vueltas):
+                cache.incr('generacion')
+
+        trabajadores = [threading.Thread(target=incrementar) for _ in range(hilos)]
+        for trabajador in trabajadores:
+            trabajador.start()
+        for trabajador in trabajadores:
+            trabajador.join()
+        self.assertEqual(self.cache.get('generacion'), 1 + hilos * vueltas)
+
+    def test_purga_conserva_las_claves_sin_vencimiento(self):
+        cache = self._cache(MAX_ENTRIES=10, CULL_FREQUENCY=1)
+        for espacio in ('pacientes', 'reportes'):
+            cache.set(f'generacion:{espacio}', 3, timeout=None)
+        for numero in range(20):
+            cache.set(f'lista:{numero}', numero, timeout=60 + numero)
+        cache.set('vencida', 'x', timeout=0)
+
+        # CULL_FREQUENCY=1 purga todo lo que se puede purgar
+        cache._purgar()
+        self.assertEqual(
+            cache.get_many(['generacion:pacientes', 'generacion:reportes', 'lista:19', 'vencida']),
+            {'generacion:pacientes': 3, 'generacion:reportes': 3},
+        )
+
+        # Con CULL_FREQUENCY=2 se va la mitad del total (22 // 2), primero lo que vence antes
+        cache = self._cache(MAX_ENTRIES=10, CULL_FREQUENCY=2)
+        for numero in range(20):
+            cache.set(f'lista:{numero}', numero, timeout=60 + numero)
+        cache._purgar()
+        quedan = cache.get_many([f'lista:{numero}' for numero in range(20)])
+        self.assertEqual(sorted(quedan.values()), list(range(11, 20)))
+        self.assertEqual(cache.get('generacion:pacientes'), 3)
+
+    def test_get_many_y_delete_many(self):
+        self.cache.set_many({'a': 1, 'b': {'nivel': 'ROJO'}, 'c': [1, 2]})
+        self.cache.set('vencida', 'x', timeout=0)
+        self.cache.set('a', 'otra version', version=2)
+
+        self.assertEqual(self.cache.get_many([]), {})
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'vencida', 'no_existe']), {'a': 1, 'b': {'nivel': 'ROJO'}}
+        )
+        self.assertEqual(self.cache.get_many(['a'], version=2), {'a': 'otra version'})
+
+        self.cache.delete_many([])
+        self.cache.delete_many(['a', 'c', 'no_existe'])
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'b': {'nivel': 'ROJO'}})
+        # Solo se borró la versión pedida
+        self.assertEqual(self.cache.get('a', version=2), 'otra version')
@@ -8,4 +8,9 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+# 🚨 Precargar el índice de la cola de espera sin demorar el arranque
+from apps.triage.cola import cola_espera  # noqa: E402
+
+cola_espera.calentar_en_segundo_plano()
\ No newline at end of file